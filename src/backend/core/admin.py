@@ -5,6 +5,7 @@ from django.contrib.auth import admin as auth_admin
 from django.utils.translation import gettext_lazy as _
 
 from . import models
+from .api.pagination import EstimatedCountPaginator
 
 
 @admin.register(models.User)
@@ -81,6 +82,7 @@ class UserAdmin(auth_admin.UserAdmin):
         "-updated_at",
         "full_name",
     )
+    paginator = EstimatedCountPaginator
     readonly_fields = (
         "id",
         "sub",
@@ -91,6 +93,7 @@ class UserAdmin(auth_admin.UserAdmin):
         "updated_at",
     )
     search_fields = ("id", "sub", "admin_email", "email", "full_name")
+    show_full_result_count = False
 
 
 class ItemAccessInline(admin.TabularInline):
@@ -132,6 +135,8 @@ class ItemAdmin(admin.ModelAdmin):
                     "path",
                     "depth",
                     "numchild",
+                    "total_size",
+                    "total_files",
                 )
             },
         ),
@@ -145,14 +150,18 @@ class ItemAdmin(admin.ModelAdmin):
         "created_at",
         "updated_at",
     )
+    paginator = EstimatedCountPaginator
     readonly_fields = (
         "creator",
         "depth",
         "id",
         "numchild",
         "path",
+        "total_files",
+        "total_size",
     )
     search_fields = ("id", "title")
+    show_full_result_count = False
 
 
 @admin.register(models.Invitation)
@@ -181,3 +190,14 @@ class InvitationAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         obj.issuer = request.user
         obj.save()
+
+
+@admin.register(models.StorageQuota)
+class StorageQuotaAdmin(admin.ModelAdmin):
+    """Admin interface to handle the storage quotas of users."""
+
+    autocomplete_fields = ("user",)
+    fields = ("user", "used_size", "max_size")
+    readonly_fields = ("used_size",)
+    list_display = ("user", "used_size", "max_size")
+    search_fields = ("user__email", "user__sub")
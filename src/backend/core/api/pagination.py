@@ -0,0 +1,264 @@
+"""Pagination classes for the drive core app."""
+
+import base64
+import binascii
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def get_planner_count_estimate(queryset):
+    """
+    Return the number of rows the Postgres query planner expects the queryset to
+    return, without running it.
+    """
+    plan = json.loads(queryset.order_by().values("pk").explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPage(Page):
+    """Page which next page is known from the rows fetched rather than the count."""
+
+    def __init__(self, object_list, number, paginator, has_next=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator avoiding an exact COUNT(*) on large querysets.
+
+    Results are only counted up to the PAGINATION_COUNT_ESTIMATE_THRESHOLD setting.
+    Above it, the count is estimated from the hint given by the caller (e.g. the
+    number of children of a folder) or from the statistics of the query planner.
+
+    An estimated count may be too low or too high, so pages are not validated
+    against it: a page is only rejected if it comes back empty and the next page is
+    known by fetching one more row than the page size.
+    """
+
+    def __init__(self, *args, count_hint=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_hint = count_hint
+        self.is_count_estimated = False
+
+    @cached_property
+    def count(self):
+        """Return the exact count below the threshold, an estimate above it."""
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+
+        threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+        if self.count_hint is not None and self.count_hint > threshold:
+            self.is_count_estimated = True
+            return self.count_hint
+
+        bounded_count = self.object_list[: threshold + 1].count()
+        if bounded_count <= threshold:
+            return bounded_count
+
+        self.is_count_estimated = True
+        return max(get_planner_count_estimate(self.object_list), bounded_count)
+
+    def validate_number(self, number):
+        """Only validate that the page number is a positive integer if estimated."""
+        if not self.is_count_estimated:
+            return super().validate_number(number)
+
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError) as excpt:
+            raise PageNotAnInteger(self.error_messages["invalid_page"]) from excpt
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        """Return the page, bounded by the rows fetched rather than the estimate."""
+        # Resolving the count first tells whether it is estimated
+        if not self.count or not self.is_count_estimated:
+            return super().page(number)
+
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # Fetch one more row to know if there is a next page without counting
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows:
+            raise EmptyPage(self.error_messages["no_results"])
+        return self._get_page(
+            rows[: self.per_page], number, self, has_next=len(rows) > self.per_page
+        )
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedCountPage(*args, **kwargs)
+
+
+class Pagination(PageNumberPagination):
+    """
+    Pagination to display no more than 100 objects per page sorted by creation date.
+
+    Passing a `cursor` query parameter switches to keyset pagination (leave it empty
+    to get the first page): instead of counting all results and scanning an offset,
+    each page filters on the ordering field of the last item of the previous page,
+    using the item id to break ties. Offset pagination remains the default and the
+    only one available for results ordered otherwise, e.g. by relevance.
+
+    In offset mode, large counts are estimated (see `EstimatedCountPaginator`) and
+    flagged as such in the response. Views can set a `pagination_count_hint`
+    attribute when they know the approximate number of results.
+    """
+
+    ordering = "-created_on"
+    max_page_size = 200
+    page_size_query_param = "page_size"
+
+    cursor_query_param = "cursor"
+    cursor_ordering_fields = ["created_at", "updated_at", "title", "type"]
+    cursor_default_ordering = "created_at"
+    invalid_cursor_message = "Invalid cursor"
+    unsupported_ordering_message = (
+        "Cursor pagination is not supported with the ordering of these results."
+    )
+
+    def __init__(self):
+        self.cursor_ordering = None
+        self.next_cursor = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate with a cursor if one was requested, by page number otherwise."""
+        if self.cursor_query_param not in request.query_params:
+            self.django_paginator_class = partial(
+                EstimatedCountPaginator,
+                count_hint=getattr(view, "pagination_count_hint", None),
+            )
+            return super().paginate_queryset(queryset, request, view=view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.cursor_ordering = self.get_cursor_ordering(queryset)
+        field = self.cursor_ordering.lstrip("-")
+        is_descending = self.cursor_ordering.startswith("-")
+
+        queryset = queryset.order_by(
+            *([f"-{field}", "-id"] if is_descending else [field, "id"])
+        )
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            value, pk = cursor
+            lookup = "lt" if is_descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": value})
+                | Q(**{field: value, f"id__{lookup}": pk})
+            )
+
+        # Fetch one more item to know if there is a next page without counting
+        results = list(queryset[: page_size + 1])
+        page = results[:page_size]
+        self.next_cursor = (
+            self.encode_cursor(page[-1], field) if len(results) > page_size else None
+        )
+        return page
+
+    def get_paginated_response(self, data):
+        """
+        Flag estimated counts in offset mode. Only return a link to the next page in
+        cursor mode, no count.
+        """
+        if self.cursor_ordering is None:
+            response = super().get_paginated_response(data)
+            if self.page.paginator.is_count_estimated:
+                response.data["is_count_estimated"] = True
+            return response
+
+        return Response({"next": self.get_next_cursor_link(), "results": data})
+
+    def get_cursor_ordering(self, queryset):
+        """
+        Return the ordering of the queryset, or the default cursor ordering if it is
+        not ordered. Orderings not supported by keyset pagination, e.g. by relevance,
+        are rejected rather than silently replaced.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering  # noqa: SLF001
+        if not ordering:
+            return self.cursor_default_ordering
+
+        first = ordering[0]
+        if isinstance(first, str) and first.lstrip("-") in self.cursor_ordering_fields:
+            return first
+        raise DRFValidationError(
+            {self.cursor_query_param: [self.unsupported_ordering_message]},
+            code="cursor_ordering_unsupported",
+        )
+
+    def encode_cursor(self, instance, field):
+        """Build an opaque cursor pointing after the instance."""
+        value = getattr(instance, field)
+        payload = {
+            "o": self.cursor_ordering,
+            "v": value.isoformat() if hasattr(value, "isoformat") else value,
+            "id": str(instance.pk),
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, request, model):
+        """
+        Return the ordering value and id encoded in the cursor of the request or
+        None for the first page.
+        """
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if payload["o"] != self.cursor_ordering:
+                raise ValueError("Cursor ordering mismatch")
+            field = model._meta.get_field(self.cursor_ordering.lstrip("-"))  # noqa: SLF001
+            value = field.to_python(payload["v"])
+            pk = model._meta.pk.to_python(payload["id"])  # noqa: SLF001
+        except (
+            binascii.Error,
+            FieldDoesNotExist,
+            KeyError,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ) as excpt:
+            raise NotFound(self.invalid_cursor_message) from excpt
+
+        if value is None or pk is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return value, pk
+
+    def get_next_cursor_link(self):
+        """Return the url of the next page in cursor mode."""
+        if self.next_cursor is None:
+            return None
+
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
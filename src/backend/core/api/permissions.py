@@ -11,6 +11,8 @@ from core.models import ItemAccess, RoleChoices, get_trashbin_cutoff
 ACTION_FOR_METHOD_TO_PERMISSION = {
     "versions_detail": {"DELETE": "versions_destroy", "GET": "versions_retrieve"},
     "children": {"GET": "children_list", "POST": "children_create"},
+    "children_bulk": {"POST": "children_create"},
+    "children_manifest": {"POST": "children_create"},
 }
 
 
@@ -122,15 +124,13 @@ class ItemAccessPermission(AccessPermission):
         - for which the trashbin cutoff is past
         - for which the current user is not owner of the item or one of its ancestors
         """
-        if (
-            deleted_at := obj.ancestors_deleted_at
-        ) and deleted_at < get_trashbin_cutoff():
+        deleted_at = obj.current_ancestors_deleted_at
+        if deleted_at and deleted_at < get_trashbin_cutoff():
             raise Http404
 
-        # Compute permission first to ensure the "user_roles" attribute is set
         has_permission = super().has_object_permission(request, view, obj)
 
-        if obj.ancestors_deleted_at and not RoleChoices.OWNER in obj.user_roles:
+        if deleted_at and RoleChoices.OWNER not in obj.get_roles(request.user):
             raise Http404
 
         return has_permission
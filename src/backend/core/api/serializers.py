@@ -3,7 +3,9 @@
 from datetime import timedelta
 
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.db.models.manager import BaseManager
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import exceptions, serializers
@@ -121,6 +123,16 @@ class ItemAccessSerializer(BaseAccessSerializer):
         read_only_fields = ["id", "abilities"]
 
 
+class ItemListSerializer(serializers.ListSerializer):
+    """Serialize a list of items, computing their number of accesses all at once."""
+
+    def to_representation(self, data):
+        """Prefetch the number of accesses of the items before serializing them."""
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        models.Item.objects.prefetch_nb_accesses(items)
+        return super().to_representation(items)
+
+
 class ListItemSerializer(serializers.ModelSerializer):
     """Serialize items with limited fields for display in lists."""
 
@@ -157,6 +169,8 @@ class ListItemSerializer(serializers.ModelSerializer):
             "mimetype",
             "main_workspace",
             "size",
+            "total_size",
+            "total_files",
             "description",
             "deleted_at",
             "hard_delete_at",
@@ -182,23 +196,19 @@ class ListItemSerializer(serializers.ModelSerializer):
             "mimetype",
             "main_workspace",
             "size",
+            "total_size",
+            "total_files",
             "description",
             "deleted_at",
             "hard_delete_at",
         ]
+        list_serializer_class = ItemListSerializer
 
     def get_abilities(self, item) -> dict:
         """Return abilities of the logged-in user on the instance."""
         request = self.context.get("request")
         if request:
-            paths_links_mapping = self.context.get("paths_links_mapping", None)
-            # Retrieve ancestor links from paths_links_mapping (if provided)
-            ancestors_links = (
-                paths_links_mapping.get(str(item.path[:-1]))
-                if paths_links_mapping
-                else None
-            )
-            return item.get_abilities(request.user, ancestors_links=ancestors_links)
+            return item.get_abilities(request.user)
         return {}
 
     def get_user_roles(self, item):
@@ -231,6 +241,36 @@ class ListItemSerializer(serializers.ModelSerializer):
         return hard_delete_at.isoformat()
 
 
+class TreeItemSerializer(ListItemSerializer):
+    """
+    Serialize an item with its children nested, as attached by the tree view in the
+    "tree_children" attribute of each item.
+    """
+
+    children = serializers.SerializerMethodField(read_only=True)
+
+    class Meta(ListItemSerializer.Meta):
+        fields = [*ListItemSerializer.Meta.fields, "children"]
+        read_only_fields = [*ListItemSerializer.Meta.read_only_fields, "children"]
+
+    def get_children(self, item) -> list:
+        """Serialize the children attached to the item, recursively."""
+        return [
+            TreeItemSerializer(child, context=self.context).data
+            for child in getattr(item, "tree_children", [])
+        ]
+
+
+class SearchContentItemSerializer(ListItemSerializer):
+    """Serialize the items found by content, with a snippet of the matching text."""
+
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(ListItemSerializer.Meta):
+        fields = [*ListItemSerializer.Meta.fields, "snippet"]
+        read_only_fields = [*ListItemSerializer.Meta.read_only_fields, "snippet"]
+
+
 class ItemSerializer(ListItemSerializer):
     """Serialize items with all fields for display in detail views."""
 
@@ -259,6 +299,8 @@ class ItemSerializer(ListItemSerializer):
             "mimetype",
             "main_workspace",
             "size",
+            "total_size",
+            "total_files",
             "description",
             "deleted_at",
             "hard_delete_at",
@@ -292,12 +334,13 @@ class ItemSerializer(ListItemSerializer):
         raise NotImplementedError("Create method can not be used.")
 
     def update(self, instance, validated_data):
-        """Validate that the title is unique in the current path."""
-        if (
-            instance.title != validated_data.get("title")
-            and instance.depth > 1
-            and instance.is_item_title_existing(validated_data.get("title"))
-        ):
+        """Map a title already used in the current path to a validation error."""
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as error:
+            if not models.is_item_title_conflict(error):
+                raise
             raise serializers.ValidationError(
                 {
                     "title": _(
@@ -305,9 +348,7 @@ class ItemSerializer(ListItemSerializer):
                     )
                 },
                 code="item_update_title_already_exists",
-            )
-
-        return super().update(instance, validated_data)
+            ) from error
 
 
 class CreateItemSerializer(ItemSerializer):
@@ -343,6 +384,8 @@ class CreateItemSerializer(ItemSerializer):
             "policy",
             "main_workspace",
             "size",
+            "total_size",
+            "total_files",
             "description",
             "hard_delete_at",
         ]
@@ -417,7 +460,9 @@ class CreateItemSerializer(ItemSerializer):
         if item.type != models.ItemTypeChoices.FILE:
             return None
 
-        return utils.generate_upload_policy(item)
+        return utils.generate_upload_policy(
+            item, models.StorageQuota.objects.get_available_size(item)
+        )
 
     def get_numchild(self, _item):
         """On creation, an item can not have children, return directly 0"""
@@ -431,6 +476,104 @@ class CreateItemSerializer(ItemSerializer):
         raise NotImplementedError("Update method can not be used.")
 
 
+class ItemManifestSerializer(serializers.Serializer):
+    """
+    Serializer used to validate a tree of items to create at once. Ids are supplied by
+    the client so that it can match the upload policies with its files.
+    """
+
+    id = serializers.UUIDField()
+    type = serializers.ChoiceField(choices=models.ItemTypeChoices.choices)
+    title = serializers.CharField(max_length=255, required=False)
+    filename = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+
+    def get_fields(self):
+        """Declare the children with the serializer itself."""
+        fields = super().get_fields()
+        fields["children"] = ItemManifestSerializer(many=True, required=False)
+        return fields
+
+    def validate(self, attrs):
+        """
+        Validate that filename is set for files and only for them, title for folders,
+        that only folders have children and that their titles are unique.
+        """
+        if attrs["type"] == models.ItemTypeChoices.FILE:
+            if attrs.get("filename") is None:
+                raise serializers.ValidationError(
+                    {"filename": _("This field is required for files.")},
+                    code="item_create_file_filename_required",
+                )
+            if attrs.get("children"):
+                raise serializers.ValidationError(
+                    {"children": _("Only folders can have children.")},
+                    code="item_create_child_type_folder_only",
+                )
+
+            # When it's a file we force the title with the filename
+            attrs["title"] = attrs["filename"]
+        elif attrs.get("filename") is not None:
+            raise serializers.ValidationError(
+                {"filename": _("Only files can have a filename.")},
+                code="item_create_folder_filename_forbidden",
+            )
+
+        if attrs.get("title") is None:
+            raise serializers.ValidationError(
+                {"title": _("This field is required for folders.")},
+                code="item_create_folder_title_required",
+            )
+
+        titles = [child["title"] for child in attrs.get("children", [])]
+        if len(set(titles)) < len(titles):
+            raise serializers.ValidationError(
+                {"children": _("title already exists in this folder.")},
+                code="item_create_child_title_already_exists",
+            )
+
+        return attrs
+
+
+class BulkCreatedItemSerializer(serializers.ModelSerializer):
+    """
+    Lightweight serializer of the items created in bulk, without the fields requiring
+    queries on each item.
+    """
+
+    policy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Item
+        fields = [
+            "id",
+            "created_at",
+            "depth",
+            "filename",
+            "path",
+            "policy",
+            "title",
+            "type",
+            "upload_state",
+        ]
+        read_only_fields = fields
+
+    def get_policy(self, item):
+        """
+        Return the policy to use if the item is a file. The storage quota left in the
+        workspace can be given in the context to look it up once for all items, split
+        between the files of the batch.
+        """
+        if item.type != models.ItemTypeChoices.FILE:
+            return None
+
+        if "available_size" in self.context:
+            available_size = self.context["available_size"]
+        else:
+            available_size = models.StorageQuota.objects.get_available_size(item)
+        return utils.generate_upload_policy(item, available_size)
+
+
 class LinkItemSerializer(serializers.ModelSerializer):
     """
     Serialize link configuration for items.
@@ -534,3 +677,23 @@ class MoveItemSerializer(serializers.Serializer):
     """
 
     target_item_id = serializers.UUIDField(required=True)
+
+
+class DownloadItemsSerializer(serializers.Serializer):
+    """
+    Serializer for validating the query parameters of the download of items as a zip
+    archive.
+
+    Fields:
+        - ids (ListField): The IDs of the selected items, folders being downloaded
+            with their subtree. At least one valid UUID is required.
+
+    Example:
+        GET /items/download/?ids=<uuid>&ids=<uuid>
+    """
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=settings.ITEM_DOWNLOAD_MAX_SELECTION,
+    )
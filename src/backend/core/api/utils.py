@@ -1,12 +1,31 @@
 """Util to generate S3 authorization headers for object storage access control"""
 
-from datetime import datetime
+import functools
+import hashlib
+import hmac
+import logging
+import os
+import zipfile
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
 
 from django.conf import settings
 from django.core.files.storage import default_storage
 
 import botocore
 
+from core.models import ItemTypeChoices
+
+logger = logging.getLogger(__name__)
+
+# Hash of an empty payload, signed for requests without body
+EMPTY_SHA256_HASH = hashlib.sha256(b"").hexdigest()
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Key of the object url used to find the url prefix of the objects of a bucket
+S3_URL_PREFIX_SENTINEL_KEY = "key"
+# Size of the chunks read from the object storage and written to zip archives
+ZIP_STREAM_CHUNK_SIZE = 2**20  # 1MB
+
 
 def flat_to_nested(items):
     """
@@ -42,6 +61,27 @@ def flat_to_nested(items):
     return roots[0] if roots else {}
 
 
+def get_manifest_size(manifest):
+    """
+    Return the number of nodes and the depth of a manifest of items to create, as
+    posted, level by level rather than recursively so that deeply nested manifests
+    can be rejected before they are validated. Malformed nodes are left to the
+    validation.
+    """
+    nb_nodes = depth = 0
+    level = manifest if isinstance(manifest, list) else []
+    while level:
+        depth += 1
+        nb_nodes += len(level)
+        level = [
+            child
+            for node in level
+            if isinstance(node, dict) and isinstance(node.get("children"), list)
+            for child in node["children"]
+        ]
+    return nb_nodes, depth
+
+
 def filter_root_paths(paths, skip_sorting=False):
     """
     Filters root paths from a list of paths representing a tree structure.
@@ -65,6 +105,38 @@ def filter_root_paths(paths, skip_sorting=False):
     return root_paths
 
 
+@functools.lru_cache(maxsize=8)
+def get_s3_object_url_prefix(bucket_name, endpoint_url):
+    """
+    Return the host and the path prefix of the urls of the objects of a bucket,
+    resolved once by botocore so that its addressing style is respected.
+    """
+    url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
+        "get_object",
+        ExpiresIn=0,
+        Params={"Bucket": bucket_name, "Key": S3_URL_PREFIX_SENTINEL_KEY},
+    )
+    split_url = urlsplit(url)
+    host = split_url.hostname
+    if split_url.port is not None and split_url.port != DEFAULT_PORTS.get(
+        split_url.scheme
+    ):
+        host = f"{host:s}:{split_url.port:d}"
+    return host, split_url.path.removesuffix(S3_URL_PREFIX_SENTINEL_KEY)
+
+
+@functools.lru_cache(maxsize=8)
+def get_s3_signing_key(secret_key, date, region, service="s3"):
+    """
+    Derive the Signature Version 4 signing key of a day, region and service. It only
+    changes once a day so it is computed once instead of on every signature.
+    """
+    key = f"AWS4{secret_key:s}".encode()
+    for message in (date, region, service, "aws4_request"):
+        key = hmac.digest(key, message.encode(), "sha256")
+    return key
+
+
 def generate_s3_authorization_headers(key):
     """
     Generate authorization headers for an s3 object.
@@ -74,28 +146,69 @@ def generate_s3_authorization_headers(key):
       with cookies)
     - access control is truly realtime
     - the object storage service does not need to be exposed on internet
-    """
-    url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
-        "get_object",
-        ExpiresIn=0,
-        Params={"Bucket": default_storage.bucket_name, "Key": key},
-    )
-    request = botocore.awsrequest.AWSRequest(method="get", url=url)
 
+    The headers are those that botocore's S3SigV4Auth computes for a GET request
+    without body, but the request is signed directly with the url prefix of the
+    bucket and the signing key of the day cached, which is much cheaper than
+    going through a botocore request on every media access.
+    """
     s3_client = default_storage.connection.meta.client
     # pylint: disable=protected-access
-    credentials = s3_client._request_signer._credentials  # noqa: SLF001
-    frozen_credentials = credentials.get_frozen_credentials()
+    credentials = s3_client._request_signer._credentials.get_frozen_credentials()  # noqa: SLF001
     region = s3_client.meta.region_name
-    auth = botocore.auth.S3SigV4Auth(frozen_credentials, "s3", region)
-    auth.add_auth(request)
+    host, path_prefix = get_s3_object_url_prefix(
+        default_storage.bucket_name, s3_client.meta.endpoint_url
+    )
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{timestamp[:8]:s}/{region:s}/s3/aws4_request"
+    headers = {"X-Amz-Date": timestamp}
+    if credentials.token:
+        headers["X-Amz-Security-Token"] = credentials.token
+    headers["X-Amz-Content-SHA256"] = EMPTY_SHA256_HASH
+
+    canonical_headers = sorted(
+        [("host", host)] + [(name.lower(), value) for name, value in headers.items()]
+    )
+    signed_headers = ";".join(name for name, _value in canonical_headers)
+    canonical_request = "\n".join(
+        [
+            "GET",
+            f"{path_prefix:s}{quote(key, safe='/~'):s}",
+            "",
+            "".join(f"{name:s}:{value:s}\n" for name, value in canonical_headers),
+            signed_headers,
+            EMPTY_SHA256_HASH,
+        ]
+    )
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            timestamp,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ]
+    )
+    signature = hmac.new(
+        get_s3_signing_key(credentials.secret_key, timestamp[:8], region),
+        string_to_sign.encode(),
+        hashlib.sha256,
+    ).hexdigest()
 
-    return request
+    headers["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={credentials.access_key:s}/{scope:s}, "
+        f"SignedHeaders={signed_headers:s}, "
+        f"Signature={signature:s}"
+    )
+    return headers
 
 
-def generate_upload_policy(item):
+def generate_upload_policy(item, available_size=None):
     """
     Generate a S3 upload policy for a given item.
+
+    The size of the file is limited by the storage quota left in the workspace of the
+    item, if given, so that the storage refuses uploads exceeding it.
     """
 
     # Generate a unique key for the item
@@ -109,9 +222,125 @@ def generate_upload_policy(item):
         Fields={"acl": "private"},
         Conditions=[
             {"acl": "private"},
-            ["content-length-range", 0, settings.ITEM_FILE_MAX_SIZE],
+            [
+                "content-length-range",
+                0,
+                settings.ITEM_FILE_MAX_SIZE
+                if available_size is None
+                else min(available_size, settings.ITEM_FILE_MAX_SIZE),
+            ],
         ],
         ExpiresIn=settings.AWS_S3_UPLOAD_POLICY_EXPIRATION,
     )
 
     return policy
+
+
+class ZipStreamBuffer:
+    """
+    Unseekable file object in which a zip archive is written and that is emptied as
+    the archive is streamed. As it can't seek back, zipfile writes the sizes and
+    checksums of entries in data descriptors after their content.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        """Keep the data written until it is popped."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Nothing to flush, the data written is consumed by `pop`."""
+
+    def pop(self):
+        """Return and forget the data written since the last call."""
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def get_zip_entry_title(title):
+    """
+    Make a title safe to use as a component of a zip entry name: path separators are
+    replaced and relative path components are renamed, so that no entry can be
+    extracted outside of the target directory.
+    """
+    title = title.replace("/", "_").replace("\\", "_").replace("\x00", "")
+    if title.strip() in {"", ".", ".."}:
+        return "_"
+    return title
+
+
+def get_zip_entry_names(items):
+    """
+    Name the entries of a zip archive after the titles of items ordered by path: an
+    item is placed in the folder of its parent if it is in the archive, at the root
+    of the archive otherwise. Colliding names are numbered.
+    """
+    folder_names = {}
+    names = set()
+    for item in items:
+        title = get_zip_entry_title(item.title)
+        parent_name = folder_names.get(str(item.path[-2])) if item.depth > 1 else None
+        name = f"{parent_name:s}/{title:s}" if parent_name else title
+
+        stem, extension = (
+            (name, "")
+            if item.type == ItemTypeChoices.FOLDER
+            else os.path.splitext(name)
+        )
+        index = 1
+        while name in names:
+            name = f"{stem:s} ({index:d}){extension:s}"
+            index += 1
+        names.add(name)
+
+        if item.type == ItemTypeChoices.FOLDER:
+            folder_names[str(item.id)] = name
+        yield name, item
+
+
+def stream_items_zip(items):
+    """
+    Stream a zip archive of items, iterated in path order. Files are read from the
+    object storage and written to the archive chunk by chunk, so that memory stays
+    constant whatever the size of the archive. Entries are stored without compression
+    and ZIP64 extensions are used for files and archives exceeding the zip limits.
+    """
+    s3_client = default_storage.connection.meta.client
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for name, item in get_zip_entry_names(items):
+            date_time = item.updated_at.timetuple()[:6]
+            if item.type == ItemTypeChoices.FOLDER:
+                archive.writestr(zipfile.ZipInfo(f"{name:s}/", date_time), b"")
+                continue
+
+            try:
+                body = s3_client.get_object(
+                    Bucket=default_storage.bucket_name, Key=item.file_key
+                )["Body"]
+            except botocore.exceptions.ClientError as error:
+                logger.warning("Item %s skipped from zip archive: %s", item.id, error)
+                continue
+
+            entry_info = zipfile.ZipInfo(name, date_time)
+            # The size is known in advance to tell if the entry needs ZIP64 extensions
+            entry_info.file_size = item.size or 0
+            # Release the connection to the storage even if the client aborts
+            try:
+                with archive.open(
+                    entry_info, mode="w", force_zip64=item.size is None
+                ) as entry:
+                    for chunk in body.iter_chunks(ZIP_STREAM_CHUNK_SIZE):
+                        entry.write(chunk)
+                        yield buffer.pop()
+            finally:
+                body.close()
+
+            if data := buffer.pop():
+                yield data
+
+    yield buffer.pop()
@@ -1,32 +1,48 @@
 """API endpoints"""
 # pylint: disable=too-many-lines
 
+import itertools
 import logging
 import re
 from urllib.parse import unquote, urlparse
 
 from django.conf import settings
 from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.expressions import ArraySubquery
 from django.contrib.postgres.fields import ArrayField
-from django.contrib.postgres.search import TrigramSimilarity
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.db import models as db
 from django.db import transaction
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
 
 import magic
 import rest_framework as drf
+from django_ltree.fields import PathField
 from rest_framework import filters, status, viewsets
 from rest_framework import response as drf_response
 from rest_framework.permissions import AllowAny
 from rest_framework.throttling import UserRateThrottle
 
 from core import enums, models
-from core.tasks.item import process_item_deletion
+from core.tasks.item import (
+    extract_item_content,
+    process_item_deletion,
+    propagate_subtree_deletion,
+)
 
 from . import permissions, serializers, utils
 from .filters import ItemFilter, ListItemFilter
+from .pagination import Pagination
 
 from rag.rag.get_file import get_item_from_minio
 
@@ -42,6 +58,9 @@ MEDIA_STORAGE_URL_PATTERN = re.compile(
     f"(?P<key>{ITEM_FOLDER:s}/(?P<pk>{UUID_REGEX:s})/.*{FILE_EXT_REGEX:s})$"
 )
 
+# Number of items fetched at once while streaming a zip archive
+ZIP_ITEMS_CHUNK_SIZE = 500
+
 # pylint: disable=too-many-ancestors
 
 
@@ -124,14 +143,6 @@ class SerializerPerActionMixin:
         return super().get_serializer_class()
 
 
-class Pagination(drf.pagination.PageNumberPagination):
-    """Pagination to display no more than 100 objects per page sorted by creation date."""
-
-    ordering = "-created_on"
-    max_page_size = 200
-    page_size_query_param = "page_size"
-
-
 class UserListThrottleBurst(UserRateThrottle):
     """Throttle for the user list endpoint."""
 
@@ -345,6 +356,7 @@ class ItemViewSet(
     ### API Endpoints:
     1. **List**: Retrieve a paginated list of items.
        Example: GET /items/?page=2
+       Example: GET /items/?cursor= (then follow the "next" link)
     2. **Retrieve**: Get a specific item by its ID.
        Example: GET /items/{id}/
     3. **Create**: Create a new item.
@@ -403,6 +415,8 @@ class ItemViewSet(
     ordering = ["-updated_at"]
     ordering_fields = ["created_at", "updated_at", "title", "type"]
     pagination_class = Pagination
+    # Approximate number of results, set by actions that know it (see `Pagination`)
+    pagination_count_hint = None
     permission_classes = [
         permissions.ItemAccessPermission,
     ]
@@ -410,9 +424,12 @@ class ItemViewSet(
     serializer_class = serializers.ItemSerializer
     list_serializer_class = serializers.ListItemSerializer
     trashbin_serializer_class = serializers.ListItemSerializer
+    recents_serializer_class = serializers.ListItemSerializer
+    search_serializer_class = serializers.ListItemSerializer
+    search_content_serializer_class = serializers.SearchContentItemSerializer
     children_serializer_class = serializers.ListItemSerializer
     create_serializer_class = serializers.CreateItemSerializer
-    tree_serializer_class = serializers.ListItemSerializer
+    tree_serializer_class = serializers.TreeItemSerializer
 
     def annotate_is_favorite(self, queryset):
         """
@@ -437,10 +454,18 @@ class ItemViewSet(
         output_field = ArrayField(base_field=db.CharField())
 
         if user.is_authenticated:
-            user_roles_subquery = models.ItemAccess.objects.filter(
-                db.Q(user=user) | db.Q(team__in=user.teams),
-                item__path__ancestors=db.OuterRef("path"),
-            ).values_list("role", flat=True)
+            user_roles_subquery = (
+                models.ItemAccessSubtree.objects.filter(
+                    db.Q(user=user) | db.Q(team__in=user.teams),
+                    path__ancestors=db.OuterRef("path"),
+                )
+                .annotate(
+                    role=db.Func(
+                        "roles", function="unnest", output_field=db.CharField()
+                    )
+                )
+                .values_list("role", flat=True)
+            )
 
             return queryset.annotate(
                 user_roles=db.Func(
@@ -452,21 +477,54 @@ class ItemViewSet(
             user_roles=db.Value([], output_field=output_field),
         )
 
+    def filter_readable_subtrees(self, queryset):
+        """
+        Filter the queryset on the live items readable by the current user in the
+        subtrees on which they have a role and in the subtrees of the items they
+        previously accessed by link.
+
+        The roots of these subtrees are resolved in subqueries so that the queryset
+        remains restricted by the index on the path, e.g. to be combined with a
+        search index.
+        """
+        user = self.request.user
+        access_paths = (
+            models.ItemAccessSubtree.objects.filter(
+                db.Q(user=user) | db.Q(team__in=user.teams)
+            )
+            .order_by()
+            .values("path")
+        )
+        traced_paths = (
+            models.Item.objects.filter(link_traces__user=user).order_by().values("path")
+        )
+        return (
+            queryset.filter(
+                db.Q(path__descendants=ArraySubquery(access_paths))
+                | db.Q(path__descendants=ArraySubquery(traced_paths)),
+                ancestors_deleted_at__isnull=True,
+            )
+            .exclude_propagating_deletions()
+            .readable(user)
+        )
+
     def get_queryset(self):
         """Get queryset performing all annotation and filtering on the item tree structure."""
         user = self.request.user
         queryset = super().get_queryset().select_related("creator")
         # Only list views need filtering and annotation
         if self.detail:
-            return queryset
+            return queryset.annotate_subtree_propagation()
 
         if not user.is_authenticated:
             return queryset.none()
 
-        queryset = queryset.filter(ancestors_deleted_at__isnull=True)
+        queryset = queryset.filter(
+            ancestors_deleted_at__isnull=True
+        ).exclude_propagating_deletions()
 
         # Filter items to which the current user has access...
-        access_items_ids = models.ItemAccess.objects.filter(
+        access_items_ids = models.ItemAccessSubtree.objects.filter(
             db.Q(user=user) | db.Q(team__in=user.teams)
         ).values_list("item_id", flat=True)
 
@@ -511,14 +569,10 @@ class ItemViewSet(
         instance = self.get_object()
         serializer = self.get_serializer(instance)
 
-        # The `create` query generates 5 db queries which are much less efficient than an
-        # `exists` query. The user will visit the item many times after the first visit
-        # so that's what we should optimize for.
-        if (
-            user.is_authenticated
-            and not instance.link_traces.filter(user=user).exists()
-        ):
-            models.LinkTrace.objects.create(item=instance, user=request.user)
+        # Traces are buffered in cache and written periodically in batches so that hot
+        # links opened by many users don't cause bursts of writes in the request path.
+        if user.is_authenticated:
+            models.LinkTrace.objects.record(instance, user)
 
         return drf.response.Response(serializer.data)
 
@@ -537,8 +591,14 @@ class ItemViewSet(
         )
 
     def perform_destroy(self, instance):
-        """Override to implement a soft delete instead of dumping the record in database."""
-        instance.soft_delete()
+        """
+        Override to implement a soft delete instead of dumping the record in database.
+        The deletion of large subtrees is propagated to descendants in the background.
+        """
+        asynchronous = instance.should_propagate_asynchronously()
+        instance.soft_delete(asynchronous=asynchronous)
+        if asynchronous:
+            propagate_subtree_deletion.delay(instance.id)
 
     @drf.decorators.action(detail=True, methods=["delete"], url_path="hard-delete")
     def hard_delete(self, request, *args, **kwargs):
@@ -566,15 +626,20 @@ class ItemViewSet(
         for field in ["is_creator_me", "title", "type"]:
             queryset = filterset.filters[field].filter(queryset, filter_data[field])
 
-        queryset = self.annotate_user_roles(queryset)
-
         # Among the results, we may have items that are ancestors/descendants
-        # of each other. In this case we want to keep only the highest ancestors.
-        root_paths = utils.filter_root_paths(
-            queryset.order_by("path").values_list("path", flat=True),
-            skip_sorting=True,
+        # of each other. In this case we want to keep only the highest ancestors,
+        # which is done in the database by excluding items that have an ancestor
+        # among the candidates.
+        candidates = queryset.order_by()
+        queryset = queryset.exclude(
+            db.Exists(
+                candidates.filter(path__ancestors=db.OuterRef("path")).exclude(
+                    pk=db.OuterRef("pk")
+                )
+            )
         )
-        queryset = queryset.filter(path__in=root_paths)
+
+        queryset = self.annotate_user_roles(queryset)
 
         # Annotate the queryset with an attribute marking instances as highest ancestor
         # in order to save some time while computing abilities in the instance
@@ -624,11 +689,8 @@ class ItemViewSet(
         mimetype = mime_detector.from_buffer(file.read(2048))
         file.close()
 
-        item.upload_state = models.ItemUploadStateChoices.UPLOADED
-        item.mimetype = mimetype
-        item.size = file.size
-
-        item.save(update_fields=["upload_state", "mimetype", "size"])
+        item.mark_uploaded(mimetype, file.size)
+        extract_item_content.delay(item.id)
 
         serializer = self.get_serializer(item)
 
@@ -649,8 +711,91 @@ class ItemViewSet(
 
         queryset = self.get_queryset()
         queryset = queryset.filter(id__in=favorite_items_ids)
+        queryset = self.annotate_user_roles(queryset)
         return self.get_response_for_queryset(queryset)
 
+    @drf.decorators.action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def recents(self, request, *args, **kwargs):
+        """
+        List the items most recently opened by the current user, most recent first,
+        limited to ITEM_RECENTS_LIMIT items. The traces of the user are read backwards
+        on their access date index and the items they can no longer read are skipped.
+
+        Example: GET /items/recents/
+        """
+        user = request.user
+        queryset = (
+            self.queryset.select_related("creator")
+            .filter(link_traces__user=user, ancestors_deleted_at__isnull=True)
+            .exclude_propagating_deletions()
+            .readable(user)
+            .order_by("-link_traces__last_accessed_at")
+        )
+        queryset = self.annotate_is_favorite(queryset)
+        queryset = self.annotate_user_roles(queryset)
+
+        serializer = self.get_serializer(
+            queryset[: settings.ITEM_RECENTS_LIMIT], many=True
+        )
+        return drf.response.Response(serializer.data)
+
+    @drf.decorators.action(detail=False, methods=["get"])
+    def download(self, request, *args, **kwargs):
+        """
+        Stream a zip archive of a selection of items, folders with their subtree. The
+        live items readable by the current user are selected with one query and the
+        files are streamed from the object storage as the archive is written.
+
+        Example: GET /items/download/?ids=<uuid>&ids=<uuid>
+        """
+        serializer = serializers.DownloadItemsSerializer(
+            data={"ids": request.query_params.getlist("ids")}
+        )
+        serializer.is_valid(raise_exception=True)
+        selected_ids = serializer.validated_data["ids"]
+
+        items = (
+            self.queryset.filter(
+                db.Q(type=models.ItemTypeChoices.FOLDER)
+                | db.Q(upload_state=models.ItemUploadStateChoices.UPLOADED),
+                path__descendants=ArraySubquery(
+                    models.Item.objects.filter(id__in=selected_ids)
+                    .order_by()
+                    .values("path")
+                ),
+                ancestors_deleted_at__isnull=True,
+            )
+            .exclude_propagating_deletions()
+            .readable(request.user)
+            .only("id", "path", "title", "type", "filename", "size", "updated_at")
+            .order_by("path")
+            .iterator(chunk_size=ZIP_ITEMS_CHUNK_SIZE)
+        )
+        # Items are streamed as the archive is written, only the first one is needed
+        # to name the archive
+        first_item = next(items, None)
+        if first_item is None:
+            raise drf.exceptions.NotFound()
+
+        filename = (
+            utils.get_zip_entry_title(first_item.title)
+            if len(selected_ids) == 1
+            else "download"
+        )
+        return StreamingHttpResponse(
+            utils.stream_items_zip(itertools.chain([first_item], items)),
+            content_type="application/zip",
+            headers={
+                "Content-Disposition": content_disposition_header(
+                    True, f"{filename:s}.zip"
+                )
+            },
+        )
+
     @drf.decorators.action(
         detail=False,
         methods=["get"],
@@ -675,6 +820,89 @@ class ItemViewSet(
 
         return self.get_response_for_queryset(queryset)
 
+    @drf.decorators.action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def search(self, request, *args, **kwargs):
+        """
+        Search the items readable by the current user by title, ranked by trigram
+        similarity: the items in the subtrees on which the user has a role and the
+        items previously accessed by link, with their descendants.
+
+        Example: GET /items/search/?q=report
+        """
+        query = request.query_params.get("q", "")
+        if len(query) < settings.ITEM_SEARCH_MIN_LENGTH:
+            return self.get_response_for_queryset(self.queryset.none())
+
+        # For performance reasons we filter first by word similarity, which relies on
+        # an index, then only calculate precise similarity scores for sorting purposes
+        queryset = (
+            self.filter_readable_subtrees(self.queryset.select_related("creator"))
+            .filter(title__trigram_word_similar=query)
+            .annotate(similarity=TrigramSimilarity("title", query))
+            .order_by("-similarity", "title")
+        )
+        filterset = ItemFilter(request.GET, queryset=queryset)
+        if not filterset.is_valid():
+            raise drf.exceptions.ValidationError(filterset.errors)
+        queryset = filterset.qs
+
+        queryset = self.annotate_is_favorite(queryset)
+        queryset = self.annotate_user_roles(queryset)
+        return self.get_response_for_queryset(queryset)
+
+    @drf.decorators.action(
+        detail=False,
+        methods=["get"],
+        url_path="search/content",
+        permission_classes=[permissions.IsAuthenticated],
+    )
+    def search_content(self, request, *args, **kwargs):
+        """
+        Search the content extracted from the files readable by the current user with
+        the Postgres full-text search, ranked by relevance and with highlighted
+        snippets of the matching text. The query supports the web search syntax:
+        "quoted phrases", OR and -excluded words.
+
+        Example: GET /items/search/content/?q=annual report
+        """
+        query = request.query_params.get("q", "")
+        if len(query) < settings.ITEM_SEARCH_MIN_LENGTH:
+            return self.get_response_for_queryset(self.queryset.none())
+
+        search_query = SearchQuery(
+            query,
+            config=settings.ITEM_CONTENT_SEARCH_CONFIG,
+            search_type="websearch",
+        )
+        queryset = (
+            self.filter_readable_subtrees(self.queryset.select_related("creator"))
+            .filter(content__search_vector=search_query)
+            .annotate(
+                rank=SearchRank("content__search_vector", search_query),
+                snippet=SearchHeadline(
+                    "content__text",
+                    search_query,
+                    config=settings.ITEM_CONTENT_SEARCH_CONFIG,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_fragments=3,
+                ),
+            )
+            .order_by("-rank", "title")
+        )
+        filterset = ItemFilter(request.GET, queryset=queryset)
+        if not filterset.is_valid():
+            raise drf.exceptions.ValidationError(filterset.errors)
+        queryset = filterset.qs
+
+        queryset = self.annotate_is_favorite(queryset)
+        queryset = self.annotate_user_roles(queryset)
+        return self.get_response_for_queryset(queryset)
+
     @drf.decorators.action(detail=True, methods=["post"])
     @transaction.atomic
     def move(self, request, *args, **kwargs):
@@ -694,8 +922,10 @@ class ItemViewSet(
 
         target_item_id = validated_data["target_item_id"]
         try:
-            target_item = models.Item.objects.get(
-                id=target_item_id, ancestors_deleted_at__isnull=True
+            target_item = (
+                models.Item.objects.filter(ancestors_deleted_at__isnull=True)
+                .exclude_propagating_deletions()
+                .get(id=target_item_id)
             )
         except models.Item.DoesNotExist as excpt:
             raise drf.exceptions.ValidationError(
@@ -730,7 +960,10 @@ class ItemViewSet(
         Restore a soft-deleted item if it was deleted less than x days ago.
         """
         item = self.get_object()
-        item.restore()
+        asynchronous = item.should_propagate_asynchronously()
+        item.restore(asynchronous=asynchronous)
+        if asynchronous:
+            propagate_subtree_deletion.delay(item.id)
 
         return drf_response.Response(
             {"detail": "item has been successfully restored."},
@@ -777,100 +1010,248 @@ class ItemViewSet(
             raise drf.exceptions.ValidationError(filterset.errors)
         queryset = filterset.qs
 
+        # Unless filtered, the children of the item are already counted on it
+        if not any(filterset.form.cleaned_data.values()):
+            self.pagination_count_hint = item.numchild
+
         # Apply ordering only now that everyting is filtered and annotated
         queryset = filters.OrderingFilter().filter_queryset(
             self.request, queryset, self
         )
         return self.get_response_for_queryset(queryset)
 
-    @drf.decorators.action(detail=True, methods=["get"])
-    def tree(self, request, pk=None):
+    @drf.decorators.action(detail=True, methods=["post"], url_path="children/bulk")
+    def children_bulk(self, request, *args, **kwargs):
         """
-        List ancestors tree above the item
-        What we need to display is the tree structure opened for the current document.
+        Create many children of an item in one request, e.g. to upload many files at
+        once. Each item is validated on its own: the response lists, in the order of
+        the payload, either the item created, with its upload policy if it is a file,
+        or the errors that prevented its creation.
         """
-        try:
-            item = self.queryset.only("path").get(pk=pk)
-        except models.Item.DoesNotExist as exc:
-            raise drf.exceptions.NotFound from exc
+        item = self.get_object()
 
-        highest_ancestor = (
-            self.queryset.filter(
-                path__ancestors=item.path, ancestors_deleted_at__isnull=True
+        if not isinstance(request.data, list):
+            raise drf.exceptions.ValidationError(
+                {"detail": "A list of items is expected."},
+                code="item_bulk_create_list_expected",
             )
-            .readable_per_se(request.user)
-            .only("path")
-            .order_by("path")
-            .first()
+        if len(request.data) > settings.ITEM_BULK_CREATE_MAX_SIZE:
+            raise drf.exceptions.ValidationError(
+                {
+                    "detail": (
+                        "Too many items, at most "
+                        f"{settings.ITEM_BULK_CREATE_MAX_SIZE:d} can be created at once."
+                    )
+                },
+                code="item_bulk_create_too_many_items",
+            )
+
+        errors = {}
+        validated = {}
+        for index, data in enumerate(request.data):
+            # Without request in context, the existence of the id is not queried: it
+            # is checked below for all items at once
+            serializer = serializers.CreateItemSerializer(data=data)
+            if serializer.is_valid():
+                validated[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        # Check titles and ids of all items with one query each
+        titles = {data["title"] for data in validated.values()}
+        ids = {data["id"] for data in validated.values() if data.get("id")}
+        used_titles = set(
+            item.children()
+            .filter(deleted_at__isnull=True, title__in=titles)
+            .values_list("title", flat=True)
+        )
+        used_ids = set(
+            models.Item.objects.filter(id__in=ids).values_list("id", flat=True)
         )
+        # Items of the payload can also collide with each other
+        for index, data in validated.items():
+            if data["title"] in used_titles:
+                errors[index] = {"title": ["title already exists in this folder."]}
+            elif data.get("id") in used_ids:
+                errors[index] = {
+                    "id": [
+                        "An item with this ID already exists. You cannot override it."
+                    ]
+                }
+            used_titles.add(data["title"])
+            if data.get("id"):
+                used_ids.add(data["id"])
+
+        children = [data for index, data in validated.items() if index not in errors]
+        created = []
+        if children:
+            with transaction.atomic():
+                created = models.Item.objects.bulk_create_children(
+                    item, children, creator=request.user
+                )
 
-        if not highest_ancestor:
-            raise (
-                drf.exceptions.PermissionDenied()
-                if request.user.is_authenticated
-                else drf.exceptions.NotAuthenticated()
+        created_iterator = iter(created)
+        context = {
+            "available_size": models.StorageQuota.objects.get_available_size_per_file(
+                item,
+                sum(child.type == models.ItemTypeChoices.FILE for child in created),
             )
+        }
+        results = [
+            {"errors": errors[index]}
+            if index in errors
+            else serializers.BulkCreatedItemSerializer(
+                next(created_iterator), context=context
+            ).data
+            for index in range(len(request.data))
+        ]
+        return drf.response.Response(
+            results,
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
 
-        ancestors = (
-            self.queryset.filter(
-                path__ancestors=item.path,
-                path__descendants=highest_ancestor.path,
-                ancestors_deleted_at__isnull=True,
+    @drf.decorators.action(detail=True, methods=["post"], url_path="children/manifest")
+    def children_manifest(self, request, *args, **kwargs):
+        """
+        Create a whole tree of folders and files under an item in one request, e.g. to
+        upload a directory, instead of creating it level by level. All the items are
+        created or none: the response lists the items created, each folder followed
+        by its descendants, with the upload policies of the files.
+        """
+        item = self.get_object()
+
+        # The manifest is measured before its nested validation, which recurses once
+        # per level
+        nb_items, depth = utils.get_manifest_size(request.data)
+        if nb_items > settings.ITEM_BULK_CREATE_MAX_SIZE:
+            raise drf.exceptions.ValidationError(
+                {
+                    "detail": (
+                        "Too many items, at most "
+                        f"{settings.ITEM_BULK_CREATE_MAX_SIZE:d} can be created at once."
+                    )
+                },
+                code="item_bulk_create_too_many_items",
             )
-            .order_by("path")
-            .values_list("path", "link_reach", "link_role", named=True)
+        if item.depth + depth > settings.ITEM_MAX_DEPTH:
+            raise drf.exceptions.ValidationError(
+                {
+                    "detail": (
+                        "Too deep, items can not be nested more than "
+                        f"{settings.ITEM_MAX_DEPTH:d} levels deep."
+                    )
+                },
+                code="item_create_max_depth_exceeded",
+            )
+
+        serializer = serializers.ItemManifestSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        manifest = serializer.validated_data
+
+        ids = []
+        nodes = list(manifest)
+        while nodes:
+            node = nodes.pop()
+            ids.append(node["id"])
+            nodes.extend(node.get("children", []))
+
+        if len(set(ids)) < len(ids) or models.Item.objects.filter(id__in=ids).exists():
+            raise drf.exceptions.ValidationError(
+                {"id": "An item with this ID already exists. You cannot override it."},
+                code="item_create_existing_id",
+            )
+
+        titles = [node["title"] for node in manifest]
+        if (
+            len(set(titles)) < len(titles)
+            or item.children()
+            .filter(deleted_at__isnull=True, title__in=titles)
+            .exists()
+        ):
+            raise drf.exceptions.ValidationError(
+                {"title": "title already exists in this folder."},
+                code="item_create_child_title_already_exists",
+            )
+
+        with transaction.atomic():
+            created = models.Item.objects.bulk_create_children(
+                item, manifest, creator=request.user
+            )
+
+        context = {
+            "available_size": models.StorageQuota.objects.get_available_size_per_file(
+                item,
+                sum(child.type == models.ItemTypeChoices.FILE for child in created),
+            )
+        }
+        return drf.response.Response(
+            serializers.BulkCreatedItemSerializer(
+                created, many=True, context=context
+            ).data,
+            status=status.HTTP_201_CREATED,
         )
 
-        if len(ancestors) == 0:
+    @drf.decorators.action(detail=True, methods=["get"])
+    def tree(self, request, pk=None):
+        """
+        List ancestors tree above the item
+        What we need to display is the tree structure opened for the current document:
+        the highest ancestor readable by the user and, below it, the folders siblings
+        of each ancestor of the item, fetched in one query.
+        """
+        try:
+            item = self.queryset.only("path").get(pk=pk)
+        except models.Item.DoesNotExist as exc:
+            raise drf.exceptions.NotFound from exc
+
+        highest_ancestor_path = item.get_highest_readable_ancestor_path(request.user)
+        if not highest_ancestor_path:
             raise (
                 drf.exceptions.PermissionDenied()
                 if request.user.is_authenticated
                 else drf.exceptions.NotAuthenticated()
             )
 
-        paths_links_mapping = {}
-        ancestors_links = []
-        clause = db.Q()
-        for i, ancestor in enumerate(ancestors):
-            # exclude first iteration
-            if i == 0:
-                # this is the highest ancestor, select it directly
-                clause |= db.Q(path=ancestor.path)
-            else:
-                # Select all siblings of the current ancestor
-                clause |= db.Q(
-                    path__descendants=".".join(ancestor.path[:-1]),
-                    path__depth=len(ancestor.path),
-                )
-
-            # Compute cache for ancestors links to avoid many queries while computing
-            # abilties for his items in the tree!
-            ancestors_links.append(
-                {"link_reach": ancestor.link_reach, "link_role": ancestor.link_role}
-            )
-            paths_links_mapping[str(ancestor.path)] = ancestors_links.copy()
+        # Match the highest ancestor and the children of each of its descendants that
+        # is an ancestor of the item with an array of lqueries, supported by the index
+        highest_depth = len(highest_ancestor_path.split("."))
+        lqueries = [highest_ancestor_path] + [
+            f"{'.'.join(item.path[:depth]):s}.*{{1}}"
+            for depth in range(highest_depth, len(item.path))
+        ]
 
         tree = (
             self.queryset.select_related("creator")
-            .filter(clause, type=models.ItemTypeChoices.FOLDER, deleted_at__isnull=True)
-            .order_by("created_at")
+            .filter(
+                path__contains=lqueries,
+                type=models.ItemTypeChoices.FOLDER,
+                deleted_at__isnull=True,
+            )
+            .order_by(db.Func("path", function="nlevel"), "created_at")
         )
 
         tree = self.annotate_user_roles(tree)
         tree = self.annotate_is_favorite(tree)
 
-        serializer = self.get_serializer(
-            tree,
-            many=True,
-            context={
-                "request": request,
-                "paths_links_mapping": paths_links_mapping,
-            },
-        )
+        # Rows are sorted by depth so parents are always seen before their children
+        nodes = {}
+        root = None
+        for node in tree:
+            node.tree_children = []
+            nodes[str(node.path)] = node
+            parent = nodes.get(".".join(node.path[:-1]))
+            if parent is not None:
+                parent.tree_children.append(node)
+            elif root is None:
+                root = node
 
-        return drf.response.Response(
-            utils.flat_to_nested(serializer.data), status=drf.status.HTTP_200_OK
-        )
+        if root is None:
+            return drf.response.Response({}, status=drf.status.HTTP_200_OK)
+
+        models.Item.objects.prefetch_nb_accesses(list(nodes.values()))
+        serializer = self.get_serializer(root, context={"request": request})
+
+        return drf.response.Response(serializer.data, status=drf.status.HTTP_200_OK)
 
     @drf.decorators.action(detail=True, methods=["put"], url_path="link-configuration")
     def link_configuration(self, request, *args, **kwargs):
@@ -923,28 +1304,14 @@ class ItemViewSet(
             status=drf.status.HTTP_200_OK,
         )
 
-    def _authorize_subrequest(self, request, pattern):
+    def _get_subrequest_url_params(self, request, pattern):
         """
-        Shared method to authorize access based on the original URL of an Nginx subrequest
-        and user permissions. Returns a dictionary of URL parameters if authorized.
-
-        The original url is passed by nginx in the "HTTP_X_ORIGINAL_URL" header.
-        See corresponding ingress configuration in Helm chart and read about the
-        nginx.ingress.kubernetes.io/auth-url annotation to understand how the Nginx ingress
-        is configured to do this.
-
-        Based on the original url and the logged in user, we must decide if we authorize Nginx
-        to let this request go through (by returning a 200 code) or if we block it (by returning
-        a 403 error). Note that we return 403 errors without any further details for security
-        reasons.
+        Extract the parameters of the original URL of an Nginx subrequest, passed by
+        nginx in the "HTTP_X_ORIGINAL_URL" header. Returns a dictionary of URL
+        parameters including the item ID (pk).
 
-        Parameters:
-        - pattern: The regex pattern to extract identifiers from the URL.
-
-        Returns:
-        - A dictionary of URL parameters if the request is authorized.
         Raises:
-        - PermissionDenied if authorization fails.
+        - PermissionDenied if the URL does not match the pattern.
         """
         # Extract the original URL from the request header
         original_url = request.META.get("HTTP_X_ORIGINAL_URL")
@@ -973,11 +1340,22 @@ class ItemViewSet(
             logger.debug("Failed to extract parameters from subrequest URL: %s", exc)
             raise drf.exceptions.PermissionDenied() from exc
 
-        pk = url_params.get("pk")
-        if not pk:
+        if not url_params.get("pk"):
             logger.debug("item ID (pk) not found in URL parameters: %s", url_params)
             raise drf.exceptions.PermissionDenied()
 
+        return url_params
+
+    def _get_subrequest_item(self, request, url_params):
+        """
+        Fetch the item targeted by an Nginx subrequest and check that the user is
+        allowed to perform the current action on it. Returns the item and the user
+        abilities.
+
+        Raises:
+        - PermissionDenied if the item does not exist or the user lacks permission.
+        """
+        pk = url_params["pk"]
         # Fetch the item and check if the user has access
         try:
             item = models.Item.objects.get(pk=pk)
@@ -996,6 +1374,33 @@ class ItemViewSet(
         logger.debug(
             "Subrequest authorization successful. Extracted parameters: %s", url_params
         )
+        return item, user_abilities
+
+    def _authorize_subrequest(self, request, pattern):
+        """
+        Shared method to authorize access based on the original URL of an Nginx subrequest
+        and user permissions. Returns a dictionary of URL parameters if authorized.
+
+        The original url is passed by nginx in the "HTTP_X_ORIGINAL_URL" header.
+        See corresponding ingress configuration in Helm chart and read about the
+        nginx.ingress.kubernetes.io/auth-url annotation to understand how the Nginx ingress
+        is configured to do this.
+
+        Based on the original url and the logged in user, we must decide if we authorize Nginx
+        to let this request go through (by returning a 200 code) or if we block it (by returning
+        a 403 error). Note that we return 403 errors without any further details for security
+        reasons.
+
+        Parameters:
+        - pattern: The regex pattern to extract identifiers from the URL.
+
+        Returns:
+        - A dictionary of URL parameters if the request is authorized.
+        Raises:
+        - PermissionDenied if authorization fails.
+        """
+        url_params = self._get_subrequest_url_params(request, pattern)
+        item, user_abilities = self._get_subrequest_item(request, url_params)
         return url_params, user_abilities, request.user.id, item
 
     @drf.decorators.action(detail=False, methods=["get"], url_path="media-auth")
@@ -1009,21 +1414,27 @@ class ItemViewSet(
         annotation. The request will then be proxied to the object storage backend who will
         respond with the file after checking the signature included in headers.
         """
-        url_params, _, _, item = self._authorize_subrequest(
-            request, MEDIA_STORAGE_URL_PATTERN
-        )
-        if item.type != models.ItemTypeChoices.FILE:
-            logger.debug("Item '%s' is not a file", item.id)
-            raise drf.exceptions.PermissionDenied()
+        url_params = self._get_subrequest_url_params(request, MEDIA_STORAGE_URL_PATTERN)
 
-        if item.upload_state != models.ItemUploadStateChoices.UPLOADED:
-            logger.debug("Item '%s' is not uploaded", item.id)
-            raise drf.exceptions.PermissionDenied()
+        # Pages showing many media trigger bursts of subrequests for the same files:
+        # granted decisions are cached for a few seconds, until anything affecting them
+        # changes on the item or its ancestors.
+        if not models.is_media_auth_cached(request.user, url_params["pk"]):
+            item, _ = self._get_subrequest_item(request, url_params)
+            if item.type != models.ItemTypeChoices.FILE:
+                logger.debug("Item '%s' is not a file", item.id)
+                raise drf.exceptions.PermissionDenied()
+
+            if item.upload_state != models.ItemUploadStateChoices.UPLOADED:
+                logger.debug("Item '%s' is not uploaded", item.id)
+                raise drf.exceptions.PermissionDenied()
+
+            models.cache_media_auth(request.user, item)
 
         # Generate S3 authorization headers using the extracted URL parameters
-        request = utils.generate_s3_authorization_headers(f"{url_params.get('key'):s}")
+        headers = utils.generate_s3_authorization_headers(f"{url_params.get('key'):s}")
 
-        return drf.response.Response("authorized", headers=request.headers, status=200)
+        return drf.response.Response("authorized", headers=headers, status=200)
 
 
 class ItemAccessViewSet(
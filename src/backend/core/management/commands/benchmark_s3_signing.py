@@ -0,0 +1,75 @@
+"""Management command to measure the cost of signing media accesses to the storage."""
+
+import timeit
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+import botocore
+
+from core.api.utils import generate_s3_authorization_headers
+
+BENCHMARK_KEY = "item/00000000-0000-0000-0000-000000000000/benchmark.png"
+
+
+def generate_botocore_authorization_headers(key):
+    """
+    Sign the GET request of an object through a botocore request, as media accesses
+    used to be signed. Serves as a reference for the signature and its cost.
+    """
+    url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
+        "get_object",
+        ExpiresIn=0,
+        Params={"Bucket": default_storage.bucket_name, "Key": key},
+    )
+    request = botocore.awsrequest.AWSRequest(method="get", url=url)
+
+    s3_client = default_storage.connection.meta.client
+    # pylint: disable=protected-access
+    credentials = s3_client._request_signer._credentials  # noqa: SLF001
+    frozen_credentials = credentials.get_frozen_credentials()
+    region = s3_client.meta.region_name
+    auth = botocore.auth.S3SigV4Auth(frozen_credentials, "s3", region)
+    auth.add_auth(request)
+
+    return dict(request.headers)
+
+
+class Command(BaseCommand):
+    """
+    Compare the per call cost of signing the headers of a media access with a botocore
+    request and with the cached signer used by the media-auth endpoint.
+    """
+
+    help = "Measure the per call cost of signing media accesses to the storage"
+
+    def add_arguments(self, parser):
+        """Define optional argument "iterations"."""
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=10_000,
+            help="Number of signatures timed for each signer.",
+        )
+
+    def handle(self, *args, **options):
+        """Time both signers and display their per call cost."""
+        iterations = options["iterations"]
+        results = {}
+        for name, signer in (
+            ("botocore", generate_botocore_authorization_headers),
+            ("cached", generate_s3_authorization_headers),
+        ):
+            # Warm up the clients and caches before timing
+            signer(BENCHMARK_KEY)
+            duration = timeit.timeit(
+                lambda s=signer: s(BENCHMARK_KEY), number=iterations
+            )
+            results[name] = duration / iterations * 1e6
+            self.stdout.write(f"{name:s}: {results[name]:.1f} µs per call")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"speedup: {results['botocore'] / results['cached']:.1f}x"
+            )
+        )
@@ -0,0 +1,78 @@
+"""Management command to check that item access subtrees mirror item accesses."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import models
+
+
+class Command(BaseCommand):
+    """
+    Check the consistency of the item access subtrees with the item accesses they
+    mirror and optionally fix the inconsistent ones.
+    """
+
+    help = "Check that item access subtrees are in sync with item accesses"
+
+    def add_arguments(self, parser):
+        """Define optional arguments "fix" and "batch-size"."""
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rebuild the subtrees found missing or out of sync.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of accesses loaded and fixed at once.",
+        )
+
+    def handle(self, *args, **options):
+        """Compare each item access with its subtree and report inconsistencies."""
+        batch_size = options["batch_size"]
+        nb_inconsistent = 0
+        batch = []
+
+        accesses = models.ItemAccess.objects.select_related("item", "subtree").order_by(
+            "pk"
+        )
+        for access in accesses.iterator(chunk_size=batch_size):
+            if self.is_consistent(access):
+                continue
+
+            nb_inconsistent += 1
+            self.stdout.write(f"Inconsistent subtree for item access {access.pk!s}")
+            if options["fix"]:
+                batch.append(access)
+                if len(batch) >= batch_size:
+                    models.ItemAccessSubtree.objects.sync(batch)
+                    batch = []
+
+        if batch:
+            models.ItemAccessSubtree.objects.sync(batch)
+
+        if nb_inconsistent and not options["fix"]:
+            raise CommandError(
+                f"{nb_inconsistent:d} item access subtree(s) out of sync, "
+                "run with --fix to rebuild them."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{nb_inconsistent:d} item access subtree(s) fixed."
+                if nb_inconsistent
+                else "Item access subtrees are in sync."
+            )
+        )
+
+    @staticmethod
+    def is_consistent(access):
+        """Return True if the subtree of an item access mirrors it."""
+        subtree = getattr(access, "subtree", None)
+        return subtree is not None and (
+            subtree.user_id == access.user_id
+            and subtree.team == access.team
+            and subtree.item_id == access.item_id
+            and str(subtree.path) == str(access.item.path)
+            and subtree.roles == [access.role]
+        )
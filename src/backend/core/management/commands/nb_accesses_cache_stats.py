@@ -0,0 +1,37 @@
+"""Management command to display the hit/miss statistics of the nb_accesses cache."""
+
+from django.core.management.base import BaseCommand
+
+from core import models
+
+
+class Command(BaseCommand):
+    """
+    Display and optionally reset the hit/miss counters of the nb_accesses cache. Only
+    a sample of the lookups is counted, see NB_ACCESSES_CACHE_STATS_SAMPLE_RATE.
+    """
+
+    help = "Display the hit/miss statistics of the nb_accesses cache"
+
+    def add_arguments(self, parser):
+        """Define optional argument "reset"."""
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after displaying them.",
+        )
+
+    def handle(self, *args, **options):
+        """Display the counters and the hit ratio."""
+        stats = models.get_nb_accesses_cache_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+
+        self.stdout.write(
+            f"hits: {stats['hits']:d}, misses: {stats['misses']:d}, "
+            f"hit ratio: {ratio:.2%}"
+        )
+
+        if options["reset"]:
+            models.reset_nb_accesses_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,71 @@
+"""Management command to recompute the size and files rollups of items in bulk."""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import ItemTypeChoices, ItemUploadStateChoices
+
+# Each uploaded file is counted in the rollups of itself and of its ancestors up to
+# the root of the deleted subtree it belongs to, if any. The pending deltas are
+# dropped as the rollups are recomputed from scratch.
+RECOMPUTE_SQL = """
+    WITH dropped AS (
+        DELETE FROM drive_item_rollup_delta
+    ), rollups AS (
+        SELECT
+            ancestor.id,
+            SUM(COALESCE(file.size, 0)) AS total_size,
+            COUNT(*) AS total_files
+        FROM drive_item AS file
+        JOIN drive_item AS ancestor ON ancestor.path @> file.path
+        WHERE file.type = %(file)s
+        AND file.upload_state = %(uploaded)s
+        AND NOT EXISTS (
+            SELECT 1 FROM drive_item AS deleted
+            WHERE deleted.deleted_at IS NOT NULL
+            AND deleted.path @> file.path
+            AND deleted.path <@ ancestor.path
+            AND deleted.path != ancestor.path
+        )
+        GROUP BY ancestor.id
+    )
+    UPDATE drive_item SET
+        total_size = COALESCE(rollups.total_size, 0),
+        total_files = COALESCE(rollups.total_files, 0)
+    FROM drive_item AS item
+    LEFT JOIN rollups ON rollups.id = item.id
+    WHERE drive_item.id = item.id
+    AND (drive_item.total_size, drive_item.total_files) IS DISTINCT FROM (
+        COALESCE(rollups.total_size, 0),
+        COALESCE(rollups.total_files, 0)
+    )
+"""
+
+
+class Command(BaseCommand):
+    """
+    Recompute the total_size and total_files rollups of all items from their uploaded
+    files in one statement, e.g. after a bulk import or to repair drifting values.
+    """
+
+    help = "Recompute the size and files rollups of items from the tree"
+
+    def handle(self, *args, **options):
+        """Recompute the rollups and report the number of items fixed."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                RECOMPUTE_SQL,
+                {
+                    "file": ItemTypeChoices.FILE,
+                    "uploaded": ItemUploadStateChoices.UPLOADED,
+                },
+            )
+            fixed = cursor.rowcount
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{fixed:d} item(s) rollups fixed."
+                if fixed
+                else "Items rollups are in sync."
+            )
+        )
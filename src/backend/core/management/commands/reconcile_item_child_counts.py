@@ -0,0 +1,102 @@
+"""Management command to reconcile the children counters of items with the tree."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from core.models import Item, ItemChildCountDelta, ItemTypeChoices
+
+DRIFT_SQL = """
+    SELECT item.id
+    FROM drive_item AS item
+    LEFT JOIN (
+        SELECT
+            subpath(path, 0, nlevel(path) - 1) AS parent_path,
+            COUNT(*) AS numchild,
+            COUNT(*) FILTER (WHERE type = %(folder)s) AS numchild_folder
+        FROM drive_item
+        WHERE deleted_at IS NULL AND nlevel(path) > 1
+        GROUP BY 1
+    ) AS children ON children.parent_path = item.path
+    LEFT JOIN (
+        SELECT
+            item_id,
+            SUM(numchild) AS numchild,
+            SUM(numchild_folder) AS numchild_folder
+        FROM drive_item_child_count_delta
+        GROUP BY item_id
+    ) AS delta ON delta.item_id = item.id
+    WHERE (
+        item.numchild + COALESCE(delta.numchild, 0),
+        item.numchild_folder + COALESCE(delta.numchild_folder, 0)
+    ) IS DISTINCT FROM (
+        COALESCE(children.numchild, 0),
+        COALESCE(children.numchild_folder, 0)
+    )
+    ORDER BY item.path
+"""
+
+
+class Command(BaseCommand):
+    """
+    Compare the numchild and numchild_folder counters of items, including their pending
+    deltas, with their actual children and optionally recompute the drifting ones.
+    """
+
+    help = "Check that items children counters match the tree"
+
+    def add_arguments(self, parser):
+        """Define optional argument "fix"."""
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Recompute the counters found out of sync.",
+        )
+
+    def handle(self, *args, **options):
+        """Report the items which children counters drifted from the tree."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                DRIFT_SQL,
+                {"folder": ItemTypeChoices.FOLDER},
+            )
+            items_ids = [row[0] for row in cursor.fetchall()]
+
+        for item_id in items_ids:
+            self.stdout.write(f"Children counters out of sync for item {item_id!s}")
+            if options["fix"]:
+                self.recompute(item_id)
+
+        if items_ids and not options["fix"]:
+            raise CommandError(
+                f"{len(items_ids):d} item(s) with children counters out of sync, "
+                "run with --fix to recompute them."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(items_ids):d} item(s) children counters fixed."
+                if items_ids
+                else "Items children counters are in sync."
+            )
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def recompute(item_id):
+        """
+        Recompute the children counters of an item from its children and drop its
+        pending deltas, holding its row lock so that no delta is merged meanwhile.
+        """
+        item = Item.objects.select_for_update(no_key=True).get(pk=item_id)
+        counts = (
+            item.children()
+            .filter(deleted_at__isnull=True)
+            .aggregate(
+                numchild=models.Count("id"),
+                numchild_folder=models.Count(
+                    "id", filter=models.Q(type=ItemTypeChoices.FOLDER)
+                ),
+            )
+        )
+        ItemChildCountDelta.objects.filter(item_id=item_id).delete()
+        Item.objects.filter(pk=item_id).update(**counts)
@@ -0,0 +1,27 @@
+"""Management command to resume the subtree propagations left pending."""
+
+from django.core.management.base import BaseCommand
+
+from core import models
+from core.tasks.item import propagate_subtree_deletion
+
+
+class Command(BaseCommand):
+    """
+    Enqueue a propagation task for each pending subtree soft deletion or restoration,
+    e.g. after a worker was lost. Each task resumes from the saved checkpoint.
+    """
+
+    help = "Resume the propagation of pending subtree soft deletions and restorations"
+
+    def handle(self, *args, **options):
+        """Enqueue a propagation task for each pending subtree propagation."""
+        items_ids = list(
+            models.ItemSubtreePropagation.objects.values_list("item_id", flat=True)
+        )
+        for item_id in items_ids:
+            propagate_subtree_deletion.delay(item_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(items_ids):d} subtree propagation(s) resumed.")
+        )
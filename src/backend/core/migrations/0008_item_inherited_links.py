@@ -0,0 +1,32 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:19
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_item_hard_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='inherited_links',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE drive_item AS item SET inherited_links = ARRAY(
+                SELECT DISTINCT ancestor.link_reach || ':' || ancestor.link_role
+                FROM drive_item AS ancestor
+                WHERE ancestor.path @> item.path
+                AND ancestor.id <> item.id
+                AND ancestor.link_reach <> 'restricted'
+            )
+            WHERE nlevel(item.path) > 1;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:23
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django_ltree.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_item_inherited_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemAccessSubtree',
+            fields=[
+                ('access', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='subtree', serialize=False, to='core.itemaccess')),
+                ('team', models.CharField(blank=True, max_length=100)),
+                ('path', django_ltree.fields.PathField()),
+                ('roles', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('reader', 'Reader'), ('editor', 'Editor'), ('administrator', 'Administrator'), ('owner', 'Owner')], max_length=20), size=None)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.item')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Item access subtree',
+                'verbose_name_plural': 'Item access subtrees',
+                'db_table': 'drive_item_access_subtree',
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['path'], name='drive_item__path_0e3a65_gist'), models.Index(fields=['team'], name='drive_item__team_eff377_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO drive_item_access_subtree (access_id, user_id, team, item_id, path, roles)
+            SELECT access.id, access.user_id, access.team, access.item_id, item.path, ARRAY[access.role]
+            FROM drive_item_access AS access
+            INNER JOIN drive_item AS item ON item.id = access.item_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
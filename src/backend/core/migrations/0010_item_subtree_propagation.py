@@ -0,0 +1,32 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:34
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django_ltree.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_item_access_subtree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSubtreePropagation',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='subtree_propagation', serialize=False, to='core.item')),
+                ('path', django_ltree.fields.PathField()),
+                ('operation', models.CharField(choices=[('soft_delete', 'Soft delete'), ('restore', 'Restore')], max_length=20)),
+                ('deleted_at', models.DateTimeField()),
+                ('checkpoint', django_ltree.fields.PathField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Item subtree propagation',
+                'verbose_name_plural': 'Item subtree propagations',
+                'db_table': 'drive_item_subtree_propagation',
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['path'], name='drive_item__path_d795f1_gist')],
+            },
+        ),
+    ]
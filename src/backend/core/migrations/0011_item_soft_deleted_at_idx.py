@@ -0,0 +1,17 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_item_subtree_propagation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False), ('hard_deleted_at__isnull', True)), fields=['deleted_at'], name='item_soft_deleted_at_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_item_soft_deleted_at_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemChildCountDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numchild', models.IntegerField(default=0)),
+                ('numchild_folder', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='child_count_deltas', to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Item child count delta',
+                'verbose_name_plural': 'Item child count deltas',
+                'db_table': 'drive_item_child_count_delta',
+            },
+        ),
+    ]
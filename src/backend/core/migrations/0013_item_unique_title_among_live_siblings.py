@@ -0,0 +1,83 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:42
+
+import django.db.models.expressions
+import django_ltree.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_item_child_count_delta'),
+    ]
+
+    operations = [
+        # Suffix the titles already duplicated among live siblings, keeping the
+        # oldest one untouched. Each suffix is the lowest number giving a title free
+        # among the siblings and is put before the extension of files.
+        migrations.RunSQL(
+            r"""
+            DO $$
+            DECLARE
+                duplicate RECORD;
+                stem TEXT;
+                extension TEXT;
+                suffix TEXT;
+                candidate TEXT;
+                number INTEGER;
+            BEGIN
+                FOR duplicate IN
+                    SELECT id, path, title, type
+                    FROM (
+                        SELECT id, path, title, type, ROW_NUMBER() OVER (
+                            PARTITION BY subpath(path, 0, nlevel(path) - 1), title
+                            ORDER BY created_at, id
+                        ) AS rank
+                        FROM drive_item
+                        WHERE deleted_at IS NULL AND nlevel(path) > 1
+                    ) AS ranked
+                    WHERE rank > 1
+                    ORDER BY path
+                LOOP
+                    extension := '';
+                    IF duplicate.type = 'file' THEN
+                        extension := COALESCE(
+                            substring(duplicate.title FROM '^.+(\.[^.]+)$'), ''
+                        );
+                    END IF;
+                    stem := left(
+                        duplicate.title, length(duplicate.title) - length(extension)
+                    );
+
+                    number := 1;
+                    LOOP
+                        suffix := ' (' || number || ')';
+                        candidate := left(
+                            stem,
+                            GREATEST(255 - length(suffix) - length(extension), 0)
+                        ) || suffix || extension;
+                        EXIT WHEN NOT EXISTS (
+                            SELECT 1
+                            FROM drive_item AS sibling
+                            WHERE sibling.path <@ subpath(
+                                duplicate.path, 0, nlevel(duplicate.path) - 1
+                            )
+                            AND nlevel(sibling.path) = nlevel(duplicate.path)
+                            AND sibling.deleted_at IS NULL
+                            AND sibling.title = candidate
+                        );
+                        number := number + 1;
+                    END LOOP;
+
+                    UPDATE drive_item SET title = candidate WHERE id = duplicate.id;
+                END LOOP;
+            END
+            $$;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(models.Func('path', 0, django.db.models.expressions.CombinedExpression(models.Func('path', function='nlevel', output_field=models.IntegerField()), '-', models.Value(1)), function='subpath', output_field=django_ltree.fields.PathField()), models.F('title'), condition=models.Q(('deleted_at__isnull', True), ('path__depth__gt', 1)), name='unique_item_title_among_live_siblings'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_item_unique_title_among_live_siblings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='total_files',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='total_size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        # Compute the rollups of existing items from their uploaded files
+        migrations.RunSQL(
+            """
+            WITH rollups AS (
+                SELECT
+                    ancestor.id,
+                    SUM(COALESCE(file.size, 0)) AS total_size,
+                    COUNT(*) AS total_files
+                FROM drive_item AS file
+                JOIN drive_item AS ancestor ON ancestor.path @> file.path
+                WHERE file.type = 'file'
+                AND file.upload_state = 'uploaded'
+                AND ancestor.ancestors_deleted_at
+                    IS NOT DISTINCT FROM file.ancestors_deleted_at
+                GROUP BY ancestor.id
+            )
+            UPDATE drive_item SET
+                total_size = rollups.total_size,
+                total_files = rollups.total_files
+            FROM rollups
+            WHERE drive_item.id = rollups.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_item_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageQuota',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='storage_quota', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('used_size', models.PositiveBigIntegerField(default=0)),
+                ('max_size', models.PositiveBigIntegerField(blank=True, help_text='Defaults to the STORAGE_QUOTA_DEFAULT_MAX_SIZE setting if empty.', null=True)),
+            ],
+            options={
+                'verbose_name': 'Storage quota',
+                'verbose_name_plural': 'Storage quotas',
+                'db_table': 'drive_storage_quota',
+            },
+        ),
+        # Fill the ledger with the files stored in the workspaces of each user
+        migrations.RunSQL(
+            """
+            INSERT INTO drive_storage_quota (user_id, used_size)
+            SELECT root.creator_id, SUM(COALESCE(file.size, 0))
+            FROM drive_item AS file
+            JOIN drive_item AS root ON root.path = subpath(file.path, 0, 1)
+            WHERE file.type = 'file'
+            AND file.upload_state = 'uploaded'
+            AND file.hard_deleted_at IS NULL
+            AND root.creator_id IS NOT NULL
+            GROUP BY root.creator_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.9 on 2026-10-17 04:58
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_item_title_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemContent',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content', serialize=False, to='core.item')),
+                ('text', models.TextField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Item content',
+                'verbose_name_plural': 'Item contents',
+                'db_table': 'drive_item_content',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='drive_item__search__424142_gin')],
+            },
+        ),
+    ]
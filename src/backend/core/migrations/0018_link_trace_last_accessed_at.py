@@ -0,0 +1,28 @@
+# Generated by Django 5.1.9 on 2026-10-17 05:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_item_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linktrace',
+            name='last_accessed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='date and time at which the user last accessed the item', verbose_name='last accessed on'),
+        ),
+        # Existing traces were last accessed at the latest when they were updated
+        migrations.RunSQL(
+            "UPDATE drive_link_trace SET last_accessed_at = updated_at",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='linktrace',
+            index=models.Index(fields=['user', '-last_accessed_at'], name='link_trace_user_recent_idx'),
+        ),
+    ]
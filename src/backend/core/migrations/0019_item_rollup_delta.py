@@ -0,0 +1,28 @@
+# Generated by Django 5.1.9 on 2026-10-17 05:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_link_trace_last_accessed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemRollupDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_size', models.BigIntegerField(default=0)),
+                ('total_files', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollup_deltas', to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Item rollup delta',
+                'verbose_name_plural': 'Item rollup deltas',
+                'db_table': 'drive_item_rollup_delta',
+            },
+        ),
+    ]
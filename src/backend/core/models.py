@@ -3,7 +3,10 @@ Declare and configure the models for the drive core application
 """
 # pylint: disable=too-many-lines
 
+import hashlib
+import random
 import smtplib
+import time
 import uuid
 from collections import defaultdict
 from datetime import timedelta
@@ -12,20 +15,24 @@ from logging import getLogger
 from django.conf import settings
 from django.contrib.auth import models as auth_models
 from django.contrib.auth.base_user import AbstractBaseUser
-from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.sites.models import Site
 from django.core import mail, validators
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
-from django.db import models, transaction
+from django.db import IntegrityError, connection, models, transaction
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Concat, Upper
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import get_language, override
 from django.utils.translation import gettext_lazy as _
 
+from django_ltree.fields import PathField
 from django_ltree.managers import TreeManager, TreeQuerySet
 from django_ltree.models import TreeModel
 from timezone_field import TimeZoneField
@@ -94,6 +101,13 @@ class ItemUploadStateChoices(models.TextChoices):
     UPLOADED = "uploaded", _("Uploaded")
 
 
+class ItemPropagationChoices(models.TextChoices):
+    """Defines the operations propagated asynchronously to the descendants of an item."""
+
+    SOFT_DELETE = "soft_delete", _("Soft delete")
+    RESTORE = "restore", _("Restore")
+
+
 class DuplicateEmailError(Exception):
     """Raised when an email is already associated with a pre-existing user."""
 
@@ -291,12 +305,15 @@ class User(AbstractBaseUser, BaseModel, auth_models.PermissionsMixin):
         if not valid_invitations.exists():
             return
 
-        ItemAccess.objects.bulk_create(
+        accesses = ItemAccess.objects.bulk_create(
             [
                 ItemAccess(user=self, item=invitation.item, role=invitation.role)
                 for invitation in valid_invitations
             ]
         )
+        ItemAccessSubtree.objects.sync(accesses)
+        for access in accesses:
+            access.item.invalidate_subtree_caches()
 
         # Set creator of items if not yet set (e.g. items created via server-to-server API)
         item_ids = [invitation.item_id for invitation in valid_invitations]
@@ -415,18 +432,246 @@ class ItemQuerySet(TreeQuerySet):
 
         return self.filter(models.Q(link_reach=LinkReachChoices.PUBLIC))
 
+    def readable(self, user):
+        """
+        Filters the queryset to return documents that the given user has
+        permission to read, either directly or through their ancestors.
+        :param user: The user for whom readable documents are to be fetched.
+        :return: A queryset of documents readable by the user.
+        """
+        if user.is_authenticated:
+            ancestors_accesses = ItemAccessSubtree.objects.filter(
+                models.Q(user=user) | models.Q(team__in=user.teams),
+                path__ancestors=models.OuterRef("path"),
+            )
+            return self.filter(
+                models.Exists(ancestors_accesses)
+                | ~models.Q(link_reach=LinkReachChoices.RESTRICTED)
+                | ~models.Q(inherited_links=[])
+            )
 
-def _is_item_title_existing(queryset, title):
-    """Check if the title is unique in the same path."""
-    return (
-        queryset.filter(title=title)
-        .filter(
-            models.Q(
-                models.Q(deleted_at__isnull=True)
-                | models.Q(ancestors_deleted_at__isnull=True)
+        return self.filter(
+            models.Q(link_reach=LinkReachChoices.PUBLIC)
+            | models.Q(
+                inherited_links__overlap=[
+                    get_link_token(LinkReachChoices.PUBLIC, role)
+                    for role in LinkRoleChoices.values
+                ]
             )
         )
-        .exists()
+
+    def refresh_inherited_links(self):
+        """
+        Recompute, in one query, the links inherited by the items of the queryset
+        from their ancestors.
+        """
+        inherited_links = (
+            self.model.objects.filter(path__ancestors=models.OuterRef("path"))
+            .exclude(id=models.OuterRef("id"))
+            .exclude(link_reach=LinkReachChoices.RESTRICTED)
+            .annotate(link=Concat("link_reach", models.Value(":"), "link_role"))
+            .order_by("link")
+            .values_list("link", flat=True)
+            .distinct()
+        )
+        return self.update(
+            inherited_links=models.Func(
+                inherited_links,
+                function="ARRAY",
+                output_field=ArrayField(base_field=models.CharField()),
+            )
+        )
+
+    def mark_ancestors_deleted(self, deleted_at):
+        """Mark the items of the queryset as having an ancestor deleted at this date."""
+        return self.filter(ancestors_deleted_at__isnull=True).update(
+            ancestors_deleted_at=deleted_at
+        )
+
+    def unmark_ancestors_deleted(self, deleted_at):
+        """
+        Cancel the deletion of an ancestor deleted at this date on the items of the
+        queryset, keeping the items deleted on their own or through an older deletion.
+        """
+        return self.exclude(
+            models.Q(deleted_at__isnull=False)
+            | models.Q(ancestors_deleted_at__lt=deleted_at)
+        ).update(ancestors_deleted_at=None)
+
+    def annotate_subtree_propagation(self):
+        """
+        Annotate items with the operation and deletion date of the highest ancestor
+        whose soft deletion or restoration is still being propagated to its descendants.
+        """
+        propagations = ItemSubtreePropagation.objects.filter(
+            path__ancestors=models.OuterRef("path")
+        ).order_by("path")
+        return self.annotate(
+            propagating_operation=models.Subquery(propagations.values("operation")[:1]),
+            propagating_deleted_at=models.Subquery(
+                propagations.values("deleted_at")[:1]
+            ),
+        )
+
+    def exclude_propagating_deletions(self):
+        """Exclude items of subtrees whose soft deletion is still being propagated."""
+        return self.exclude(
+            models.Exists(
+                ItemSubtreePropagation.objects.filter(
+                    path__ancestors=models.OuterRef("path"),
+                    operation=ItemPropagationChoices.SOFT_DELETE,
+                )
+            )
+        )
+
+
+NB_ACCESSES_CACHE_HITS_KEY = "nb_accesses_cache_hits"
+NB_ACCESSES_CACHE_MISSES_KEY = "nb_accesses_cache_misses"
+
+
+def get_subtree_generation_key(item_id):
+    """
+    Cache key of the generation of the subtree rooted on an item. Incrementing it
+    invalidates the values cached for all its descendants and versioned by the
+    generations of their ancestors: their nb_accesses, highest readable ancestor and
+    media authorizations.
+    """
+    return f"item_{item_id!s}_subtree_generation"
+
+
+def get_subtree_generations(item_ids):
+    """
+    Return the subtree generations of a list of items, by item id, in one cache round
+    trip.
+
+    Missing generations (never invalidated or evicted) are initialized with a
+    timestamp so that they can't match a generation used before an eviction.
+    """
+    keys = {get_subtree_generation_key(item_id): item_id for item_id in item_ids}
+    generations = cache.get_many(keys)
+    missing_generations = {
+        key: time.time_ns() for key in keys if key not in generations
+    }
+    if missing_generations:
+        cache.set_many(missing_generations, timeout=None)
+        generations.update(missing_generations)
+    return {str(keys[key]): generation for key, generation in generations.items()}
+
+
+def get_user_cache_key(user):
+    """
+    Identify a user, with the teams their roles may come from, in the keys of the
+    values cached per user.
+    """
+    if not user.is_authenticated:
+        return "anonymous"
+    return f"{user.id!s}:{','.join(sorted(user.teams)):s}"
+
+
+def get_media_auth_cache_key(user, item_id):
+    """Cache key of the media authorization decision of a user on an item."""
+    version = hashlib.md5(
+        get_user_cache_key(user).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"item_{item_id!s}_media_auth_{version:s}"
+
+
+def get_subtree_generations_version(path):
+    """Version the values cached for an item by the generations of its subtrees."""
+    generations = get_subtree_generations(path)
+    return ".".join(str(generations[str(label)]) for label in path)
+
+
+def is_media_auth_cached(user, item_id):
+    """
+    Return True if the user was recently authorized to fetch the file of an item and
+    nothing affecting the decision changed since: the accesses, links, deletion or
+    position of the item or of one of its ancestors.
+    """
+    decision = cache.get(get_media_auth_cache_key(user, item_id))
+    if decision is None:
+        return False
+    path, version = decision
+    return get_subtree_generations_version(path) == version
+
+
+def cache_media_auth(user, item):
+    """
+    Remember for ITEM_MEDIA_AUTH_CACHE_TIMEOUT seconds that the user is authorized to
+    fetch the file of an item. Only granted decisions are cached.
+    """
+    path = [str(label) for label in item.path]
+    cache.set(
+        get_media_auth_cache_key(user, item.id),
+        (path, get_subtree_generations_version(path)),
+        timeout=settings.ITEM_MEDIA_AUTH_CACHE_TIMEOUT,
+    )
+
+
+def incr_cache_counter(key, delta=1):
+    """
+    Increment a counter stored in cache in one round trip, initializing it if it
+    does not exist yet.
+    """
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            # The counter was initialized in between
+            cache.incr(key, delta)
+
+
+def record_nb_accesses_cache_stats(hits, misses):
+    """
+    Count the hits and misses of the nb_accesses cache for a random sample of the
+    lookups, NB_ACCESSES_CACHE_STATS_SAMPLE_RATE, so that lookups don't pay the
+    round trips of the statistics. The sampling is disabled by default.
+    """
+    if random.random() >= settings.NB_ACCESSES_CACHE_STATS_SAMPLE_RATE:  # noqa: S311
+        return
+    incr_cache_counter(NB_ACCESSES_CACHE_HITS_KEY, hits)
+    incr_cache_counter(NB_ACCESSES_CACHE_MISSES_KEY, misses)
+
+
+def get_nb_accesses_cache_stats():
+    """Return the hits and misses of the nb_accesses cache since the last reset."""
+    counters = cache.get_many(
+        [NB_ACCESSES_CACHE_HITS_KEY, NB_ACCESSES_CACHE_MISSES_KEY]
+    )
+    return {
+        "hits": counters.get(NB_ACCESSES_CACHE_HITS_KEY, 0),
+        "misses": counters.get(NB_ACCESSES_CACHE_MISSES_KEY, 0),
+    }
+
+
+def reset_nb_accesses_cache_stats():
+    """Reset the hits and misses counters of the nb_accesses cache."""
+    cache.delete_many([NB_ACCESSES_CACHE_HITS_KEY, NB_ACCESSES_CACHE_MISSES_KEY])
+
+
+def get_link_token(link_reach, link_role):
+    """Serialize a link reach/role definition as stored in `Item.inherited_links`."""
+    return f"{link_reach:s}:{link_role:s}"
+
+
+ITEM_TITLE_UNIQUE_CONSTRAINT = "unique_item_title_among_live_siblings"
+
+
+def is_item_title_conflict(error):
+    """
+    Return True if an IntegrityError was raised by the uniqueness of titles among the
+    live children of a folder.
+    """
+    diag = getattr(error.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None) == ITEM_TITLE_UNIQUE_CONSTRAINT
+
+
+def get_item_title_conflict_error(field, code):
+    """Build the validation error raised when a title is already used in a folder."""
+    return ValidationError(
+        {field: ValidationError(_("title already exists in this folder."), code=code)}
     )
 
 
@@ -444,34 +689,76 @@ class ItemManager(TreeManager):
         """
         return self.get_queryset().readable_per_se(user)
 
-    def create_child(self, parent=None, **kwargs):
+    def readable(self, user):
         """
-        Check if the item can have children before adding one and if the title is
-        unique in the same path.
+        Filters documents based on user permissions, including the ones inherited
+        from ancestors, using the custom queryset.
+        :param user: The user for whom readable documents are to be fetched.
+        :return: A queryset of documents readable by the user.
         """
-        if parent:
-            if parent.type != ItemTypeChoices.FOLDER:
-                raise ValidationError(
-                    {
-                        "type": ValidationError(
-                            _("Only folders can have children."),
-                            code="item_create_child_type_folder_only",
-                        )
-                    }
-                )
+        return self.get_queryset().readable(user)
 
-            if _is_item_title_existing(
-                self.children(parent.path),
-                kwargs.get("title"),
-            ):
-                raise ValidationError(
-                    {
-                        "title": ValidationError(
-                            _("title already exists in this folder."),
-                            code="item_create_child_title_already_exists",
-                        )
-                    }
+    def prefetch_nb_accesses(self, items):
+        """
+        Compute the number of accesses of a list of items at once: their cache keys are
+        read in one round trip and the missing counts are computed in one query and
+        written back in one round trip.
+        """
+        if not items:
+            return
+
+        generations = get_subtree_generations(
+            {label for item in items for label in item.path}
+        )
+        cache_keys = {
+            str(item.id): item.get_nb_accesses_cache_key(
+                generations=[generations[label] for label in item.path]
+            )
+            for item in items
+        }
+        cached_values = cache.get_many(cache_keys.values())
+        missing_ids = [
+            item_id
+            for item_id, cache_key in cache_keys.items()
+            if cache_key not in cached_values
+        ]
+
+        if missing_ids:
+            nb_accesses_subquery = (
+                ItemAccessSubtree.objects.filter(
+                    path__ancestors=models.OuterRef("path")
+                )
+                .order_by()
+                .annotate(
+                    count=models.Func(
+                        "access", function="COUNT", output_field=models.IntegerField()
+                    )
                 )
+                .values("count")
+            )
+            missing_values = {
+                cache_keys[str(item_id)]: nb_accesses
+                for item_id, nb_accesses in self.filter(id__in=missing_ids)
+                .annotate(nb_accesses=models.Subquery(nb_accesses_subquery))
+                .values_list("id", "nb_accesses")
+            }
+            cache.set_many(missing_values)
+            cached_values.update(missing_values)
+
+        record_nb_accesses_cache_stats(len(items) - len(missing_ids), len(missing_ids))
+
+        for item in items:
+            item.prefetched_nb_accesses = cached_values[cache_keys[str(item.id)]]
+
+    def create_child(self, parent=None, **kwargs):
+        """
+        Check if the item can have children before adding one. The uniqueness of the
+        title in the same path is enforced by the database.
+        """
+        if parent:
+            self._check_can_have_children(parent)
+            if kwargs.get("type") == ItemTypeChoices.FILE:
+                self._check_storage_quota(parent)
 
         if not kwargs.get("id"):
             kwargs["id"] = str(uuid.uuid4())
@@ -480,22 +767,279 @@ class ItemManager(TreeManager):
 
         if parent:
             kwargs["path"] = f"{parent.path!s}.{kwargs['id']!s}"
+            kwargs["inherited_links"] = parent.get_links_for_children()
 
-        item = self.create(**kwargs)
+        try:
+            with transaction.atomic():
+                item = self.create(**kwargs)
+        except IntegrityError as error:
+            if not is_item_title_conflict(error):
+                raise
+            raise get_item_title_conflict_error(
+                "title", "item_create_child_title_already_exists"
+            ) from error
 
         if parent:
-            update = {
-                "numchild": models.F("numchild") + 1,
-            }
-            if kwargs.get("type") == ItemTypeChoices.FOLDER:
-                update["numchild_folder"] = models.F("numchild_folder") + 1
-            # updating parent.numchild and parent.numchild_folder is impossible infortunately
-            # using F() expressions because the save method is calling full_clean() and and error
-            # is raised because the value is not an integer. We have to use the update method
-            self.filter(pk=parent.id).update(**update)
+            self.update_child_counters(
+                parent.id, 1, int(kwargs.get("type") == ItemTypeChoices.FOLDER)
+            )
 
         return item
 
+    def bulk_create_children(self, parent, children, **common):
+        """
+        Create many children of a folder at once, with one insert and one update of
+        the counters of the folder instead of one of each per child.
+
+        `children` is a list of dictionaries of field values, to which the `common`
+        field values are added. Each dictionary can hold a list of `children` itself,
+        to create a whole tree of items: their paths and counters are computed before
+        inserting them. Titles are expected to be validated beforehand, the database
+        only rejecting the whole batch if a title is already used.
+
+        Return the items created, each folder being followed by its descendants.
+        """
+        items = []
+        self._build_children(parent, children, common, items)
+        if any(item.type == ItemTypeChoices.FILE for item in items):
+            self._check_storage_quota(parent)
+
+        try:
+            with transaction.atomic():
+                self.bulk_create(items)
+        except IntegrityError as error:
+            if not is_item_title_conflict(error):
+                raise
+            raise get_item_title_conflict_error(
+                "title", "item_create_child_title_already_exists"
+            ) from error
+
+        self.update_child_counters(
+            parent.id,
+            len(children),
+            sum(values["type"] == ItemTypeChoices.FOLDER for values in children),
+        )
+        return items
+
+    def _build_children(self, parent, children, common, items):
+        """Instantiate the children of an item and their descendants depth first."""
+        self._check_can_have_children(parent)
+        inherited_links = parent.get_links_for_children()
+
+        for values in children:
+            grandchildren = values.get("children", [])
+            item = self.model(
+                **common,
+                **{name: value for name, value in values.items() if name != "children"},
+            )
+            item.path = f"{parent.path!s}.{item.id!s}"
+            item.inherited_links = inherited_links
+            item.numchild = len(grandchildren)
+            item.numchild_folder = sum(
+                child["type"] == ItemTypeChoices.FOLDER for child in grandchildren
+            )
+            if item.type == ItemTypeChoices.FILE:
+                item.upload_state = ItemUploadStateChoices.PENDING
+            items.append(item)
+
+            if grandchildren:
+                self._build_children(item, grandchildren, common, items)
+
+    @staticmethod
+    def _check_can_have_children(parent):
+        """Only folders can have children."""
+        if parent.type != ItemTypeChoices.FOLDER:
+            raise ValidationError(
+                {
+                    "type": ValidationError(
+                        _("Only folders can have children."),
+                        code="item_create_child_type_folder_only",
+                    )
+                }
+            )
+
+    @staticmethod
+    def _check_storage_quota(parent):
+        """Files can not be created in a workspace which storage quota is used up."""
+        if StorageQuota.objects.get_available_size(parent) == 0:
+            raise ValidationError(
+                {
+                    "size": ValidationError(
+                        _("The storage quota of the workspace is used up."),
+                        code="item_create_storage_quota_exceeded",
+                    )
+                }
+            )
+
+    def update_child_counters(self, item_id, numchild, numchild_folder=0):
+        """
+        Add deltas to the numchild and numchild_folder counters of an item without
+        waiting for its row lock, which would serialize all writes in a busy folder.
+
+        If the row is free, the deltas are applied directly along with the deltas left
+        pending for the item. If a concurrent transaction holds it, the deltas are
+        recorded in their own row, to be merged later (see `merge_child_count_deltas`).
+        Return True if the deltas were applied directly.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH locked AS (
+                    SELECT id FROM drive_item
+                    WHERE id = %(item_id)s FOR NO KEY UPDATE SKIP LOCKED
+                ), merged AS (
+                    DELETE FROM drive_item_child_count_delta AS delta USING locked
+                    WHERE delta.item_id = locked.id
+                    RETURNING delta.numchild, delta.numchild_folder
+                )
+                UPDATE drive_item SET
+                    numchild = numchild + %(numchild)s
+                        + COALESCE((SELECT SUM(numchild) FROM merged), 0),
+                    numchild_folder = numchild_folder + %(numchild_folder)s
+                        + COALESCE((SELECT SUM(numchild_folder) FROM merged), 0)
+                WHERE id IN (SELECT id FROM locked)
+                """,
+                {
+                    "item_id": item_id,
+                    "numchild": numchild,
+                    "numchild_folder": numchild_folder,
+                },
+            )
+            is_applied = cursor.rowcount > 0
+
+        if not is_applied and (numchild or numchild_folder):
+            ItemChildCountDelta.objects.create(
+                item_id=item_id, numchild=numchild, numchild_folder=numchild_folder
+            )
+        return is_applied
+
+    def merge_child_count_deltas(self):
+        """
+        Merge the pending counter deltas into the items they belong to. Items still
+        locked by a concurrent transaction are skipped until the next merge.
+        Return the number of items which deltas were merged.
+        """
+        items_ids = (
+            ItemChildCountDelta.objects.order_by()
+            .values_list("item_id", flat=True)
+            .distinct()
+        )
+        merged = 0
+        for item_id in items_ids:
+            with transaction.atomic():
+                merged += self.update_child_counters(item_id, 0)
+        return merged
+
+    def propagate_rollups(self, item_id, path, sign=1):
+        """
+        Add (or subtract with a sign of -1) the total_size and total_files rollups of
+        an item to those of its strict ancestors counting it: the ancestors of a live
+        item are live and the ancestors of an item in the trashbin are only counting
+        it up to the root of the deleted subtree. This root is resolved from the
+        deletion date of the ancestors, which is set before the deletion of the
+        subtree is propagated to the descendants.
+
+        As for the children counters (see `update_child_counters`), ancestors locked
+        by a concurrent transaction are not waited for: their deltas are recorded in
+        their own row, to be merged later (see `merge_rollup_deltas`). The rollups of
+        the item include its own pending deltas, already counted by its ancestors.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH item AS (
+                    SELECT * FROM (
+                        SELECT
+                            drive_item.total_size
+                                + COALESCE(SUM(delta.total_size), 0) AS total_size,
+                            drive_item.total_files
+                                + COALESCE(SUM(delta.total_files), 0) AS total_files
+                        FROM drive_item
+                        LEFT JOIN drive_item_rollup_delta AS delta
+                            ON delta.item_id = drive_item.id
+                        WHERE drive_item.id = %(item_id)s
+                        GROUP BY drive_item.id
+                    ) AS totals
+                    WHERE (total_size, total_files) != (0, 0)
+                ), deleted_root AS (
+                    SELECT path FROM drive_item
+                    WHERE path @> %(path)s::ltree AND deleted_at IS NOT NULL
+                    ORDER BY nlevel(path) DESC
+                    LIMIT 1
+                ), counting AS (
+                    SELECT id FROM drive_item
+                    WHERE path @> %(path)s::ltree AND path != %(path)s::ltree
+                    AND path <@ COALESCE((SELECT path FROM deleted_root), ''::ltree)
+                    AND EXISTS (SELECT 1 FROM item)
+                ), locked AS (
+                    SELECT id FROM drive_item
+                    WHERE id IN (SELECT id FROM counting)
+                    FOR NO KEY UPDATE SKIP LOCKED
+                ), merged AS (
+                    DELETE FROM drive_item_rollup_delta AS delta USING locked
+                    WHERE delta.item_id = locked.id
+                    RETURNING delta.item_id, delta.total_size, delta.total_files
+                ), recorded AS (
+                    INSERT INTO drive_item_rollup_delta
+                        (item_id, total_size, total_files)
+                    SELECT
+                        counting.id,
+                        %(sign)s * item.total_size,
+                        %(sign)s * item.total_files
+                    FROM counting, item
+                    WHERE counting.id NOT IN (SELECT id FROM locked)
+                )
+                UPDATE drive_item SET
+                    total_size = drive_item.total_size + %(sign)s * item.total_size
+                        + COALESCE((
+                            SELECT SUM(total_size) FROM merged
+                            WHERE merged.item_id = drive_item.id
+                        ), 0),
+                    total_files = drive_item.total_files + %(sign)s * item.total_files
+                        + COALESCE((
+                            SELECT SUM(total_files) FROM merged
+                            WHERE merged.item_id = drive_item.id
+                        ), 0)
+                FROM item, locked
+                WHERE drive_item.id = locked.id
+                """,
+                {"item_id": item_id, "path": str(path), "sign": sign},
+            )
+
+    def merge_rollup_deltas(self):
+        """
+        Merge the pending rollup deltas into the items they belong to. Items still
+        locked by a concurrent transaction are skipped until the next merge.
+        Return the number of items which deltas were merged.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH locked AS (
+                    SELECT id FROM drive_item
+                    WHERE id IN (SELECT item_id FROM drive_item_rollup_delta)
+                    FOR NO KEY UPDATE SKIP LOCKED
+                ), merged AS (
+                    DELETE FROM drive_item_rollup_delta AS delta USING locked
+                    WHERE delta.item_id = locked.id
+                    RETURNING delta.item_id, delta.total_size, delta.total_files
+                )
+                UPDATE drive_item SET
+                    total_size = drive_item.total_size + deltas.total_size,
+                    total_files = drive_item.total_files + deltas.total_files
+                FROM (
+                    SELECT
+                        item_id,
+                        SUM(total_size) AS total_size,
+                        SUM(total_files) AS total_files
+                    FROM merged
+                    GROUP BY item_id
+                ) AS deltas
+                WHERE drive_item.id = deltas.item_id
+                """
+            )
+            return cursor.rowcount
+
 
 # pylint: disable=too-many-public-methods
 class Item(TreeModel, BaseModel):
@@ -538,7 +1082,19 @@ class Item(TreeModel, BaseModel):
     mimetype = models.CharField(max_length=255, null=True, blank=True)
     main_workspace = models.BooleanField(default=False)
     size = models.BigIntegerField(null=True, blank=True)
+    # Size and number of the uploaded files of the subtree rooted on the item, the
+    # item included, maintained incrementally along the ancestors path
+    total_size = models.PositiveBigIntegerField(default=0, editable=False)
+    total_files = models.PositiveIntegerField(default=0, editable=False)
     description = models.TextField(null=True, blank=True)
+    # Links of the ancestors that are not restricted, denormalized as "reach:role"
+    # tokens so abilities can be computed without walking up the tree.
+    inherited_links = ArrayField(
+        base_field=models.CharField(max_length=50),
+        default=list,
+        blank=True,
+        editable=False,
+    )
 
     label_size = 7
 
@@ -566,38 +1122,158 @@ class Item(TreeModel, BaseModel):
                 ),
                 name="check_filename_set_for_files",
             ),
+            # Titles are unique among the live children of a folder, identified by
+            # the path of their parent
+            models.UniqueConstraint(
+                models.Func(
+                    "path",
+                    0,
+                    models.Func(
+                        "path", function="nlevel", output_field=models.IntegerField()
+                    )
+                    - 1,
+                    function="subpath",
+                    output_field=PathField(),
+                ),
+                "title",
+                condition=models.Q(deleted_at__isnull=True, path__depth__gt=1),
+                name=ITEM_TITLE_UNIQUE_CONSTRAINT,
+            ),
         ]
         indexes = [
             GistIndex(fields=["path"]),
+            # Search titles by trigram similarity and filter them with icontains,
+            # which compares uppercased titles
+            GinIndex(
+                fields=["title"], opclasses=["gin_trgm_ops"], name="item_title_trgm_idx"
+            ),
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="item_title_upper_trgm_idx",
+            ),
+            # Find the roots of soft deleted subtrees, e.g. to purge expired ones
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(
+                    deleted_at__isnull=False, hard_deleted_at__isnull=True
+                ),
+                name="item_soft_deleted_at_idx",
+            ),
         ]
 
     def __str__(self):
         return str(self.title)
 
     def save(self, *args, **kwargs):
-        """Set the upload state to pending if it's the first save and it's a file"""
+        """
+        Set the upload state to pending if it's the first save and it's a file.
+        Propagate link changes to the links inherited by descendants.
+        """
         if self.created_at is None and self.type == ItemTypeChoices.FILE:
             self.upload_state = ItemUploadStateChoices.PENDING
 
         if not self.path:
             self.path = str(self.id)
 
-        return super().save(*args, **kwargs)
+        is_adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        has_links_changed = (
+            not is_adding
+            and (
+                update_fields is None
+                or {"link_reach", "link_role"}.intersection(update_fields)
+            )
+            and (self.link_reach, self.link_role)
+            != getattr(self, "_loaded_links", (None, None))
+        )
+
+        if not has_links_changed:
+            result = super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                result = super().save(*args, **kwargs)
+                if self.type == ItemTypeChoices.FOLDER:
+                    self.descendants().refresh_inherited_links()
+
+        if has_links_changed:
+            self.invalidate_subtree_caches()
+
+        if is_adding or has_links_changed:
+            # pylint: disable=attribute-defined-outside-init
+            self._loaded_links = (self.link_reach, self.link_role)
+
+        return result
 
+    @transaction.atomic
     def delete(self, using=None, keep_parents=False):
         if self.main_workspace:
             raise RuntimeError("The main workspace cannot be deleted.")
+        # The files of a hard deleted item were already removed from the ledger
+        if self.hard_deleted_at is None:
+            StorageQuota.objects.add_used_size(self, -self.get_stored_size())
+        # The rollups of a soft deleted item were already removed from its ancestors
+        if self.deleted_at is None:
+            self._meta.model.objects.propagate_rollups(self.id, self.path, sign=-1)
         delete = super().delete(using, keep_parents)
-        if self.depth > 1:
-            parent = self.parent()
-            update = {
-                "numchild": models.F("numchild") - 1,
-            }
-            if self.type == ItemTypeChoices.FOLDER:
-                update["numchild_folder"] = models.F("numchild_folder") - 1
-            self._meta.model.objects.filter(pk=parent.id).update(**update)
+        self.invalidate_subtree_caches()
+        # The parent of a soft deleted item was already updated on soft deletion
+        if self.depth > 1 and self.deleted_at is None:
+            self._meta.model.objects.update_child_counters(
+                self.parent().id, -1, -int(self.type == ItemTypeChoices.FOLDER)
+            )
         return delete
 
+    def get_constraints(self):
+        """
+        Leave the uniqueness of titles to the database instead of checking it with a
+        query on each `full_clean`: violations are caught where titles can collide.
+        """
+        return [
+            (
+                model_class,
+                [
+                    constraint
+                    for constraint in constraints
+                    if constraint.name != ITEM_TITLE_UNIQUE_CONSTRAINT
+                ],
+            )
+            for model_class, constraints in super().get_constraints()
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Keep track of the links as loaded to detect changes when saving."""
+        instance = super().from_db(db, field_names, values)
+        # pylint: disable=protected-access
+        instance._loaded_links = (  # noqa: SLF001
+            instance.__dict__.get("link_reach"),
+            instance.__dict__.get("link_role"),
+        )
+        return instance
+
+    @property
+    def current_ancestors_deleted_at(self):
+        """
+        Return the deletion date of the item or its ancestors, resolved from the
+        deletion date of an ancestor whose soft deletion or restoration is still being
+        propagated if the item was annotated with it (see
+        `ItemQuerySet.annotate_subtree_propagation`).
+        """
+        deleted_at = getattr(self, "propagating_deleted_at", None)
+        if deleted_at is None:
+            return self.ancestors_deleted_at
+
+        if self.propagating_operation == ItemPropagationChoices.SOFT_DELETE:
+            return self.ancestors_deleted_at or deleted_at
+
+        # The restoration of an ancestor does not restore items deleted on their own
+        # or through an older deletion
+        if self.deleted_at or (
+            self.ancestors_deleted_at and self.ancestors_deleted_at < deleted_at
+        ):
+            return self.ancestors_deleted_at
+        return None
+
     def ancestors(self):
         """Return the ancestors of the item excluding the item itself."""
         return super().ancestors().exclude(id=self.id)
@@ -627,33 +1303,88 @@ class Item(TreeModel, BaseModel):
 
         return f"{self.key_base}/{self.filename}"
 
+    @property
+    def root_id(self):
+        """Id of the root of the tree of the item, i.e. of its workspace."""
+        return str(self.path).split(".", 1)[0]
+
     @property
     def depth(self):
         """Return the depth of the item in the tree."""
         return len(self.path)
 
-    def get_nb_accesses_cache_key(self):
-        """Generate a unique cache key for each item."""
-        return f"item_{self.id!s}_nb_accesses"
+    def get_nb_accesses_cache_key(self, generations=None):
+        """
+        Generate a unique cache key for each item, versioned by the generations of the
+        subtrees it belongs to.
+        """
+        if generations is None:
+            generations_per_id = get_subtree_generations(self.path)
+            generations = [generations_per_id[label] for label in self.path]
+        version = hashlib.md5(
+            ".".join(str(generation) for generation in generations).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return f"item_{self.id!s}_nb_accesses_{version:s}"
+
+    def get_highest_readable_ancestor_path(self, user):
+        """
+        Return the path of the highest ancestor of the item, the item included, that
+        the user can read per se and that is not deleted, or None.
 
-    def is_item_title_existing(self, title):
-        """Check if the title is unique in the same path."""
-        return _is_item_title_existing(
-            self.siblings(),
-            title,
-        )
+        The result is cached per user, versioned by the path of the item and by the
+        generations of the subtrees it belongs to: moving the item or changing the
+        accesses, links or deletion of one of its ancestors invalidates it.
+        """
+        generations = get_subtree_generations(self.path)
+        version = hashlib.md5(
+            "|".join(
+                [
+                    get_user_cache_key(user),
+                    str(self.path),
+                    ".".join(str(generations[label]) for label in self.path),
+                ]
+            ).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        cache_key = f"item_{self.id!s}_highest_readable_ancestor_{version:s}"
+
+        path = cache.get(cache_key)
+        if path is None:
+            highest_ancestor_path = (
+                Item.objects.filter(
+                    path__ancestors=self.path, ancestors_deleted_at__isnull=True
+                )
+                .readable_per_se(user)
+                .order_by("path")
+                .values_list("path", flat=True)
+                .first()
+            )
+            # Cache an empty string when none is readable to tell it from a miss
+            path = str(highest_ancestor_path or "")
+            cache.set(cache_key, path)
+
+        return path or None
 
     @property
     def nb_accesses(self):
         """Calculate the number of accesses."""
+        try:
+            return self.prefetched_nb_accesses
+        except AttributeError:
+            pass
+
         cache_key = self.get_nb_accesses_cache_key()
         nb_accesses = cache.get(cache_key)
 
         if nb_accesses is None:
+            record_nb_accesses_cache_stats(0, 1)
             nb_accesses = ItemAccess.objects.filter(
                 item__path__ancestors=self.path,
             ).count()
             cache.set(cache_key, nb_accesses)
+        else:
+            record_nb_accesses_cache_stats(1, 0)
 
         return nb_accesses
 
@@ -662,15 +1393,17 @@ class Item(TreeModel, BaseModel):
         """Return True if the item is the root of the tree."""
         return len(self.path) == 1
 
-    def invalidate_nb_accesses_cache(self):
+    def invalidate_subtree_caches(self):
         """
-        Invalidate the cache for number of accesses, including on affected descendants.
+        Invalidate the caches of the number of accesses, of the highest readable
+        ancestor and of the media authorizations, including on affected descendants,
+        by bumping the generation of the subtree rooted on the item.
         """
-        for item in self._meta.model.objects.filter(path__descendants=self.path).only(
-            "id"
-        ):
-            cache_key = item.get_nb_accesses_cache_key()
-            cache.delete(cache_key)
+        key = get_subtree_generation_key(self.id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
 
     def get_roles(self, user):
         """Return the roles a user has on an item."""
@@ -681,13 +1414,33 @@ class Item(TreeModel, BaseModel):
             roles = self.user_roles or []
         except AttributeError:
             try:
-                roles = ItemAccess.objects.filter(
-                    models.Q(user=user) | models.Q(team__in=user.teams),
-                    item__path__ancestors=self.path,
-                ).values_list("role", flat=True)
+                roles = [
+                    role
+                    for subtree_roles in ItemAccessSubtree.objects.filter(
+                        models.Q(user=user) | models.Q(team__in=user.teams),
+                        path__ancestors=self.path,
+                    ).values_list("roles", flat=True)
+                    for role in subtree_roles
+                ]
             except (models.ObjectDoesNotExist, IndexError):
                 roles = []
-        return roles
+        # Most privileged roles first
+        return sorted(roles, key=RoleChoices.values.index, reverse=True)
+
+    def get_inherited_links(self):
+        """Return the links reach/role definitions inherited from the ancestors."""
+        inherited_links = []
+        for token in self.inherited_links:
+            link_reach, link_role = token.split(":", 1)
+            inherited_links.append({"link_reach": link_reach, "link_role": link_role})
+        return inherited_links
+
+    def get_links_for_children(self):
+        """Return the links that the children of the item inherit from it."""
+        links = set(self.inherited_links)
+        if self.link_reach != LinkReachChoices.RESTRICTED:
+            links.add(get_link_token(self.link_reach, self.link_role))
+        return sorted(links)
 
     def get_links_definitions(self, ancestors_links=None):
         """Get links reach/role definitions for the current item and its ancestors."""
@@ -707,7 +1460,7 @@ class Item(TreeModel, BaseModel):
         if self.depth <= 1 or getattr(self, "is_highest_ancestor_for_user", False):
             ancestors_links = []
         elif ancestors_links is None:
-            ancestors_links = self.ancestors().values("link_reach", "link_role")
+            ancestors_links = self.get_inherited_links()
 
         roles = set(
             self.get_roles(user)
@@ -715,7 +1468,7 @@ class Item(TreeModel, BaseModel):
 
         # Characteristics that are based only on specific access
         is_owner = RoleChoices.OWNER in roles
-        is_deleted = self.ancestors_deleted_at and not is_owner
+        is_deleted = self.current_ancestors_deleted_at and not is_owner
         is_owner_or_admin = (is_owner or RoleChoices.ADMIN in roles) and not is_deleted
 
         # Compute access roles before adding link roles because we don't
@@ -744,7 +1497,9 @@ class Item(TreeModel, BaseModel):
         can_destroy = is_owner if self.is_root else can_update
         # A workspace cannot be moved
         can_move = (
-            False if self.is_root else can_update and not self.ancestors_deleted_at
+            False
+            if self.is_root
+            else can_update and not self.current_ancestors_deleted_at
         )
 
         return {
@@ -823,11 +1578,91 @@ class Item(TreeModel, BaseModel):
 
         self.send_email(subject, [email], context, language)
 
+    def should_propagate_asynchronously(self):
+        """
+        Return True if the item has too many descendants to propagate its soft deletion
+        or restoration to them within the request (see ITEM_SUBTREE_ASYNC_THRESHOLD).
+        """
+        if self.type != ItemTypeChoices.FOLDER:
+            return False
+
+        threshold = settings.ITEM_SUBTREE_ASYNC_THRESHOLD
+        return self.descendants()[: threshold + 1].count() > threshold
+
+    def start_subtree_propagation(self, operation, deleted_at):
+        """
+        Record an operation to propagate to the descendants of the item by batches,
+        replacing any propagation still pending on the item.
+        """
+        ItemSubtreePropagation.objects.update_or_create(
+            item=self,
+            defaults={
+                "path": self.path,
+                "operation": operation,
+                "deleted_at": deleted_at,
+                "checkpoint": None,
+            },
+        )
+
     @transaction.atomic
-    def soft_delete(self):
+    def mark_uploaded(self, mimetype, size):
+        """
+        Mark the upload of a file as ended and add its size to the rollups of its
+        ancestors.
+        """
+        self.upload_state = ItemUploadStateChoices.UPLOADED
+        self.mimetype = mimetype
+        self.size = size
+        self.total_size = size or 0
+        self.total_files = 1
+        self.save(
+            update_fields=[
+                "upload_state",
+                "mimetype",
+                "size",
+                "total_size",
+                "total_files",
+            ]
+        )
+        self._meta.model.objects.propagate_rollups(self.id, self.path)
+        StorageQuota.objects.add_used_size(self, self.total_size)
+
+    def get_stored_size(self):
+        """
+        Return the size of the files of the subtree of the item that are not hard
+        deleted yet: the rollups of the item and of the roots of the subtrees deleted
+        inside it, which are not counted in the rollups of their ancestors, along with
+        their pending deltas.
+        """
+        deltas_size = (
+            ItemRollupDelta.objects.filter(item_id=models.OuterRef("pk"))
+            .order_by()
+            .values("item_id")
+            .annotate(size=models.Sum("total_size"))
+            .values("size")
+        )
+        return Item.objects.filter(
+            models.Q(pk=self.pk) | models.Q(deleted_at__isnull=False),
+            path__descendants=self.path,
+            hard_deleted_at__isnull=True,
+        ).aggregate(
+            size=Coalesce(
+                models.Sum(
+                    models.F("total_size") + Coalesce(models.Subquery(deltas_size), 0)
+                ),
+                0,
+            )
+        )["size"]
+
+    @transaction.atomic
+    def soft_delete(self, asynchronous=False):
         """
         Soft delete the item, marking the deletion on descendants.
         We still keep the .delete() method untouched for programmatic purposes.
+
+        In asynchronous mode, the deletion of descendants is only recorded and must be
+        propagated by the `propagate_subtree_deletion` task. Meanwhile, readers resolve
+        the state of descendants from the deletion date of the item.
         """
         if self.deleted_at or self.ancestors_deleted_at:
             raise RuntimeError("This item is already deleted or has deleted ancestors.")
@@ -841,25 +1676,31 @@ class Item(TreeModel, BaseModel):
                 "Cannot delete this item because one or more ancestors are already deleted."
             )
 
+        # Subtract the item from the rollups of its ancestors while they count it
+        self._meta.model.objects.propagate_rollups(self.id, self.path, sign=-1)
         self.ancestors_deleted_at = self.deleted_at = timezone.now()
 
         self.save(update_fields=["deleted_at", "ancestors_deleted_at"])
+        self.invalidate_subtree_caches()
 
         if self.depth > 1:
-            parent = self.parent()
-            update = {
-                "numchild": models.F("numchild") - 1,
-            }
-            if self.type == ItemTypeChoices.FOLDER:
-                update["numchild_folder"] = models.F("numchild_folder") - 1
-            self._meta.model.objects.filter(pk=parent.id).update(**update)
+            self._meta.model.objects.update_child_counters(
+                self.parent().id, -1, -int(self.type == ItemTypeChoices.FOLDER)
+            )
 
         # Mark all descendants as soft deleted
-        if self.type == ItemTypeChoices.FOLDER:
-            self.descendants().filter(ancestors_deleted_at__isnull=True).update(
-                ancestors_deleted_at=self.ancestors_deleted_at,
+        if self.type != ItemTypeChoices.FOLDER:
+            return
+
+        if asynchronous:
+            self.start_subtree_propagation(
+                ItemPropagationChoices.SOFT_DELETE, self.deleted_at
             )
+        else:
+            ItemSubtreePropagation.objects.filter(item=self).delete()
+            self.descendants().mark_ancestors_deleted(self.deleted_at)
 
+    @transaction.atomic
     def hard_delete(self):
         """
         Hard delete the item, marking the deletion on descendants.
@@ -885,15 +1726,24 @@ class Item(TreeModel, BaseModel):
                 }
             )
 
+        # Files stay in the storage quota of the workspace until hard deleted
+        StorageQuota.objects.add_used_size(self, -self.get_stored_size())
+
         self.hard_deleted_at = timezone.now()
         self.save(update_fields=["hard_deleted_at"])
+        self.invalidate_subtree_caches()
 
         # Mark all descendants as hard deleted
         self.descendants().update(hard_deleted_at=self.hard_deleted_at)
 
     @transaction.atomic
-    def restore(self):
-        """Cancelling a soft delete with checks."""
+    def restore(self, asynchronous=False):
+        """
+        Cancelling a soft delete with checks.
+
+        In asynchronous mode, the restoration of descendants is only recorded and must
+        be propagated by the `propagate_subtree_deletion` task.
+        """
         # This should not happen
         if self.deleted_at is None:
             raise ValidationError(
@@ -939,22 +1789,30 @@ class Item(TreeModel, BaseModel):
         self.deleted_at = None
         self.ancestors_deleted_at = None
 
-        self.save(update_fields=["deleted_at", "ancestors_deleted_at"])
-
-        self.descendants().exclude(
-            models.Q(deleted_at__isnull=False)
-            | models.Q(ancestors_deleted_at__lt=current_deleted_at)
-        ).update(ancestors_deleted_at=None)
+        try:
+            self.save(update_fields=["deleted_at", "ancestors_deleted_at"])
+        except IntegrityError as error:
+            if not is_item_title_conflict(error):
+                raise
+            raise get_item_title_conflict_error(
+                "title", "item_restore_title_already_exists"
+            ) from error
+        self.invalidate_subtree_caches()
+        self._meta.model.objects.propagate_rollups(self.id, self.path)
+
+        if asynchronous:
+            self.start_subtree_propagation(
+                ItemPropagationChoices.RESTORE, current_deleted_at
+            )
+        else:
+            ItemSubtreePropagation.objects.filter(item=self).delete()
+            self.descendants().unmark_ancestors_deleted(current_deleted_at)
 
         if self.depth > 1 and not has_ancestors_deleted:
             # Update parent numchild and numchild_folder
-            parent = self.parent()
-            update = {
-                "numchild": models.F("numchild") + 1,
-            }
-            if self.type == ItemTypeChoices.FOLDER:
-                update["numchild_folder"] = models.F("numchild_folder") + 1
-            self._meta.model.objects.filter(pk=parent.id).update(**update)
+            self._meta.model.objects.update_child_counters(
+                self.parent().id, 1, int(self.type == ItemTypeChoices.FOLDER)
+            )
 
     @transaction.atomic
     def move(self, target, ignore_parent_numchild_update=False):
@@ -976,12 +1834,29 @@ class Item(TreeModel, BaseModel):
         if self.depth > 1:
             # Store old parent id in order to update its numchild and numchild_folder
             old_parent_id = self.parent().id
+        # Items in the trashbin are not counted in the rollups of their ancestors
+        if self.deleted_at is None:
+            self._meta.model.objects.propagate_rollups(self.id, old_path, sign=-1)
+        # Files moved to another workspace count in the storage quota of its owner
+        moved_size = 0
+        if self.root_id != target.root_id:
+            moved_size = self.get_stored_size()
+            StorageQuota.objects.add_used_size(self, -moved_size)
         self.path = f"{target.path!s}.{self.id!s}"
-        self.save(update_fields=["path"])
-        target_update = {
-            "numchild": models.F("numchild") + 1,
-        }
-
+        self.inherited_links = target.get_links_for_children()
+        try:
+            self.save(update_fields=["path", "inherited_links"])
+        except IntegrityError as error:
+            if not is_item_title_conflict(error):
+                raise
+            raise get_item_title_conflict_error(
+                "target", "item_move_title_already_exists"
+            ) from error
+        ItemAccessSubtree.objects.filter(path__descendants=old_path).update(
+            path=RawSQL(
+                "%s || subpath(path, nlevel(%s))", (str(self.path), str(old_path))
+            )
+        )
         if self.type == ItemTypeChoices.FOLDER:
             # https://patshaughnessy.net/2017/12/14/manipulating-trees-using-sql-and-the-postgres-ltree-extension
             self._meta.model.objects.filter(path__descendants=old_path).update(
@@ -989,17 +1864,178 @@ class Item(TreeModel, BaseModel):
                     "%s || subpath(path, nlevel(%s))", (str(self.path), str(old_path))
                 )
             )
-            target_update["numchild_folder"] = models.F("numchild_folder") + 1
+            ItemSubtreePropagation.objects.filter(path__descendants=old_path).update(
+                path=RawSQL(
+                    "%s || subpath(path, nlevel(%s))", (str(self.path), str(old_path))
+                ),
+                checkpoint=RawSQL(
+                    "%s || subpath(checkpoint, nlevel(%s))",
+                    (str(self.path), str(old_path)),
+                ),
+            )
+            # The moved subtree now inherits its links from new ancestors
+            self.descendants().refresh_inherited_links()
+
+        # The moved subtree now has different ancestors
+        self.invalidate_subtree_caches()
+
+        if self.deleted_at is None:
+            self._meta.model.objects.propagate_rollups(self.id, self.path)
+        StorageQuota.objects.add_used_size(self, moved_size)
 
+        is_folder = int(self.type == ItemTypeChoices.FOLDER)
         # update target numchild and numchild_folder
-        self._meta.model.objects.filter(pk=target.id).update(**target_update)
+        self._meta.model.objects.update_child_counters(target.id, 1, is_folder)
 
         # update old parent numchild and numchild_folder
         if old_parent_id and not ignore_parent_numchild_update:
-            update = {"numchild": models.F("numchild") - 1}
-            if self.type == ItemTypeChoices.FOLDER:
-                update["numchild_folder"] = models.F("numchild_folder") - 1
-            self._meta.model.objects.filter(pk=old_parent_id).update(**update)
+            self._meta.model.objects.update_child_counters(
+                old_parent_id, -1, -is_folder
+            )
+
+
+# Number of time slots during which buffered link trace accesses are kept in cache
+LINK_TRACE_BUFFER_SLOTS = 10
+
+
+def get_link_trace_slot_key(slot):
+    """Cache key of the counter of the accesses buffered during a time slot."""
+    return f"link_trace_buffer_{slot:d}"
+
+
+class LinkTraceManager(models.Manager):
+    """Custom manager for the LinkTrace model."""
+
+    def get_buffer_slot(self):
+        """Return the time slot in which accesses are currently buffered."""
+        return int(time.time() // settings.LINK_TRACE_FLUSH_INTERVAL)
+
+    def record(self, item, user):
+        """
+        Buffer in cache that a user accessed an item, without writing to the database.
+        Accesses are appended to the current time slot, at most once per pair of
+        user/item and LINK_TRACE_ACCESS_UPDATE_INTERVAL, and written periodically by
+        `flush_buffer`.
+        """
+        if not cache.add(
+            f"link_trace_recorded_{user.id!s}_{item.id!s}",
+            True,
+            timeout=settings.LINK_TRACE_ACCESS_UPDATE_INTERVAL,
+        ):
+            return
+
+        timeout = settings.LINK_TRACE_FLUSH_INTERVAL * LINK_TRACE_BUFFER_SLOTS
+        slot_key = get_link_trace_slot_key(self.get_buffer_slot())
+        cache.add(slot_key, 0, timeout=timeout)
+        try:
+            index = cache.incr(slot_key)
+        except ValueError:
+            # The counter was evicted in between or the cache does not persist values
+            self.touch(item, user)
+            return
+
+        cache.set(
+            f"{slot_key}_{index:d}", (user.id, item.id, timezone.now()), timeout=timeout
+        )
+
+    def flush_buffer(self, final=False):
+        """
+        Write the accesses buffered in cache with one upsert and return the number of
+        traces created or updated. Only the slots closed for a full slot are flushed
+        so that accesses being buffered are not missed, unless `final` is True.
+        """
+        current_slot = self.get_buffer_slot()
+        slots = range(
+            current_slot - LINK_TRACE_BUFFER_SLOTS,
+            current_slot + 1 if final else current_slot - 1,
+        )
+        counters = cache.get_many([get_link_trace_slot_key(slot) for slot in slots])
+        entry_keys = [
+            f"{slot_key}_{index:d}"
+            for slot_key, count in counters.items()
+            for index in range(1, count + 1)
+        ]
+
+        # Coalesce the accesses of each pair as an upsert can't update a row twice
+        accesses = {}
+        for user_id, item_id, accessed_at in cache.get_many(entry_keys).values():
+            accesses[user_id, item_id] = max(
+                accessed_at, accesses.get((user_id, item_id), accessed_at)
+            )
+
+        flushed = 0
+        if accesses:
+            pairs = sorted(accesses)
+            with connection.cursor() as cursor:
+                # Traces of users or items deleted in the meantime are dropped
+                cursor.execute(
+                    """
+                    INSERT INTO drive_link_trace (
+                        id, created_at, updated_at, last_accessed_at, item_id, user_id
+                    )
+                    SELECT
+                        trace.id, NOW(), NOW(), trace.accessed_at, trace.item_id,
+                        trace.user_id
+                    FROM unnest(
+                        %(ids)s::uuid[],
+                        %(user_ids)s::uuid[],
+                        %(item_ids)s::uuid[],
+                        %(accessed_at)s::timestamptz[]
+                    ) AS trace(id, user_id, item_id, accessed_at)
+                    JOIN drive_item ON drive_item.id = trace.item_id
+                    JOIN drive_user ON drive_user.id = trace.user_id
+                    ORDER BY trace.user_id, trace.item_id
+                    ON CONFLICT (user_id, item_id) DO UPDATE SET
+                        last_accessed_at = EXCLUDED.last_accessed_at
+                    WHERE drive_link_trace.last_accessed_at
+                        < EXCLUDED.last_accessed_at
+                    """,
+                    {
+                        "ids": [uuid.uuid4() for _pair in pairs],
+                        "user_ids": [user_id for user_id, _item_id in pairs],
+                        "item_ids": [item_id for _user_id, item_id in pairs],
+                        "accessed_at": [accesses[pair] for pair in pairs],
+                    },
+                )
+                flushed = cursor.rowcount
+
+        # Counters of slots still open are kept for the accesses to come
+        cache.delete_many(
+            entry_keys
+            + [
+                get_link_trace_slot_key(slot)
+                for slot in slots
+                if slot < current_slot - 1
+            ]
+        )
+        return flushed
+
+    def touch(self, item, user):
+        """
+        Record that a user accessed an item with one upsert, without reading the trace
+        first. The access date of an existing trace is only moved forward when it is
+        older than LINK_TRACE_ACCESS_UPDATE_INTERVAL seconds so that repeated visits
+        do not rewrite the row each time. Used when accesses can't be buffered.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO drive_link_trace (
+                    id, created_at, updated_at, last_accessed_at, item_id, user_id
+                )
+                VALUES (%(id)s, NOW(), NOW(), NOW(), %(item_id)s, %(user_id)s)
+                ON CONFLICT (user_id, item_id) DO UPDATE SET
+                    last_accessed_at = EXCLUDED.last_accessed_at
+                WHERE drive_link_trace.last_accessed_at
+                    < EXCLUDED.last_accessed_at - make_interval(secs => %(interval)s)
+                """,
+                {
+                    "id": uuid.uuid4(),
+                    "item_id": item.id,
+                    "user_id": user.id,
+                    "interval": settings.LINK_TRACE_ACCESS_UPDATE_INTERVAL,
+                },
+            )
 
 
 class LinkTrace(BaseModel):
@@ -1015,6 +2051,14 @@ class LinkTrace(BaseModel):
         related_name="link_traces",
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="link_traces")
+    last_accessed_at = models.DateTimeField(
+        verbose_name=_("last accessed on"),
+        help_text=_("date and time at which the user last accessed the item"),
+        default=timezone.now,
+        editable=False,
+    )
+
+    objects = LinkTraceManager()
 
     class Meta:
         db_table = "drive_link_trace"
@@ -1029,6 +2073,13 @@ class LinkTrace(BaseModel):
                 ),
             ),
         ]
+        indexes = [
+            # Serves the recent items of a user with one index range scan
+            models.Index(
+                fields=["user", "-last_accessed_at"],
+                name="link_trace_user_recent_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user!s} trace on item {self.item!s}"
@@ -1104,14 +2155,18 @@ class ItemAccess(BaseAccess):
         return f"{self.user!s} is {self.role:s} in item {self.item!s}"
 
     def save(self, *args, **kwargs):
-        """Override save to clear the item's cache for number of accesses."""
+        """
+        Override save to keep the access subtree in sync and clear the item's cache
+        for number of accesses.
+        """
         super().save(*args, **kwargs)
-        self.item.invalidate_nb_accesses_cache()
+        ItemAccessSubtree.objects.sync([self])
+        self.item.invalidate_subtree_caches()
 
     def delete(self, *args, **kwargs):
         """Override delete to clear the item's cache for number of accesses."""
         super().delete(*args, **kwargs)
-        self.item.invalidate_nb_accesses_cache()
+        self.item.invalidate_subtree_caches()
 
     def get_abilities(self, user):
         """
@@ -1120,6 +2175,136 @@ class ItemAccess(BaseAccess):
         return self._get_abilities(self.item, user)
 
 
+class ItemAccessSubtreeManager(models.Manager):
+    """Manager to keep item access subtrees in sync with item accesses."""
+
+    def sync(self, accesses):
+        """
+        Create or update, in one query, the subtrees mirroring the given item accesses.
+        The item of each access should already be loaded to avoid a query per access.
+        """
+        return self.bulk_create(
+            [
+                self.model(
+                    access=access,
+                    user_id=access.user_id,
+                    team=access.team,
+                    item_id=access.item_id,
+                    path=access.item.path,
+                    roles=[access.role],
+                )
+                for access in accesses
+            ],
+            update_conflicts=True,
+            unique_fields=["access"],
+            update_fields=["user", "team", "item", "path", "roles"],
+        )
+
+
+class ItemAccessSubtree(models.Model):
+    """
+    Subtree of items on which a user or a team holds roles. It mirrors item accesses
+    with the path of their item denormalized, so that the roles of a user on an item
+    and its ancestors can be resolved with one indexed lookup on the path.
+    """
+
+    access = models.OneToOneField(
+        ItemAccess,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="subtree",
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    team = models.CharField(max_length=100, blank=True)
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    path = PathField()
+    roles = ArrayField(
+        base_field=models.CharField(max_length=20, choices=RoleChoices.choices),
+    )
+
+    objects = ItemAccessSubtreeManager()
+
+    class Meta:
+        db_table = "drive_item_access_subtree"
+        verbose_name = _("Item access subtree")
+        verbose_name_plural = _("Item access subtrees")
+        indexes = [
+            GistIndex(fields=["path"]),
+            models.Index(fields=["team"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user or self.team!s} has roles on subtree {self.path!s}"
+
+
+class ItemSubtreePropagation(models.Model):
+    """
+    Soft deletion or restoration of an item still being propagated to its descendants
+    by batches. The checkpoint is the path of the last descendant processed so that
+    the propagation can resume where it stopped.
+    """
+
+    item = models.OneToOneField(
+        Item,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="subtree_propagation",
+    )
+    path = PathField()
+    operation = models.CharField(max_length=20, choices=ItemPropagationChoices.choices)
+    deleted_at = models.DateTimeField()
+    checkpoint = PathField(null=True, blank=True)
+
+    class Meta:
+        db_table = "drive_item_subtree_propagation"
+        verbose_name = _("Item subtree propagation")
+        verbose_name_plural = _("Item subtree propagations")
+        indexes = [GistIndex(fields=["path"])]
+
+    def __str__(self):
+        return f"{self.get_operation_display()!s} of subtree {self.path!s}"
+
+    def propagate_batch(self, batch_size):
+        """
+        Propagate the operation to the next batch of descendants and save the
+        checkpoint, deleting the propagation once all descendants were processed.
+        Return True if descendants remain to be processed.
+        """
+        descendants = Item.objects.filter(path__descendants=self.path).exclude(
+            path=self.path
+        )
+        if self.checkpoint:
+            descendants = descendants.filter(path__gt=self.checkpoint)
+
+        paths = list(
+            descendants.order_by("path").values_list("path", flat=True)[:batch_size]
+        )
+        if paths:
+            batch = descendants.filter(path__lte=paths[-1])
+            if self.operation == ItemPropagationChoices.SOFT_DELETE:
+                batch.mark_ancestors_deleted(self.deleted_at)
+            else:
+                batch.unmark_ancestors_deleted(self.deleted_at)
+
+        if len(paths) < batch_size:
+            self.delete()
+            return False
+
+        self.checkpoint = paths[-1]
+        self.save(update_fields=["checkpoint"])
+        return True
+
+
 class Invitation(BaseModel):
     """User invitation to am item."""
 
@@ -1207,3 +2392,162 @@ class Invitation(BaseModel):
             "partial_update": is_admin_or_owner,
             "retrieve": is_admin_or_owner,
         }
+
+
+class ItemChildCountDelta(models.Model):
+    """
+    Deltas of the numchild and numchild_folder counters of an item, recorded when its
+    row was locked by a concurrent transaction and waiting to be merged into it.
+    """
+
+    item = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name="child_count_deltas"
+    )
+    numchild = models.IntegerField(default=0)
+    numchild_folder = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "drive_item_child_count_delta"
+        verbose_name = _("Item child count delta")
+        verbose_name_plural = _("Item child count deltas")
+
+    def __str__(self):
+        return f"{self.numchild:+d} child(ren) for item {self.item_id!s}"
+
+
+class ItemRollupDelta(models.Model):
+    """
+    Deltas of the total_size and total_files rollups of an item, recorded when its
+    row was locked by a concurrent transaction and waiting to be merged into it.
+    """
+
+    item = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name="rollup_deltas"
+    )
+    total_size = models.BigIntegerField(default=0)
+    total_files = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "drive_item_rollup_delta"
+        verbose_name = _("Item rollup delta")
+        verbose_name_plural = _("Item rollup deltas")
+
+    def __str__(self):
+        return f"{self.total_size:+d} byte(s) for item {self.item_id!s}"
+
+
+class ItemContent(models.Model):
+    """
+    Text extracted from the file of an item, indexed for full-text search. It is
+    stored aside from items to keep their rows small.
+    """
+
+    item = models.OneToOneField(
+        Item,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="content",
+    )
+    text = models.TextField()
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "drive_item_content"
+        verbose_name = _("Item content")
+        verbose_name_plural = _("Item contents")
+        indexes = [GinIndex(fields=["search_vector"])]
+
+    def __str__(self):
+        return f"Content of item {self.item_id!s}"
+
+
+class StorageQuotaManager(models.Manager):
+    """Manager of the ledger of the storage used by the owners of workspaces."""
+
+    def get_available_size(self, item):
+        """
+        Return the size left in the storage quota of the owner of the workspace of an
+        item, i.e. the creator of the root of its tree, with one query, or None if it
+        is not limited.
+        """
+        owner = (
+            Item.objects.filter(id=item.root_id)
+            .values_list(
+                "creator_id",
+                "creator__storage_quota__used_size",
+                "creator__storage_quota__max_size",
+            )
+            .first()
+        )
+        if owner is None or owner[0] is None:
+            return None
+
+        _creator_id, used_size, max_size = owner
+        if max_size is None:
+            max_size = settings.STORAGE_QUOTA_DEFAULT_MAX_SIZE
+        if max_size is None:
+            return None
+        return max(max_size - (used_size or 0), 0)
+
+    def get_available_size_per_file(self, item, nb_files):
+        """
+        Split the size left in the storage quota of the workspace of an item between
+        the files uploaded in one batch, so that their upload policies can't allow
+        more than the quota left altogether.
+        """
+        available_size = self.get_available_size(item)
+        if available_size is None or nb_files < 2:
+            return available_size
+        return available_size // nb_files
+
+    def add_used_size(self, item, size):
+        """
+        Add a size, or subtract it if negative, to the storage used by the owner of
+        the workspace of an item with one upsert, without reading the ledger first.
+        """
+        if not size:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO drive_storage_quota (user_id, used_size)
+                SELECT creator_id, GREATEST(%(size)s, 0) FROM drive_item
+                WHERE id = %(root_id)s AND creator_id IS NOT NULL
+                ON CONFLICT (user_id) DO UPDATE SET
+                    used_size = GREATEST(drive_storage_quota.used_size + %(size)s, 0)
+                """,
+                {"root_id": item.root_id, "size": size},
+            )
+
+
+class StorageQuota(models.Model):
+    """
+    Storage used by the files of the workspaces of a user, i.e. of the trees which
+    root they created, and the maximum size allowed. Files are counted from the end
+    of their upload until they are hard deleted.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="storage_quota",
+    )
+    used_size = models.PositiveBigIntegerField(default=0)
+    max_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text=_("Defaults to the STORAGE_QUOTA_DEFAULT_MAX_SIZE setting if empty."),
+    )
+
+    objects = StorageQuotaManager()
+
+    class Meta:
+        db_table = "drive_storage_quota"
+        verbose_name = _("Storage quota")
+        verbose_name_plural = _("Storage quotas")
+
+    def __str__(self):
+        return f"{self.used_size:d} bytes used by {self.user!s}"
@@ -4,14 +4,118 @@ Tasks related to items.
 
 import logging
 
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
 from django.core.files.storage import default_storage
+from django.db import transaction
 
-from core.models import Item, ItemTypeChoices, ItemUploadStateChoices
+from core.models import (
+    Item,
+    ItemContent,
+    ItemSubtreePropagation,
+    ItemTypeChoices,
+    ItemUploadStateChoices,
+    LinkTrace,
+    get_trashbin_cutoff,
+)
 
 from drive.celery_app import app
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of keys accepted by a S3 DeleteObjects request
+S3_DELETE_OBJECTS_MAX_KEYS = 1000
+# Postgres rejects tsvectors larger than 1MB, index the beginning of longer texts
+ITEM_CONTENT_MAX_LENGTH = 500_000
+
+
+def has_stored_file(item):
+    """Return True if the item is a file uploaded to the object storage."""
+    return (
+        item.type == ItemTypeChoices.FILE
+        and item.upload_state == ItemUploadStateChoices.UPLOADED
+        and bool(item.filename)
+    )
+
+
+def delete_storage_objects(keys):
+    """
+    Delete objects from the storage with one multi-object delete request per batch
+    of at most S3_DELETE_OBJECTS_MAX_KEYS keys. Deleting a missing object is not an
+    error. Return the set of keys that could not be deleted.
+    """
+    client = default_storage.connection.meta.client
+    failed_keys = set()
+    for start in range(0, len(keys), S3_DELETE_OBJECTS_MAX_KEYS):
+        response = client.delete_objects(
+            Bucket=default_storage.bucket_name,
+            Delete={
+                "Objects": [
+                    {"Key": key}
+                    for key in keys[start : start + S3_DELETE_OBJECTS_MAX_KEYS]
+                ],
+                "Quiet": True,
+            },
+        )
+        for error in response.get("Errors", []):
+            logger.error(
+                "Failed to delete file %s: %s", error["Key"], error.get("Message")
+            )
+            failed_keys.add(error["Key"])
+    return failed_keys
+
+
+def purge_descendants(item):
+    """
+    Delete the descendants of an item and their files by batches, in reverse path
+    order so that a descendant is processed before its ancestors: the ancestors of a
+    descendant whose file could not be deleted are kept with it.
+    Return the number of descendants deleted and of descendants kept.
+    """
+    batch_size = settings.ITEM_DELETION_BATCH_SIZE
+    descendants = (
+        item.descendants()
+        .only("id", "path", "type", "upload_state", "filename")
+        .order_by("-path")
+    )
+    nb_deleted = nb_failed = 0
+    last_path = None
+    kept_paths = set()
+
+    while True:
+        batch_queryset = descendants
+        if last_path is not None:
+            batch_queryset = batch_queryset.filter(path__lt=last_path)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            break
+        last_path = batch[-1].path
+
+        failed_keys = delete_storage_objects(
+            [descendant.file_key for descendant in batch if has_stored_file(descendant)]
+        )
+        deleted_ids = []
+        for descendant in batch:
+            path = descendant.path
+            if str(path) in kept_paths or (
+                has_stored_file(descendant) and descendant.file_key in failed_keys
+            ):
+                kept_paths.update(str(path[:depth]) for depth in range(1, len(path)))
+            else:
+                deleted_ids.append(descendant.id)
+        Item.objects.filter(id__in=deleted_ids).delete()
+
+        nb_deleted += len(deleted_ids)
+        nb_failed += len(batch) - len(deleted_ids)
+        logger.info(
+            "Item %s deletion progress: %d descendant(s) deleted, %d failed",
+            item.id,
+            nb_deleted,
+            nb_failed,
+        )
+
+    return nb_deleted, nb_failed
+
 
 @app.task
 def process_item_deletion(item_id):
@@ -19,7 +123,12 @@ def process_item_deletion(item_id):
     Process the deletion of an item.
     Definitely delete it in the database.
     Delete the files from the storage.
-    trigger the deletion process of the children.
+
+    The subtree of a folder is walked by batches of descendants in reverse path
+    order: the files of each batch are deleted from the storage with multi-object
+    delete requests, then the rows of the batch are deleted at once. Rows whose file
+    could not be deleted are kept, along with their ancestors and the item, so that
+    the task can be run again.
     """
     logger.info("Processing item deletion for %s", item_id)
     try:
@@ -32,15 +141,165 @@ def process_item_deletion(item_id):
         logger.error("To process an item deletion, it must be hard deleted first.")
         return
 
-    if (
-        item.type == ItemTypeChoices.FILE
-        and item.upload_state == ItemUploadStateChoices.UPLOADED
-    ):
-        logger.info("Deleting file %s", item.file_key)
-        default_storage.delete(item.file_key)
-
     if item.type == ItemTypeChoices.FOLDER:
-        for child in item.children():
-            process_item_deletion.delay(child.id)
+        _nb_deleted, nb_failed = purge_descendants(item)
+        if nb_failed:
+            logger.error(
+                "Item %s kept, %d descendant(s) could not be deleted",
+                item_id,
+                nb_failed,
+            )
+            return
+
+    if has_stored_file(item):
+        logger.info("Deleting file %s", item.file_key)
+        if delete_storage_objects([item.file_key]):
+            return
 
     item.delete()
+
+
+@app.task
+def propagate_subtree_deletion(item_id):
+    """
+    Propagate the soft deletion or restoration of an item to its descendants.
+    Each run processes one batch of descendants and saves its checkpoint in the same
+    transaction, then enqueues the next run until all descendants are processed.
+    """
+    with transaction.atomic():
+        try:
+            propagation = ItemSubtreePropagation.objects.select_for_update().get(
+                item_id=item_id
+            )
+        except ItemSubtreePropagation.DoesNotExist:
+            logger.info("No subtree propagation pending for item %s", item_id)
+            return
+
+        has_remaining = propagation.propagate_batch(
+            settings.ITEM_SUBTREE_PROPAGATION_BATCH_SIZE
+        )
+
+    if has_remaining:
+        propagate_subtree_deletion.delay(item_id)
+    else:
+        logger.info("Subtree propagation completed for item %s", item_id)
+
+
+@app.task
+def purge_expired_trashbin_items():
+    """
+    Hard delete and purge the soft deleted items that stayed in the trashbin longer
+    than TRASHBIN_CUTOFF_DAYS, oldest first.
+
+    This task is scheduled periodically. Each run purges at most
+    TRASHBIN_PURGE_BATCH_SIZE items, one after the other, so that the purge rate is
+    bounded by the batch size and the schedule interval.
+    """
+    expired_ids = list(
+        Item.objects.filter(
+            deleted_at__lt=get_trashbin_cutoff(), hard_deleted_at__isnull=True
+        )
+        .order_by("deleted_at")
+        .values_list("id", flat=True)[: settings.TRASHBIN_PURGE_BATCH_SIZE]
+    )
+
+    metrics = {"expired": len(expired_ids), "purged": 0, "failed": 0}
+    for item_id in expired_ids:
+        try:
+            item = Item.objects.get(id=item_id, hard_deleted_at__isnull=True)
+        except Item.DoesNotExist:
+            # Purged meanwhile along with an expired ancestor
+            continue
+
+        item.hard_delete()
+        process_item_deletion(item_id)
+
+        if Item.objects.filter(id=item_id).exists():
+            metrics["failed"] += 1
+        else:
+            metrics["purged"] += 1
+
+    logger.info(
+        "Trashbin purge: %(expired)d expired item(s), %(purged)d purged, "
+        "%(failed)d failed",
+        metrics,
+    )
+    return metrics
+
+
+@app.task
+def merge_item_child_count_deltas():
+    """
+    Merge the children counter deltas recorded while the rows of busy folders were
+    locked. This task is scheduled periodically.
+    """
+    merged = Item.objects.merge_child_count_deltas()
+    logger.info("Merged children counter deltas of %d item(s)", merged)
+    return merged
+
+
+@app.task
+def merge_item_rollup_deltas():
+    """
+    Merge the rollup deltas recorded while the rows of busy ancestors were locked.
+    This task is scheduled periodically.
+    """
+    merged = Item.objects.merge_rollup_deltas()
+    logger.info("Merged rollup deltas of %d item(s)", merged)
+    return merged
+
+
+@app.task
+def flush_link_traces():
+    """
+    Write the link traces buffered in cache by item retrievals. This task is scheduled
+    periodically.
+    """
+    flushed = LinkTrace.objects.flush_buffer()
+    logger.info("Flushed %d link trace(s)", flushed)
+    return flushed
+
+
+@app.task
+def extract_item_content(item_id):
+    """
+    Extract the text of the file of an item after its upload and index it for the
+    full-text search. The extraction relies on the file processing of the RAG
+    service, which dependencies are optional: the task is skipped without them.
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        from rag.rag.file_processing import process_file
+    except ImportError:
+        logger.info(
+            "File processing unavailable, item %s content not extracted", item_id
+        )
+        return
+
+    try:
+        item = Item.objects.get(
+            id=item_id,
+            type=ItemTypeChoices.FILE,
+            upload_state=ItemUploadStateChoices.UPLOADED,
+        )
+    except Item.DoesNotExist:
+        logger.error("Uploaded file %s does not exist", item_id)
+        return
+
+    if item.size and item.size > settings.ITEM_CONTENT_EXTRACTION_MAX_SIZE:
+        logger.info("Item %s is too large to extract its content", item_id)
+        return
+
+    with default_storage.open(item.file_key) as file:
+        text, _metadata = process_file(file.read(), item.filename)
+
+    if not text:
+        return
+
+    # The search vector is computed by the database from the text stored
+    ItemContent.objects.update_or_create(
+        item=item, defaults={"text": text[:ITEM_CONTENT_MAX_LENGTH]}
+    )
+    ItemContent.objects.filter(item=item).update(
+        search_vector=SearchVector("text", config=settings.ITEM_CONTENT_SEARCH_CONFIG)
+    )
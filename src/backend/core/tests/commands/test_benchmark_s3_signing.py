@@ -0,0 +1,37 @@
+"""Test benchmark_s3_signing management command."""
+
+from io import StringIO
+
+from django.core.management import call_command
+
+from freezegun import freeze_time
+
+from core.api.utils import generate_s3_authorization_headers
+from core.management.commands.benchmark_s3_signing import (
+    generate_botocore_authorization_headers,
+)
+
+
+def test_benchmark_s3_signing():
+    """The command should report the per call cost of both signers."""
+    output = StringIO()
+
+    call_command("benchmark_s3_signing", iterations=10, stdout=output)
+
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith("botocore: ")
+    assert lines[1].startswith("cached: ")
+    assert lines[2].startswith("speedup: ")
+
+
+@freeze_time("2025-01-01 10:00:00")
+def test_benchmark_s3_signing_same_headers():
+    """The cached signer should produce the same headers as botocore."""
+    for key in [
+        "item/abc/file.txt",
+        "item/abc/my file (1) é~+&=.pdf",
+        "item/abc/already%20encoded?.png",
+    ]:
+        assert generate_s3_authorization_headers(
+            key
+        ) == generate_botocore_authorization_headers(key)
@@ -0,0 +1,40 @@
+"""Test check_item_access_subtrees management command."""
+
+from django.core.management import CommandError, call_command
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_check_item_access_subtrees_in_sync():
+    """The command should succeed when all subtrees mirror their accesses."""
+    factories.UserItemAccessFactory.create_batch(2)
+    factories.TeamItemAccessFactory()
+
+    call_command("check_item_access_subtrees")
+
+
+def test_check_item_access_subtrees_out_of_sync():
+    """The command should fail on missing or stale subtrees unless asked to fix them."""
+    missing_access, stale_access, access = factories.UserItemAccessFactory.create_batch(
+        3, role="reader"
+    )
+    models.ItemAccessSubtree.objects.filter(access=missing_access).delete()
+    models.ItemAccessSubtree.objects.filter(access=stale_access).update(
+        roles=["owner"], path=str(access.item.path)
+    )
+
+    with pytest.raises(CommandError, match="2 item access subtree"):
+        call_command("check_item_access_subtrees")
+
+    call_command("check_item_access_subtrees", "--fix")
+
+    for fixed_access in [missing_access, stale_access]:
+        subtree = models.ItemAccessSubtree.objects.get(access=fixed_access)
+        assert subtree.roles == ["reader"]
+        assert str(subtree.path) == str(fixed_access.item.path)
+
+    call_command("check_item_access_subtrees")
@@ -0,0 +1,51 @@
+"""Test recompute_item_rollups management command."""
+
+from django.core.management import call_command
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_recompute_item_rollups():
+    """
+    Drifting rollups should be recomputed from the uploaded files of the tree and the
+    pending deltas dropped.
+    """
+    root = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    folder = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory(
+        parent=folder,
+        type=models.ItemTypeChoices.FILE,
+        filename="file.txt",
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+        size=10,
+    )
+    factories.ItemFactory(
+        parent=root,
+        type=models.ItemTypeChoices.FILE,
+        filename="pending.txt",
+        size=5,
+    )
+    deleted = factories.ItemFactory(
+        parent=root,
+        type=models.ItemTypeChoices.FILE,
+        filename="deleted.txt",
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+        size=20,
+    )
+    deleted.soft_delete()
+    models.Item.objects.filter(pk=folder.pk).update(total_size=3, total_files=7)
+    models.ItemRollupDelta.objects.create(item=root, total_size=4, total_files=1)
+
+    call_command("recompute_item_rollups")
+
+    root.refresh_from_db()
+    assert (root.total_size, root.total_files) == (10, 1)
+    folder.refresh_from_db()
+    assert (folder.total_size, folder.total_files) == (10, 1)
+    deleted.refresh_from_db()
+    assert (deleted.total_size, deleted.total_files) == (20, 1)
+    assert not models.ItemRollupDelta.objects.exists()
@@ -0,0 +1,41 @@
+"""Test reconcile_item_child_counts management command."""
+
+from django.core.management import CommandError, call_command
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reconcile_item_child_counts_in_sync():
+    """Counters matching the tree, pending deltas included, should be reported so."""
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FILE)
+    models.Item.objects.filter(pk=parent.pk).update(numchild=1)
+    models.ItemChildCountDelta.objects.create(item=parent, numchild=1)
+
+    call_command("reconcile_item_child_counts")
+
+
+def test_reconcile_item_child_counts_drift():
+    """Drifting counters should be reported and recomputed with --fix."""
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FILE)
+    factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FILE).soft_delete()
+    models.Item.objects.filter(pk=parent.pk).update(numchild=7, numchild_folder=0)
+    models.ItemChildCountDelta.objects.create(item=parent, numchild=1)
+
+    with pytest.raises(CommandError, match="1 item"):
+        call_command("reconcile_item_child_counts")
+
+    call_command("reconcile_item_child_counts", "--fix")
+
+    parent.refresh_from_db()
+    assert parent.numchild == 2
+    assert parent.numchild_folder == 1
+    assert not models.ItemChildCountDelta.objects.exists()
+    call_command("reconcile_item_child_counts")
@@ -0,0 +1,22 @@
+"""Test resume_subtree_propagations management command."""
+
+from django.core.management import call_command
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_resume_subtree_propagations():
+    """The command should complete the propagations left pending."""
+    root = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    child = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FILE)
+    root.soft_delete(asynchronous=True)
+
+    call_command("resume_subtree_propagations")
+
+    assert not models.ItemSubtreePropagation.objects.exists()
+    child.refresh_from_db()
+    assert child.ancestors_deleted_at == root.deleted_at
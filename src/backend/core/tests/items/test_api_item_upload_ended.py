@@ -102,7 +102,10 @@ def test_api_item_upload_ended_success():
     client = APIClient()
     client.force_login(user)
 
-    item = factories.ItemFactory(type=ItemTypeChoices.FILE, filename="my_file.txt")
+    parent = factories.ItemFactory(type=ItemTypeChoices.FOLDER)
+    item = factories.ItemFactory(
+        parent=parent, type=ItemTypeChoices.FILE, filename="my_file.txt"
+    )
     factories.UserItemAccessFactory(item=item, user=user, role="owner")
 
     default_storage.save(
@@ -118,5 +121,9 @@ def test_api_item_upload_ended_success():
     assert item.upload_state == ItemUploadStateChoices.UPLOADED
     assert item.mimetype == "text/plain"
     assert item.size == 8
+    assert (item.total_size, item.total_files) == (8, 1)
+
+    parent.refresh_from_db()
+    assert (parent.total_size, parent.total_files) == (8, 1)
 
     assert response.json()["mimetype"] == "text/plain"
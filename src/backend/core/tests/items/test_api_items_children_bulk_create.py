@@ -0,0 +1,270 @@
+"""
+Tests for items API endpoint in drive's core app: bulk creation of children
+"""
+
+import base64
+import json
+from uuid import uuid4
+
+from django.test import override_settings
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories
+from core.models import Item, ItemTypeChoices
+
+pytestmark = pytest.mark.django_db
+
+
+def test_api_items_children_bulk_create_anonymous():
+    """Anonymous users should not be allowed to create children in bulk."""
+    item = factories.ItemFactory(
+        link_reach="public", link_role="editor", type=ItemTypeChoices.FOLDER
+    )
+
+    response = APIClient().post(
+        f"/api/v1.0/items/{item.id!s}/children/bulk/",
+        [{"type": ItemTypeChoices.FOLDER, "title": "folder"}],
+        format="json",
+    )
+
+    assert response.status_code == 401
+    assert not Item.objects.filter(title="folder").exists()
+
+
+def test_api_items_children_bulk_create_reader():
+    """Readers of an item should not be allowed to create children in bulk."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="reader", item__type=ItemTypeChoices.FOLDER
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        [{"type": ItemTypeChoices.FOLDER, "title": "folder"}],
+        format="json",
+    )
+
+    assert response.status_code == 403
+    assert not Item.objects.filter(title="folder").exists()
+
+
+def test_api_items_children_bulk_create_success(django_assert_max_num_queries):
+    """
+    Editors should be able to create many children at once, with an upload policy
+    for each file and a single update of the counters of the parent.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    forced_id = uuid4()
+    payload = [
+        {"type": ItemTypeChoices.FILE, "filename": f"file{index:d}.txt"}
+        for index in range(20)
+    ]
+    payload.append({"type": ItemTypeChoices.FOLDER, "title": "folder"})
+    payload.append(
+        {"type": ItemTypeChoices.FOLDER, "title": "forced", "id": str(forced_id)}
+    )
+
+    with django_assert_max_num_queries(14):
+        response = client.post(
+            f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+            payload,
+            format="json",
+        )
+
+    assert response.status_code == 201
+    results = response.json()
+    assert len(results) == 22
+    assert [result["title"] for result in results] == [
+        data.get("title") or data["filename"] for data in payload
+    ]
+    assert results[-1]["id"] == str(forced_id)
+    for result in results[:20]:
+        assert result["upload_state"] == "pending"
+        assert result["policy"]["fields"]["key"] == (
+            f"item/{result['id']:s}/{result['filename']:s}"
+        )
+    assert results[20]["policy"] is None
+
+    children = access.item.children()
+    assert children.count() == 22
+    assert all(child.creator == user for child in children)
+    access.item.refresh_from_db()
+    assert access.item.numchild == 22
+    assert access.item.numchild_folder == 2
+
+
+def test_api_items_children_bulk_create_errors():
+    """
+    Invalid items or items which title is already used should be reported without
+    preventing the creation of the valid ones.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    factories.ItemFactory(
+        parent=access.item, title="existing", type=ItemTypeChoices.FOLDER
+    )
+    existing_id = factories.ItemFactory().id
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        [
+            {"type": ItemTypeChoices.FOLDER, "title": "existing"},
+            {"type": ItemTypeChoices.FOLDER, "title": "new"},
+            {"type": ItemTypeChoices.FILE},
+            {"type": ItemTypeChoices.FOLDER, "title": "new"},
+            {"type": ItemTypeChoices.FOLDER, "title": "other", "id": str(existing_id)},
+        ],
+        format="json",
+    )
+
+    assert response.status_code == 201
+    results = response.json()
+    assert results[0] == {"errors": {"title": ["title already exists in this folder."]}}
+    assert results[1]["title"] == "new"
+    assert results[2] == {"errors": {"filename": ["This field is required for files."]}}
+    assert results[3] == {"errors": {"title": ["title already exists in this folder."]}}
+    assert results[4] == {
+        "errors": {
+            "id": ["An item with this ID already exists. You cannot override it."]
+        }
+    }
+    access.item.refresh_from_db()
+    assert access.item.numchild == 2
+
+
+def test_api_items_children_bulk_create_all_invalid():
+    """Nothing should be created and a 400 returned if all items are invalid."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        [{"type": ItemTypeChoices.FOLDER}],
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json() == [
+        {"errors": {"title": ["This field is required for folders."]}}
+    ]
+    assert not access.item.children().exists()
+
+
+def test_api_items_children_bulk_create_too_many_items(settings):
+    """The number of items created at once should be limited."""
+    settings.ITEM_BULK_CREATE_MAX_SIZE = 2
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        [
+            {"type": ItemTypeChoices.FOLDER, "title": f"folder{index:d}"}
+            for index in range(3)
+        ],
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "errors": [
+            {
+                "attr": "detail",
+                "code": "item_bulk_create_too_many_items",
+                "detail": "Too many items, at most 2 can be created at once.",
+            }
+        ],
+        "type": "validation_error",
+    }
+    assert not access.item.children().exists()
+
+
+def test_api_items_children_bulk_create_in_file():
+    """Children can not be created in a file."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FILE
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        [{"type": ItemTypeChoices.FOLDER, "title": "folder"}],
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == "item_create_child_type_folder_only"
+
+
+def get_policy_max_size(result):
+    """Return the maximum size of the file allowed by the upload policy of a result."""
+    policy = json.loads(base64.b64decode(result["policy"]["fields"]["policy"]))
+    return next(
+        condition[2]
+        for condition in policy["conditions"]
+        if isinstance(condition, list) and condition[0] == "content-length-range"
+    )
+
+
+@override_settings(STORAGE_QUOTA_DEFAULT_MAX_SIZE=100)
+def test_api_items_children_bulk_create_storage_quota():
+    """
+    The storage quota left in the workspace should be split between the upload
+    policies of the files of a batch, while a file created alone is allowed all of it.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user,
+        role="editor",
+        item__creator=user,
+        item__type=ItemTypeChoices.FOLDER,
+    )
+    payload = [
+        {"type": ItemTypeChoices.FILE, "filename": f"file{index:d}.txt"}
+        for index in range(3)
+    ]
+    payload.append({"type": ItemTypeChoices.FOLDER, "title": "folder"})
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        payload,
+        format="json",
+    )
+
+    assert response.status_code == 201
+    results = response.json()
+    assert [get_policy_max_size(result) for result in results[:3]] == [33, 33, 33]
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/bulk/",
+        [{"type": ItemTypeChoices.FILE, "filename": "alone.txt"}],
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert get_policy_max_size(response.json()[0]) == 100
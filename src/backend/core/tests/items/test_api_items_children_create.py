@@ -2,11 +2,14 @@
 Tests for items API endpoint in drive's core app: create
 """
 
+import base64
+import json
 from concurrent.futures import ThreadPoolExecutor
 from random import choice, randint
 from uuid import uuid4
 
 from django.conf import settings
+from django.test import override_settings
 
 import pytest
 from rest_framework.test import APIClient
@@ -436,5 +439,45 @@ def test_api_items_create_item_children_race_condition():
         assert response1.status_code == 201
         assert response2.status_code == 201
 
+        # A creation which found the parent row locked records a delta instead
+        Item.objects.merge_child_count_deltas()
         item.refresh_from_db()
         assert item.numchild == 2
+
+
+@override_settings(STORAGE_QUOTA_DEFAULT_MAX_SIZE=100)
+def test_api_items_children_create_file_storage_quota():
+    """
+    The upload policy of a file should limit its size to the storage quota left in
+    the workspace, and files can not be created once it is used up.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user,
+        role="editor",
+        item__creator=user,
+        item__type=ItemTypeChoices.FOLDER,
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/",
+        {"type": ItemTypeChoices.FILE, "filename": "file.txt"},
+    )
+
+    assert response.status_code == 201
+    policy = json.loads(base64.b64decode(response.json()["policy"]["fields"]["policy"]))
+    assert ["content-length-range", 0, 100] in policy["conditions"]
+
+    Item.objects.get(id=response.json()["id"]).mark_uploaded("text/plain", 100)
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/",
+        {"type": ItemTypeChoices.FILE, "filename": "other.txt"},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == (
+        "item_create_storage_quota_exceeded"
+    )
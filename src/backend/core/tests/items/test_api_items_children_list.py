@@ -5,6 +5,8 @@ Tests for items API endpoint in drive's core app: retrieve
 import random
 
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import pytest
 from rest_framework.test import APIClient
@@ -58,6 +60,8 @@ def test_api_items_children_list_anonymous_public_standalone():
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -90,6 +94,8 @@ def test_api_items_children_list_anonymous_public_standalone():
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -159,6 +165,8 @@ def test_api_items_children_list_anonymous_public_parent():
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -189,6 +197,8 @@ def test_api_items_children_list_anonymous_public_parent():
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -273,6 +283,8 @@ def test_api_items_children_list_authenticated_unrelated_public_or_authenticated
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -305,6 +317,8 @@ def test_api_items_children_list_authenticated_unrelated_public_or_authenticated
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -374,6 +388,8 @@ def test_api_items_children_list_authenticated_public_or_authenticated_parent(
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -406,6 +422,8 @@ def test_api_items_children_list_authenticated_public_or_authenticated_parent(
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -500,6 +518,8 @@ def test_api_items_children_list_authenticated_related_direct():
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -532,6 +552,8 @@ def test_api_items_children_list_authenticated_related_direct():
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -602,6 +624,8 @@ def test_api_items_children_list_authenticated_related_parent():
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -634,6 +658,8 @@ def test_api_items_children_list_authenticated_related_parent():
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -767,6 +793,8 @@ def test_api_items_children_list_authenticated_related_team_members(
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -799,6 +827,8 @@ def test_api_items_children_list_authenticated_related_team_members(
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -865,6 +895,8 @@ def test_api_items_children_list_filter_type():
                 "main_workspace": False,
                 "filename": child1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -910,6 +942,8 @@ def test_api_items_children_list_filter_type():
                 "main_workspace": False,
                 "filename": child2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -952,3 +986,41 @@ def test_api_items_children_list_filter_wrong_type():
         ],
         "type": "validation_error",
     }
+
+
+def test_api_items_children_list_constant_number_of_queries():
+    """
+    Computing the abilities of the children should not cost one query per child
+    to fetch the links of their ancestors.
+    """
+    user = factories.UserFactory()
+
+    client = APIClient()
+    client.force_login(user)
+
+    grand_parent = factories.ItemFactory(
+        link_reach="authenticated", type=models.ItemTypeChoices.FOLDER
+    )
+    parent = factories.ItemFactory(
+        parent=grand_parent, type=models.ItemTypeChoices.FOLDER
+    )
+    factories.UserItemAccessFactory(item=parent, user=user)
+    factories.ItemFactory.create_batch(2, parent=parent)
+
+    url = f"/api/v1.0/items/{parent.id!s}/children/"
+    # Warm the nb_accesses cache
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    nb_queries = len(context.captured_queries)
+
+    factories.ItemFactory.create_batch(8, parent=parent)
+
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["count"] == 10
+    assert len(context.captured_queries) == nb_queries
@@ -0,0 +1,327 @@
+"""
+Tests for items API endpoint in drive's core app: creation of a tree of children
+"""
+
+from uuid import uuid4
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories
+from core.models import Item, ItemTypeChoices
+
+pytestmark = pytest.mark.django_db
+
+
+def get_manifest():
+    """
+    Build the manifest of a directory holding a file and a sub-directory, itself
+    holding a file.
+    """
+    return [
+        {
+            "id": str(uuid4()),
+            "type": ItemTypeChoices.FOLDER,
+            "title": "directory",
+            "children": [
+                {
+                    "id": str(uuid4()),
+                    "type": ItemTypeChoices.FILE,
+                    "filename": "file1.txt",
+                },
+                {
+                    "id": str(uuid4()),
+                    "type": ItemTypeChoices.FOLDER,
+                    "title": "sub-directory",
+                    "children": [
+                        {
+                            "id": str(uuid4()),
+                            "type": ItemTypeChoices.FILE,
+                            "filename": "file2.txt",
+                        }
+                    ],
+                },
+            ],
+        },
+        {"id": str(uuid4()), "type": ItemTypeChoices.FILE, "filename": "file3.txt"},
+    ]
+
+
+def test_api_items_children_manifest_anonymous():
+    """Anonymous users should not be allowed to create a tree of children."""
+    item = factories.ItemFactory(
+        link_reach="public", link_role="editor", type=ItemTypeChoices.FOLDER
+    )
+
+    response = APIClient().post(
+        f"/api/v1.0/items/{item.id!s}/children/manifest/",
+        get_manifest(),
+        format="json",
+    )
+
+    assert response.status_code == 401
+    assert not item.descendants().exists()
+
+
+def test_api_items_children_manifest_success(django_assert_max_num_queries):
+    """
+    Editors should be able to create a whole tree of children at once, with paths and
+    counters computed server side and an upload policy for each file.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    parent = access.item
+    manifest = get_manifest()
+    directory, file3 = manifest
+    file1, sub_directory = directory["children"]
+    file2 = sub_directory["children"][0]
+
+    with django_assert_max_num_queries(14):
+        response = client.post(
+            f"/api/v1.0/items/{parent.id!s}/children/manifest/",
+            manifest,
+            format="json",
+        )
+
+    assert response.status_code == 201
+    results = response.json()
+    assert [result["id"] for result in results] == [
+        directory["id"],
+        file1["id"],
+        sub_directory["id"],
+        file2["id"],
+        file3["id"],
+    ]
+    for result in results:
+        if result["type"] == ItemTypeChoices.FILE:
+            assert result["policy"]["fields"]["key"] == (
+                f"item/{result['id']:s}/{result['filename']:s}"
+            )
+        else:
+            assert result["policy"] is None
+
+    assert str(Item.objects.get(id=file2["id"]).path) == (
+        f"{parent.path!s}.{directory['id']:s}.{sub_directory['id']:s}.{file2['id']:s}"
+    )
+    assert parent.descendants().filter(creator=user).count() == 5
+
+    parent.refresh_from_db()
+    assert (parent.numchild, parent.numchild_folder) == (2, 1)
+    directory_item = Item.objects.get(id=directory["id"])
+    assert (directory_item.numchild, directory_item.numchild_folder) == (2, 1)
+    sub_directory_item = Item.objects.get(id=sub_directory["id"])
+    assert (sub_directory_item.numchild, sub_directory_item.numchild_folder) == (1, 0)
+
+
+def test_api_items_children_manifest_invalid():
+    """An invalid item anywhere in the tree should prevent creating any item."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    manifest = get_manifest()
+    del manifest[0]["children"][1]["children"][0]["filename"]
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == (
+        "item_create_file_filename_required"
+    )
+    assert not access.item.descendants().exists()
+
+
+def test_api_items_children_manifest_file_with_children():
+    """Files of the manifest can not have children."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    manifest = get_manifest()
+    manifest[1]["children"] = [
+        {"id": str(uuid4()), "type": ItemTypeChoices.FOLDER, "title": "folder"}
+    ]
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == (
+        "item_create_child_type_folder_only"
+    )
+    assert not access.item.descendants().exists()
+
+
+def test_api_items_children_manifest_folder_with_filename():
+    """Folders of the manifest can not have a filename."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    manifest = get_manifest()
+    manifest[0]["children"][1]["filename"] = "sub-directory.txt"
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == (
+        "item_create_folder_filename_forbidden"
+    )
+    assert not access.item.descendants().exists()
+
+
+def test_api_items_children_manifest_duplicate_titles():
+    """Siblings of the manifest can not share a title."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    manifest = get_manifest()
+    manifest[0]["children"][1]["title"] = "file1.txt"
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == (
+        "item_create_child_title_already_exists"
+    )
+    assert not access.item.descendants().exists()
+
+
+def test_api_items_children_manifest_title_already_existing():
+    """Items at the top of the manifest can not reuse the title of a child."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    factories.ItemFactory(
+        parent=access.item, title="directory", type=ItemTypeChoices.FOLDER
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        get_manifest(),
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == (
+        "item_create_child_title_already_exists"
+    )
+    assert access.item.descendants().count() == 1
+
+
+def test_api_items_children_manifest_existing_id():
+    """Ids of the manifest should not be used by other items."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    manifest = get_manifest()
+    manifest[0]["children"][0]["id"] = str(factories.ItemFactory().id)
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == "item_create_existing_id"
+    assert not access.item.descendants().exists()
+
+
+def test_api_items_children_manifest_too_many_items(settings):
+    """The number of items of a manifest should be limited, at all levels."""
+    settings.ITEM_BULK_CREATE_MAX_SIZE = 4
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        get_manifest(),
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == "item_bulk_create_too_many_items"
+    assert not access.item.descendants().exists()
+
+
+def test_api_items_children_manifest_too_deep(settings):
+    """
+    Manifests nesting items deeper than the maximum depth should be rejected before
+    being validated level by level.
+    """
+    settings.ITEM_MAX_DEPTH = 4
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    access = factories.UserItemAccessFactory(
+        user=user, role="editor", item__type=ItemTypeChoices.FOLDER
+    )
+    manifest = get_manifest()
+    manifest[0]["children"][1]["children"] = [
+        {
+            "id": str(uuid4()),
+            "type": ItemTypeChoices.FOLDER,
+            "title": "sub-sub-directory",
+            "children": [
+                {"id": str(uuid4()), "type": ItemTypeChoices.FOLDER, "title": "deep"}
+            ],
+        }
+    ]
+
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == "item_create_max_depth_exceeded"
+    assert not access.item.descendants().exists()
+
+    manifest[0]["children"][1]["children"][0]["children"] = []
+    response = client.post(
+        f"/api/v1.0/items/{access.item.id!s}/children/manifest/",
+        manifest,
+        format="json",
+    )
+
+    assert response.status_code == 201
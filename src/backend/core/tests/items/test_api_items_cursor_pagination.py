@@ -0,0 +1,192 @@
+"""
+Tests for the keyset (cursor) pagination of items in the API.
+"""
+
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import pytest
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def fetch_all_pages(client, url):
+    """Follow the "next" links of a cursor paginated endpoint and return all ids."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        content = response.json()
+        assert set(content) == {"next", "results"}
+        ids.extend(result["id"] for result in content["results"])
+        url = content["next"]
+    return ids
+
+
+@mock.patch.object(PageNumberPagination, "get_page_size", return_value=2)
+def test_api_items_cursor_pagination_children(_mock_page_size):
+    """Children should be paginated with a cursor following the default ordering."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    children = factories.ItemFactory.create_batch(
+        5, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+
+    ids = fetch_all_pages(client, f"/api/v1.0/items/{parent.id!s}/children/?cursor=")
+
+    expected = sorted(children, key=lambda item: (item.created_at, item.id))
+    assert ids == [str(item.id) for item in expected]
+
+
+@pytest.mark.parametrize("ordering", ["type", "-type"])
+@mock.patch.object(PageNumberPagination, "get_page_size", return_value=2)
+def test_api_items_cursor_pagination_children_ties(_mock_page_size, ordering):
+    """Items sharing the same ordering value should be tie-broken on their id."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    children = factories.ItemFactory.create_batch(
+        5, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+
+    ids = fetch_all_pages(
+        client,
+        f"/api/v1.0/items/{parent.id!s}/children/?cursor=&ordering={ordering:s}",
+    )
+
+    expected = sorted(str(item.id) for item in children)
+    if ordering.startswith("-"):
+        expected.reverse()
+    assert ids == expected
+
+
+@pytest.mark.parametrize("ordering", ["title", "-title"])
+@mock.patch.object(PageNumberPagination, "get_page_size", return_value=2)
+def test_api_items_cursor_pagination_list_title_ties(_mock_page_size, ordering):
+    """
+    Items sharing the same title should be tie-broken on their id. Only items which
+    are not siblings can share a title.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    items = factories.ItemFactory.create_batch(
+        5, users=[user], title="same title", type=models.ItemTypeChoices.FOLDER
+    )
+
+    ids = fetch_all_pages(
+        client,
+        f"/api/v1.0/items/?cursor=&title=same&ordering={ordering:s}",
+    )
+
+    expected = sorted(str(item.id) for item in items)
+    if ordering.startswith("-"):
+        expected.reverse()
+    assert ids == expected
+
+
+@mock.patch.object(PageNumberPagination, "get_page_size", return_value=2)
+def test_api_items_cursor_pagination_list(_mock_page_size):
+    """The list of items should be paginated with a cursor on the updated date."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    items = factories.ItemFactory.create_batch(5, users=[user])
+    now = timezone.now()
+    for index, item in enumerate(items):
+        models.Item.objects.filter(pk=item.pk).update(
+            updated_at=now + timedelta(days=5 - index)
+        )
+
+    ids = fetch_all_pages(client, "/api/v1.0/items/?cursor=")
+
+    # The main workspace of the user was updated before the other items
+    assert ids == [
+        *(str(item.id) for item in items),
+        str(user.get_main_workspace().id),
+    ]
+
+
+def test_api_items_cursor_pagination_no_count():
+    """Cursor pagination should neither count the results nor scan an offset."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory.create_batch(
+        3, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f"/api/v1.0/items/{parent.id!s}/children/?cursor=")
+
+    assert response.status_code == 200
+    assert response.json()["next"] is None
+    assert len(response.json()["results"]) == 3
+    for query in context.captured_queries:
+        assert "COUNT(*)" not in query["sql"]
+        assert "OFFSET" not in query["sql"]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "invalid",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        base64.urlsafe_b64encode(
+            json.dumps({"o": "-title", "v": "a", "id": "abc"}).encode()
+        ).decode(),
+        base64.urlsafe_b64encode(
+            json.dumps({"o": "created_at", "v": "not a date", "id": "abc"}).encode()
+        ).decode(),
+    ],
+)
+def test_api_items_cursor_pagination_invalid_cursor(cursor):
+    """An invalid cursor should return a 404."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+
+    response = client.get(f"/api/v1.0/items/{parent.id!s}/children/?cursor={cursor:s}")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.parametrize(
+    "url", ["/api/v1.0/items/search/", "/api/v1.0/items/search/content/"]
+)
+def test_api_items_cursor_pagination_unsupported_ordering(url):
+    """
+    Results ranked by relevance can not be paginated with a cursor, it should be
+    refused rather than ordering them differently.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    factories.UserItemAccessFactory(user=user, item__title="annual report")
+
+    response = client.get(f"{url:s}?q=report&cursor=")
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["code"] == "cursor_ordering_unsupported"
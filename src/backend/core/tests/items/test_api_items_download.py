@@ -0,0 +1,188 @@
+"""
+Tests for items API endpoint in drive's core app: download as a zip archive
+"""
+
+import zipfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories, models
+from core.api import utils
+
+pytestmark = pytest.mark.django_db
+
+
+def create_file(content=b"my prose", **kwargs):
+    """Create an uploaded file item and store its content in the object storage."""
+    item = factories.ItemFactory(
+        type=models.ItemTypeChoices.FILE,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+        size=len(content),
+        **kwargs,
+    )
+    default_storage.connection.meta.client.put_object(
+        Bucket=default_storage.bucket_name,
+        Key=item.file_key,
+        Body=BytesIO(content),
+        ContentType="text/plain",
+    )
+    return item
+
+
+def read_archive(response):
+    """Return the entries of the zip archive streamed in a response by name."""
+    archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+    return {
+        info.filename: None if info.is_dir() else archive.read(info)
+        for info in archive.infolist()
+    }
+
+
+def test_api_items_download_folder():
+    """
+    Downloading a folder should stream a zip archive of its live subtree, skipping
+    deleted items and files not uploaded.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    folder = factories.UserItemAccessFactory(
+        user=user, item__title="folder", item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    subfolder = factories.ItemFactory(
+        parent=folder, title="subfolder", type=models.ItemTypeChoices.FOLDER
+    )
+    create_file(parent=folder, title="a.txt", content=b"a")
+    create_file(parent=subfolder, title="b.txt", content=b"b")
+    create_file(parent=folder, title="deleted.txt").soft_delete()
+    factories.ItemFactory(
+        parent=folder, title="pending.txt", type=models.ItemTypeChoices.FILE
+    )
+
+    response = client.get(f"/api/v1.0/items/download/?ids={folder.id!s}")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/zip"
+    assert response["Content-Disposition"] == 'attachment; filename="folder.zip"'
+    assert read_archive(response) == {
+        "folder/": None,
+        "folder/a.txt": b"a",
+        "folder/subfolder/": None,
+        "folder/subfolder/b.txt": b"b",
+    }
+
+
+def test_api_items_download_unsafe_titles():
+    """
+    Titles that are relative path components or contain path separators should not
+    allow entries to be extracted outside of the target directory.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    folder = factories.UserItemAccessFactory(
+        user=user, item__title="..", item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    create_file(parent=folder, title=".", content=b"dot")
+    create_file(parent=folder, title="\\etc\\passwd", content=b"backslash")
+    create_file(parent=folder, title="../secret.txt", content=b"slash")
+
+    response = client.get(f"/api/v1.0/items/download/?ids={folder.id!s}")
+
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == 'attachment; filename="_.zip"'
+    assert read_archive(response) == {
+        "_/": None,
+        "_/_": b"dot",
+        "_/_etc_passwd": b"backslash",
+        "_/.._secret.txt": b"slash",
+    }
+
+
+def test_api_items_download_selection_unreadable():
+    """
+    Downloading a selection should only include the items readable by the user and
+    number the entries which names collide.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    public = create_file(title="report.txt", link_reach="public", content=b"public")
+    accessed = create_file(
+        title="report.txt", link_reach="restricted", users=[user], content=b"mine"
+    )
+    restricted = create_file(title="secret.txt", link_reach="restricted")
+
+    response = client.get(
+        "/api/v1.0/items/download/"
+        f"?ids={public.id!s}&ids={accessed.id!s}&ids={restricted.id!s}"
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == 'attachment; filename="download.zip"'
+    entries = read_archive(response)
+    assert sorted(entries) == ["report (1).txt", "report.txt"]
+    assert sorted(entries.values()) == [b"mine", b"public"]
+
+
+def test_api_items_download_anonymous_restricted():
+    """Anonymous users should get a 404 when no selected item is readable."""
+    item = create_file(link_reach="restricted")
+
+    response = APIClient().get(f"/api/v1.0/items/download/?ids={item.id!s}")
+
+    assert response.status_code == 404
+
+
+def test_api_items_download_invalid_ids():
+    """The selection should be validated."""
+    response = APIClient().get("/api/v1.0/items/download/?ids=invalid")
+
+    assert response.status_code == 400
+
+    response = APIClient().get("/api/v1.0/items/download/")
+
+    assert response.status_code == 400
+
+
+def test_api_items_download_zip64():
+    """Files which size is unknown should be written with ZIP64 extensions."""
+    item = create_file(title="big.bin", link_reach="public")
+    item.size = None
+
+    data = b"".join(utils.stream_items_zip([item]))
+
+    archive = zipfile.ZipFile(BytesIO(data))
+    assert archive.read("big.bin") == b"my prose"
+    # The local header of the entry has a ZIP64 extra field
+    assert data[30 + len("big.bin") : 30 + len("big.bin") + 2] == b"\x01\x00"
+
+
+def test_api_items_download_aborted():
+    """The storage object should be closed when the client aborts the download."""
+    item = factories.ItemFactory(
+        type=models.ItemTypeChoices.FILE,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+        size=3,
+    )
+    body = mock.Mock()
+    body.iter_chunks.return_value = iter([b"a", b"b", b"c"])
+
+    with mock.patch.object(
+        default_storage.connection.meta.client,
+        "get_object",
+        return_value={"Body": body},
+    ):
+        stream = utils.stream_items_zip([item])
+        next(stream)
+        stream.close()
+
+    body.close.assert_called_once_with()
@@ -0,0 +1,146 @@
+"""
+Tests for the estimated count of paginated item listings in the API.
+"""
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories, models
+from core.api.pagination import EstimatedCountPaginator
+
+pytestmark = pytest.mark.django_db
+
+
+def test_api_items_estimated_count_below_threshold(settings):
+    """Counts below the threshold should be exact and not flagged."""
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 3
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory.create_batch(
+        3, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+
+    response = client.get(f"/api/v1.0/items/{parent.id!s}/children/")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 3
+    assert "is_count_estimated" not in content
+
+
+def test_api_items_estimated_count_children_numchild(settings):
+    """
+    Above the threshold, the count of unfiltered children should be the number of
+    children stored on the parent item.
+    """
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 2
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory.create_batch(
+        3, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+    models.Item.objects.filter(pk=parent.pk).update(numchild=50000)
+
+    response = client.get(f"/api/v1.0/items/{parent.id!s}/children/")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 50000
+    assert content["is_count_estimated"] is True
+    assert len(content["results"]) == 3
+
+
+def test_api_items_estimated_count_underestimated(settings):
+    """
+    Pages beyond an underestimated count should still be served, the next page being
+    known from the rows fetched.
+    """
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 2
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory.create_batch(
+        5, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+    # The number of children lags behind the tree
+    models.Item.objects.filter(pk=parent.pk).update(numchild=3)
+
+    url = f"/api/v1.0/items/{parent.id!s}/children/?page_size=2"
+    response = client.get(f"{url:s}&page=2")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 3
+    assert content["is_count_estimated"] is True
+    assert len(content["results"]) == 2
+    assert content["next"] is not None
+
+    response = client.get(f"{url:s}&page=3")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert len(content["results"]) == 1
+    assert content["next"] is None
+
+    response = client.get(f"{url:s}&page=4")
+
+    assert response.status_code == 404
+
+
+def test_api_items_estimated_count_children_filtered(settings):
+    """Filtered children should not be estimated from the number of children."""
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 2
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    parent = factories.ItemFactory(users=[user], type=models.ItemTypeChoices.FOLDER)
+    for index in range(3):
+        factories.ItemFactory(
+            parent=parent, title=f"match {index:d}", type=models.ItemTypeChoices.FOLDER
+        )
+    models.Item.objects.filter(pk=parent.pk).update(numchild=50000)
+
+    response = client.get(f"/api/v1.0/items/{parent.id!s}/children/?title=match")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] != 50000
+    assert content["count"] >= 3
+    assert content["is_count_estimated"] is True
+
+
+def test_api_items_estimated_count_list(settings):
+    """Above the threshold, the count of listed items should come from the planner."""
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 2
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    factories.ItemFactory.create_batch(4, users=[user])
+
+    response = client.get("/api/v1.0/items/")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] >= 3
+    assert content["is_count_estimated"] is True
+    assert len(content["results"]) == 5
+
+
+def test_api_items_estimated_count_paginator_not_queryset(settings):
+    """Lists that are not querysets should always be counted exactly."""
+    settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 2
+
+    paginator = EstimatedCountPaginator(list(range(5)), 2)
+
+    assert paginator.count == 5
+    assert paginator.is_count_estimated is False
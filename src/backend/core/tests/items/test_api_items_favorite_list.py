@@ -90,6 +90,8 @@ def test_api_item_favorite_list_authenticated_with_favorite():
                 "main_workspace": False,
                 "filename": item.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
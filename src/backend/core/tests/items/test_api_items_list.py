@@ -109,6 +109,8 @@ def test_api_items_list_format():
             "main_workspace": False,
             "filename": item2.filename,
             "size": None,
+            "total_size": 0,
+            "total_files": 0,
             "description": None,
             "deleted_at": None,
             "hard_delete_at": None,
@@ -139,6 +141,8 @@ def test_api_items_list_format():
             "main_workspace": False,
             "filename": item.filename,
             "size": None,
+            "total_size": 0,
+            "total_files": 0,
             "description": None,
             "deleted_at": None,
             "hard_delete_at": None,
@@ -169,6 +173,8 @@ def test_api_items_list_format():
             "main_workspace": True,
             "filename": item3.filename,
             "size": None,
+            "total_size": 0,
+            "total_files": 0,
             "description": None,
             "deleted_at": None,
             "hard_delete_at": None,
@@ -258,11 +264,11 @@ def test_api_items_list_authenticated_direct(django_assert_num_queries):
         str(user.get_main_workspace().id),
     }
 
-    with django_assert_num_queries(9):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/items/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/items/")
 
     assert response.status_code == 200
@@ -302,11 +308,11 @@ def test_api_items_list_authenticated_via_team(
         str(item.id) for item in items_team1 + items_team2 + [user.get_main_workspace()]
     }
 
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/items/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/items/")
 
     assert response.status_code == 200
@@ -339,11 +345,11 @@ def test_api_items_list_authenticated_link_reach_restricted(
     )
     models.LinkTrace.objects.create(item=other_item, user=user)
 
-    with django_assert_num_queries(6):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/items/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/items/")
 
     assert response.status_code == 200
@@ -398,11 +404,11 @@ def test_api_items_list_authenticated_link_reach_public_or_authenticated(
         str(user.get_main_workspace().id),
     }
 
-    with django_assert_num_queries(8):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/items/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/items/")
 
     assert response.status_code == 200
@@ -499,11 +505,11 @@ def test_api_items_list_favorites_no_extra_queries(django_assert_num_queries):
     )
 
     url = "/api/v1.0/items/"
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(4):
         response = client.get(url)
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get(url)
 
     assert response.status_code == 200
@@ -516,7 +522,7 @@ def test_api_items_list_favorites_no_extra_queries(django_assert_num_queries):
     for item in special_items:
         models.ItemFavorite.objects.create(item=item, user=user)
 
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get(url)
 
     assert response.status_code == 200
@@ -329,3 +329,74 @@ def test_api_items_media_auth_item_not_uploaded():
     )
 
     assert response.status_code == 403
+
+
+def test_api_items_media_auth_cached(django_assert_num_queries):
+    """
+    Repeated subrequests for the same file should be authorized from cache without
+    querying the database.
+    """
+    item = factories.ItemFactory(
+        link_reach="public",
+        type=models.ItemTypeChoices.FILE,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+    )
+    media_url = f"http://localhost/media/item/{item.pk!s}/{uuid.uuid4()!s}.jpg"
+    client = APIClient()
+
+    response = client.get("/api/v1.0/items/media-auth/", HTTP_X_ORIGINAL_URL=media_url)
+    assert response.status_code == 200
+
+    with django_assert_num_queries(0):
+        response = client.get(
+            "/api/v1.0/items/media-auth/", HTTP_X_ORIGINAL_URL=media_url
+        )
+
+    assert response.status_code == 200
+    assert "AWS4-HMAC-SHA256 Credential=" in response["Authorization"]
+
+
+def test_api_items_media_auth_cached_link_reach_changed():
+    """Changing the link reach of an ancestor should invalidate cached decisions."""
+    parent = factories.ItemFactory(
+        link_reach="public", type=models.ItemTypeChoices.FOLDER
+    )
+    item = factories.ItemFactory(
+        parent=parent,
+        link_reach="restricted",
+        type=models.ItemTypeChoices.FILE,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+    )
+    media_url = f"http://localhost/media/item/{item.pk!s}/{uuid.uuid4()!s}.jpg"
+    client = APIClient()
+
+    response = client.get("/api/v1.0/items/media-auth/", HTTP_X_ORIGINAL_URL=media_url)
+    assert response.status_code == 200
+
+    parent.link_reach = "restricted"
+    parent.save()
+
+    response = client.get("/api/v1.0/items/media-auth/", HTTP_X_ORIGINAL_URL=media_url)
+    assert response.status_code == 403
+
+
+def test_api_items_media_auth_cached_access_deleted():
+    """Deleting the access of a user should invalidate their cached decisions."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    item = factories.ItemFactory(
+        type=models.ItemTypeChoices.FILE,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+    )
+    access = factories.UserItemAccessFactory(item=item, user=user)
+    media_url = f"http://localhost/media/item/{item.pk!s}/{uuid.uuid4()!s}.jpg"
+
+    response = client.get("/api/v1.0/items/media-auth/", HTTP_X_ORIGINAL_URL=media_url)
+    assert response.status_code == 200
+
+    access.delete()
+
+    response = client.get("/api/v1.0/items/media-auth/", HTTP_X_ORIGINAL_URL=media_url)
+    assert response.status_code == 403
@@ -0,0 +1,92 @@
+"""Tests for the recent items endpoint of items in drive's core app."""
+
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def trace(item, user, minutes_ago):
+    """Trace an access of a user to an item a few minutes ago."""
+    return models.LinkTrace.objects.create(
+        item=item,
+        user=user,
+        last_accessed_at=timezone.now() - timedelta(minutes=minutes_ago),
+    )
+
+
+def test_api_items_recents_anonymous():
+    """Anonymous users should not be allowed to list recent items."""
+    response = APIClient().get("/api/v1.0/items/recents/")
+
+    assert response.status_code == 401
+
+
+def test_api_items_recents_ordering():
+    """
+    Users should get the items they opened, most recent first, but not the items
+    opened by other users, deleted items nor items they can no longer read.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    root = factories.UserItemAccessFactory(
+        user=user, item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    file = factories.ItemFactory(
+        parent=root, type=models.ItemTypeChoices.FILE, filename="file.txt"
+    )
+    deleted = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
+    public = factories.ItemFactory(link_reach=models.LinkReachChoices.PUBLIC)
+    restricted = factories.ItemFactory(link_reach=models.LinkReachChoices.RESTRICTED)
+
+    trace(root, user, 30)
+    trace(file, user, 10)
+    trace(deleted, user, 5)
+    trace(public, user, 20)
+    trace(restricted, user, 1)
+    trace(root, factories.UserFactory(), 0)
+    deleted.soft_delete()
+
+    response = client.get("/api/v1.0/items/recents/")
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["id"] for result in results] == [
+        str(file.id),
+        str(public.id),
+        str(root.id),
+    ]
+    assert results[0]["user_roles"] == [
+        access.role for access in root.accesses.filter(user=user)
+    ]
+
+
+@override_settings(ITEM_RECENTS_LIMIT=2)
+def test_api_items_recents_limit():
+    """The number of recent items should be limited by a setting."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    items = factories.ItemFactory.create_batch(
+        3, link_reach=models.LinkReachChoices.AUTHENTICATED
+    )
+    for minutes_ago, item in enumerate(items):
+        trace(item, user, minutes_ago)
+
+    response = client.get("/api/v1.0/items/recents/")
+
+    assert response.status_code == 200
+    assert [result["id"] for result in response.json()] == [
+        str(items[0].id),
+        str(items[1].id),
+    ]
@@ -53,6 +53,8 @@ def test_api_items_retrieve_anonymous_public_standalone():
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -104,6 +106,8 @@ def test_api_items_retrieve_anonymous_public_parent():
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -200,10 +204,14 @@ def test_api_items_retrieve_authenticated_unrelated_public_or_authenticated(reac
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
     }
+    assert models.LinkTrace.objects.filter(item=item, user=user).exists() is False
+    models.LinkTrace.objects.flush_buffer(final=True)
     assert models.LinkTrace.objects.filter(item=item, user=user).exists() is True
 
 
@@ -257,6 +265,8 @@ def test_api_items_retrieve_authenticated_public_or_authenticated_parent(reach):
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -310,6 +320,7 @@ def test_api_items_retrieve_authenticated_trace_twice(reach):
     client.get(
         f"/api/v1.0/items/{item.id!s}/",
     )
+    models.LinkTrace.objects.flush_buffer(final=True)
     assert models.LinkTrace.objects.filter(item=item, user=user).exists() is True
 
     # A second visit should not raise any error
@@ -318,6 +329,36 @@ def test_api_items_retrieve_authenticated_trace_twice(reach):
     assert response.status_code == 200
 
 
+def test_api_items_retrieve_authenticated_trace_last_accessed_at():
+    """
+    Accessing an item should move the access date of its trace forward when the
+    buffered accesses are flushed, at most once per interval.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    item = factories.ItemFactory(link_reach="authenticated")
+    trace = models.LinkTrace.objects.create(item=item, user=user)
+    old = timezone.now() - timedelta(days=1)
+    models.LinkTrace.objects.filter(id=trace.id).update(last_accessed_at=old)
+
+    client.get(f"/api/v1.0/items/{item.id!s}/")
+    trace.refresh_from_db()
+    assert trace.last_accessed_at == old
+
+    models.LinkTrace.objects.flush_buffer(final=True)
+    trace.refresh_from_db()
+    assert trace.last_accessed_at > old
+
+    # Accesses within the interval are not buffered again
+    models.LinkTrace.objects.filter(id=trace.id).update(last_accessed_at=old)
+    client.get(f"/api/v1.0/items/{item.id!s}/")
+    models.LinkTrace.objects.flush_buffer(final=True)
+    trace.refresh_from_db()
+    assert trace.last_accessed_at == old
+
+
 def test_api_items_retrieve_authenticated_unrelated_restricted():
     """
     Authenticated users should not be allowed to retrieve an item that is restricted and
@@ -392,6 +433,8 @@ def test_api_items_retrieve_authenticated_related_direct():
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -451,6 +494,8 @@ def test_api_items_retrieve_authenticated_related_parent():
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -628,6 +673,8 @@ def test_api_items_retrieve_authenticated_related_team_members(
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -699,6 +746,8 @@ def test_api_items_retrieve_authenticated_related_team_administrators(
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -770,6 +819,8 @@ def test_api_items_retrieve_authenticated_related_team_owners(
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -805,7 +856,7 @@ def test_api_items_retrieve_user_roles(django_assert_num_queries):
     )
     expected_roles = {access.role for access in accesses}
 
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(7):
         response = client.get(f"/api/v1.0/items/{item.id!s}/")
 
     assert response.status_code == 200
@@ -815,7 +866,7 @@ def test_api_items_retrieve_user_roles(django_assert_num_queries):
 
 
 def test_api_items_retrieve_numqueries_with_link_trace(django_assert_num_queries):
-    """If the link traced already exists, the number of queries should be minimal."""
+    """Retrieving an item should not query the link traces."""
     user = factories.UserFactory()
     client = APIClient()
     client.force_login(user)
@@ -824,10 +875,10 @@ def test_api_items_retrieve_numqueries_with_link_trace(django_assert_num_queries
         users=[user], link_traces=[user], type=models.ItemTypeChoices.FILE
     )
 
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get(f"/api/v1.0/items/{item.id!s}/")
 
-    with django_assert_num_queries(3):
+    with django_assert_num_queries(2):
         response = client.get(f"/api/v1.0/items/{item.id!s}/")
 
     assert response.status_code == 200
@@ -1120,6 +1171,8 @@ def test_api_items_retrieve_file_uploaded():
         "main_workspace": False,
         "filename": item.filename,
         "size": 8,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -0,0 +1,130 @@
+"""Tests for the search endpoint of items in drive's core app."""
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_api_items_search_anonymous():
+    """Anonymous users should not be allowed to search items."""
+    factories.ItemFactory(title="annual report", link_reach="public")
+
+    response = APIClient().get("/api/v1.0/items/search/?q=report")
+
+    assert response.status_code == 401
+
+
+def test_api_items_search_query_too_short():
+    """Queries too short to be matched by trigrams should return no result."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    factories.UserItemAccessFactory(user=user, item__title="re")
+
+    response = client.get("/api/v1.0/items/search/?q=re")
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 0
+
+
+def test_api_items_search_readable_items():
+    """
+    Users should find the items of the subtrees on which they have a role and of the
+    items they accessed by link, ranked by similarity, but not the other ones.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    root = factories.UserItemAccessFactory(
+        user=user, item__title="root", item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    folder = factories.ItemFactory(
+        parent=root, title="reports", type=models.ItemTypeChoices.FOLDER
+    )
+    exact = factories.ItemFactory(
+        parent=folder, title="report", type=models.ItemTypeChoices.FOLDER
+    )
+    deleted = factories.ItemFactory(
+        parent=folder, title="old report", type=models.ItemTypeChoices.FOLDER
+    )
+    deleted.soft_delete()
+
+    traced = factories.ItemFactory(
+        title="report of another team",
+        link_reach=models.LinkReachChoices.AUTHENTICATED,
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    models.LinkTrace.objects.create(item=traced, user=user)
+    restricted_trace = factories.ItemFactory(
+        title="restricted report", link_reach=models.LinkReachChoices.RESTRICTED
+    )
+    models.LinkTrace.objects.create(item=restricted_trace, user=user)
+    factories.ItemFactory(
+        title="report of strangers", link_reach=models.LinkReachChoices.PUBLIC
+    )
+
+    response = client.get("/api/v1.0/items/search/?q=report")
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["id"] for result in results] == [
+        str(exact.id),
+        str(folder.id),
+        str(traced.id),
+    ]
+    assert results[0]["user_roles"] == [
+        access.role for access in root.accesses.filter(user=user)
+    ]
+
+
+def test_api_items_search_traced_inherited_link():
+    """
+    Restricted items accessed by link should be found when an ancestor grants them
+    a link, as when they are retrieved.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    folder = factories.ItemFactory(
+        title="folder",
+        link_reach=models.LinkReachChoices.PUBLIC,
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    traced = factories.ItemFactory(
+        parent=folder,
+        title="report",
+        link_reach=models.LinkReachChoices.RESTRICTED,
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    models.LinkTrace.objects.create(item=traced, user=user)
+
+    response = client.get("/api/v1.0/items/search/?q=report")
+
+    assert response.status_code == 200
+    assert [result["id"] for result in response.json()["results"]] == [str(traced.id)]
+
+
+def test_api_items_search_filter_type():
+    """Search results can be filtered by type."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    root = factories.UserItemAccessFactory(
+        user=user, item__title="root", item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    factories.ItemFactory(
+        parent=root, title="reports", type=models.ItemTypeChoices.FOLDER
+    )
+    file = factories.ItemFactory(
+        parent=root, type=models.ItemTypeChoices.FILE, filename="report.pdf"
+    )
+
+    response = client.get("/api/v1.0/items/search/?q=report&type=file")
+
+    assert response.status_code == 200
+    assert [result["id"] for result in response.json()["results"]] == [str(file.id)]
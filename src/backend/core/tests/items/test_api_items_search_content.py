@@ -0,0 +1,81 @@
+"""Tests for the full-text search of the content of items in drive's core app."""
+
+from django.contrib.postgres.search import SearchVector
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def create_file(text, **kwargs):
+    """Create a file which content was extracted and indexed."""
+    item = factories.ItemFactory(type=models.ItemTypeChoices.FILE, **kwargs)
+    models.ItemContent.objects.create(item=item, text=text)
+    models.ItemContent.objects.filter(item=item).update(
+        search_vector=SearchVector("text", config="simple")
+    )
+    return item
+
+
+def test_api_items_search_content_anonymous():
+    """Anonymous users should not be allowed to search the content of items."""
+    create_file("the annual report", link_reach="public", filename="public.txt")
+
+    response = APIClient().get("/api/v1.0/items/search/content/?q=annual")
+
+    assert response.status_code == 401
+
+
+def test_api_items_search_content_readable_items():
+    """
+    Users should find the readable files which content matches the query, ranked by
+    relevance and with a highlighted snippet, but not the other ones.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    root = factories.UserItemAccessFactory(
+        user=user, item__title="root", item__type=models.ItemTypeChoices.FOLDER
+    ).item
+
+    once = create_file(
+        "the budget is detailed in the annual report",
+        parent=root,
+        filename="once.txt",
+    )
+    twice = create_file(
+        "budget of the year and budget of the next year",
+        parent=root,
+        filename="twice.txt",
+    )
+    create_file("nothing to see here", parent=root, filename="other.txt")
+    create_file(
+        "the budget of strangers", link_reach="public", filename="strangers.txt"
+    )
+
+    response = client.get("/api/v1.0/items/search/content/?q=budget")
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["id"] for result in results] == [str(twice.id), str(once.id)]
+    assert "<mark>budget</mark>" in results[1]["snippet"]
+
+
+def test_api_items_search_content_websearch_syntax():
+    """The query should support the web search syntax to exclude words."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    root = factories.UserItemAccessFactory(
+        user=user, item__title="root", item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    kept = create_file("annual budget", parent=root, filename="kept.txt")
+    create_file("annual report", parent=root, filename="excluded.txt")
+
+    response = client.get("/api/v1.0/items/search/content/?q=annual -report")
+
+    assert response.status_code == 200
+    assert [result["id"] for result in response.json()["results"]] == [str(kept.id)]
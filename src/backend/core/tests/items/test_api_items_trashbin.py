@@ -95,6 +95,8 @@ def test_api_items_trashbin_format(settings):
         "main_workspace": False,
         "filename": item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "hard_delete_at": ((now + timedelta(days=30)).isoformat()),
     }
@@ -142,10 +144,10 @@ def test_api_items_trashbin_authenticated_direct(django_assert_num_queries):
 
     expected_ids = {str(item1.id), str(item2.id), str(item3.id)}
 
-    with django_assert_num_queries(7):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/items/trashbin/")
 
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/items/trashbin/")
 
     assert response.status_code == 200
@@ -233,7 +235,7 @@ def test_api_items_trashbin_authenticated_via_team(
 
     expected_ids = {str(deleted_item_team1.id), str(deleted_item_team2.id)}
 
-    with django_assert_num_queries(5):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/items/trashbin/")
 
     with django_assert_num_queries(3):
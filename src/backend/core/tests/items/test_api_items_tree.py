@@ -165,6 +165,8 @@ def test_items_api_anonymous_to_a_public_tree_structure():
                 "main_workspace": False,
                 "filename": level2_1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -196,6 +198,8 @@ def test_items_api_anonymous_to_a_public_tree_structure():
                 "main_workspace": False,
                 "filename": level2_2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -225,6 +229,8 @@ def test_items_api_anonymous_to_a_public_tree_structure():
         "main_workspace": False,
         "filename": level1_2.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -324,13 +330,13 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
         item__type=models.ItemTypeChoices.FOLDER,
     )
 
-    # Without nb_accesses cache
-    with django_assert_num_queries(12):
+    # Without nb_accesses and highest readable ancestor cache
+    with django_assert_num_queries(5):
         # access to the tree for level2_2
         client.get(f"/api/v1.0/items/{level3_1.item.id}/tree/")
 
-    # With nb_accesses cache
-    with django_assert_num_queries(5):
+    # With nb_accesses and highest readable ancestor cache
+    with django_assert_num_queries(3):
         # access to the tree for level2_2
         response = client.get(f"/api/v1.0/items/{level3_1.item.id}/tree/")
 
@@ -372,6 +378,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
                         "main_workspace": False,
                         "filename": level2_1.item.filename,
                         "size": None,
+                        "total_size": 0,
+                        "total_files": 0,
                         "description": None,
                         "deleted_at": None,
                         "hard_delete_at": None,
@@ -413,6 +421,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
                                 "main_workspace": False,
                                 "filename": level3_1.item.filename,
                                 "size": None,
+                                "total_size": 0,
+                                "total_files": 0,
                                 "description": None,
                                 "deleted_at": None,
                                 "hard_delete_at": None,
@@ -446,6 +456,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
                         "main_workspace": False,
                         "filename": level2_2.item.filename,
                         "size": None,
+                        "total_size": 0,
+                        "total_files": 0,
                         "description": None,
                         "deleted_at": None,
                         "hard_delete_at": None,
@@ -479,6 +491,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
                 "main_workspace": False,
                 "filename": level1_1.item.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -514,6 +528,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
                 "main_workspace": False,
                 "filename": level1_2.item.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -549,6 +565,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
                 "main_workspace": False,
                 "filename": level1_3.item.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -578,6 +596,8 @@ def test_items_api_tree_authenticated_direct_access(django_assert_num_queries):
         "main_workspace": True,
         "filename": root.item.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -691,6 +711,8 @@ def test_api_items_tree_authenticated_with_access_authenticated():
         "abilities": level1_1.get_abilities(user),
         "filename": level1_1.filename,
         "size": None,
+        "total_size": 0,
+        "total_files": 0,
         "description": None,
         "deleted_at": None,
         "hard_delete_at": None,
@@ -722,6 +744,8 @@ def test_api_items_tree_authenticated_with_access_authenticated():
                 "main_workspace": False,
                 "filename": level2_1.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
@@ -753,9 +777,75 @@ def test_api_items_tree_authenticated_with_access_authenticated():
                 "main_workspace": False,
                 "filename": level2_2.filename,
                 "size": None,
+                "total_size": 0,
+                "total_files": 0,
                 "description": None,
                 "deleted_at": None,
                 "hard_delete_at": None,
             },
         ],
     }
+
+
+def test_api_items_tree_highest_readable_ancestor_cache_accesses():
+    """
+    The highest readable ancestor is cached per user and should be invalidated when
+    accesses on the ancestors of the item change.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    root = factories.ItemFactory(
+        type=models.ItemTypeChoices.FOLDER,
+        link_reach=models.LinkReachChoices.RESTRICTED,
+    )
+    level1 = factories.ItemFactory(
+        parent=root,
+        type=models.ItemTypeChoices.FOLDER,
+        link_reach=models.LinkReachChoices.RESTRICTED,
+    )
+    level2 = factories.ItemFactory(parent=level1, type=models.ItemTypeChoices.FOLDER)
+    factories.UserItemAccessFactory(user=user, item=level1)
+
+    response = client.get(f"/api/v1.0/items/{level2.id!s}/tree/")
+    assert response.json()["id"] == str(level1.id)
+
+    access = factories.UserItemAccessFactory(user=user, item=root)
+
+    response = client.get(f"/api/v1.0/items/{level2.id!s}/tree/")
+    assert response.json()["id"] == str(root.id)
+    assert response.json()["children"][0]["id"] == str(level1.id)
+
+    access.delete()
+
+    response = client.get(f"/api/v1.0/items/{level2.id!s}/tree/")
+    assert response.json()["id"] == str(level1.id)
+
+
+def test_api_items_tree_highest_readable_ancestor_cache_move():
+    """
+    The highest readable ancestor cached for an item should be invalidated when the
+    item is moved.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    source = factories.UserItemAccessFactory(
+        user=user, item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    target = factories.UserItemAccessFactory(
+        user=user, item__type=models.ItemTypeChoices.FOLDER
+    ).item
+    folder = factories.ItemFactory(parent=source, type=models.ItemTypeChoices.FOLDER)
+    subfolder = factories.ItemFactory(parent=folder, type=models.ItemTypeChoices.FOLDER)
+
+    response = client.get(f"/api/v1.0/items/{subfolder.id!s}/tree/")
+    assert response.json()["id"] == str(source.id)
+
+    folder.move(target)
+
+    response = client.get(f"/api/v1.0/items/{subfolder.id!s}/tree/")
+    assert response.json()["id"] == str(target.id)
+    assert response.json()["children"][0]["id"] == str(folder.id)
@@ -0,0 +1,36 @@
+"""Test the extraction of the content of files for the full-text search."""
+
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+
+import pytest
+
+from core import factories, models
+from core.tasks.item import extract_item_content
+
+pytestmark = pytest.mark.django_db
+
+
+def test_extract_item_content():
+    """The text of an uploaded file should be stored and indexed."""
+    pytest.importorskip("fitz")
+    pytest.importorskip("docx")
+    item = factories.ItemFactory(type=models.ItemTypeChoices.FILE, filename="notes.txt")
+    default_storage.save(item.file_key, BytesIO(b"the annual budget"))
+    item.mark_uploaded("text/plain", 17)
+
+    extract_item_content(item.id)
+
+    assert models.Item.objects.filter(
+        id=item.id, content__search_vector="budget"
+    ).exists()
+
+
+def test_extract_item_content_pending_upload():
+    """The content of files which upload did not end should not be extracted."""
+    item = factories.ItemFactory(type=models.ItemTypeChoices.FILE, filename="notes.txt")
+
+    extract_item_content(item.id)
+
+    assert not models.ItemContent.objects.exists()
@@ -0,0 +1,59 @@
+"""Test the flush of the link traces buffered in cache."""
+
+from unittest import mock
+
+import pytest
+
+from core import factories, models
+from core.tasks.item import flush_link_traces
+
+pytestmark = pytest.mark.django_db
+
+
+def at_slot(slot):
+    """Patch the time slot in which link traces are buffered and flushed."""
+    return mock.patch.object(
+        models.LinkTrace.objects, "get_buffer_slot", return_value=slot
+    )
+
+
+def test_flush_link_traces_closed_slots():
+    """
+    Buffered accesses should be written once their slot is closed for a full slot,
+    coalesced by pair of user/item.
+    """
+    user = factories.UserFactory()
+    item, other_item = factories.ItemFactory.create_batch(2)
+
+    with at_slot(100):
+        models.LinkTrace.objects.record(item, user)
+        models.LinkTrace.objects.record(item, user)
+        models.LinkTrace.objects.record(other_item, user)
+
+    with at_slot(101):
+        assert flush_link_traces() == 0
+    assert models.LinkTrace.objects.exists() is False
+
+    with at_slot(102):
+        assert flush_link_traces() == 2
+        assert flush_link_traces() == 0
+    assert set(models.LinkTrace.objects.values_list("item_id", flat=True)) == {
+        item.id,
+        other_item.id,
+    }
+
+
+def test_flush_link_traces_deleted_item():
+    """Accesses to items deleted before the flush should be dropped."""
+    user = factories.UserFactory()
+    item, deleted_item = factories.ItemFactory.create_batch(2)
+
+    with at_slot(200):
+        models.LinkTrace.objects.record(item, user)
+        models.LinkTrace.objects.record(deleted_item, user)
+    deleted_item.delete()
+
+    with at_slot(202):
+        flush_link_traces()
+
+    assert list(models.LinkTrace.objects.values_list("item_id", flat=True)) == [item.id]
@@ -2,13 +2,14 @@
 
 import logging
 from io import BytesIO
+from unittest import mock
 
 from django.core.files.storage import default_storage
 
 import pytest
 
 from core import factories, models
-from core.tasks.item import process_item_deletion
+from core.tasks.item import delete_storage_objects, process_item_deletion
 
 pytestmark = pytest.mark.django_db
 
@@ -117,3 +118,146 @@ def test_process_item_deletion_in_cascade():
     assert models.Item.objects.all().count() == 1  # the user's workspace
     assert not default_storage.exists(child_file.file_key)
     assert not default_storage.exists(child2_file.file_key)
+
+
+def test_process_item_deletion_by_batches(settings, caplog):
+    """
+    The subtree should be purged by batches of descendants, deleting their files
+    with one multi-object delete request per batch.
+    """
+    settings.ITEM_DELETION_BATCH_SIZE = 2
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    files = factories.ItemFactory.create_batch(
+        5,
+        type=models.ItemTypeChoices.FILE,
+        parent=parent,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+    )
+    for file in files:
+        default_storage.save(file.file_key, BytesIO(b"my prose"))
+
+    parent.soft_delete()
+    parent.hard_delete()
+
+    with (
+        mock.patch(
+            "core.tasks.item.delete_storage_objects", wraps=delete_storage_objects
+        ) as delete_mock,
+        caplog.at_level(logging.INFO),
+    ):
+        process_item_deletion(parent.id)
+
+    assert not models.Item.objects.filter(path__descendants=parent.path).exists()
+    for file in files:
+        assert not default_storage.exists(file.file_key)
+    assert [len(call.args[0]) for call in delete_mock.call_args_list] == [2, 2, 1]
+    assert (
+        f"Item {parent.id!s} deletion progress: 5 descendant(s) deleted, 0 failed"
+        in caplog.text
+    )
+
+
+def test_process_item_deletion_storage_errors_kept():
+    """
+    Descendants whose file could not be deleted should be kept along with the item,
+    running the task again should resume the deletion.
+    """
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    failing_file, file = factories.ItemFactory.create_batch(
+        2,
+        type=models.ItemTypeChoices.FILE,
+        parent=parent,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+    )
+    parent.soft_delete()
+    parent.hard_delete()
+
+    with mock.patch(
+        "core.tasks.item.delete_storage_objects",
+        return_value={failing_file.file_key},
+    ):
+        process_item_deletion(parent.id)
+
+    assert models.Item.objects.filter(id=parent.id).exists()
+    assert models.Item.objects.filter(id=failing_file.id).exists()
+    assert not models.Item.objects.filter(id=file.id).exists()
+
+    process_item_deletion(parent.id)
+
+    assert not models.Item.objects.filter(path__descendants=parent.path).exists()
+
+
+def test_process_item_deletion_storage_errors_nested(settings):
+    """
+    The folders above a descendant whose file could not be deleted should be kept,
+    even when they are processed in another batch.
+    """
+    settings.ITEM_DELETION_BATCH_SIZE = 1
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    folder = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER, parent=parent)
+    subfolder = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER, parent=folder)
+    failing_file = factories.ItemFactory(
+        type=models.ItemTypeChoices.FILE,
+        parent=subfolder,
+        update_upload_state=models.ItemUploadStateChoices.UPLOADED,
+    )
+    other_folder = factories.ItemFactory(
+        type=models.ItemTypeChoices.FOLDER, parent=parent
+    )
+    parent.soft_delete()
+    parent.hard_delete()
+
+    with mock.patch(
+        "core.tasks.item.delete_storage_objects",
+        return_value={failing_file.file_key},
+    ):
+        process_item_deletion(parent.id)
+
+    assert set(
+        models.Item.objects.filter(path__descendants=parent.path).values_list(
+            "id", flat=True
+        )
+    ) == {parent.id, folder.id, subfolder.id, failing_file.id}
+    assert not models.Item.objects.filter(id=other_folder.id).exists()
+
+    process_item_deletion(parent.id)
+
+    assert not models.Item.objects.filter(path__descendants=parent.path).exists()
+
+
+def test_delete_storage_objects_batches():
+    """Keys should be deleted with one request per batch of 1000 keys."""
+    keys = [f"item/{index:d}/file.txt" for index in range(2500)]
+
+    with mock.patch.object(
+        default_storage.connection.meta.client,
+        "delete_objects",
+        return_value={"Errors": [{"Key": keys[10], "Message": "Access Denied"}]},
+    ) as delete_objects_mock:
+        failed_keys = delete_storage_objects(keys)
+
+    assert [
+        len(call.kwargs["Delete"]["Objects"])
+        for call in delete_objects_mock.call_args_list
+    ] == [1000, 1000, 500]
+    assert failed_keys == {keys[10]}
+
+
+def test_process_item_deletion_nested_parent_numchild():
+    """
+    Deleting a soft deleted item should not update its parent again, it was updated
+    on soft deletion.
+    """
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    child, _other_child = factories.ItemFactory.create_batch(
+        2, parent=parent, type=models.ItemTypeChoices.FOLDER
+    )
+    child.soft_delete()
+    child.hard_delete()
+
+    process_item_deletion(child.id)
+
+    assert not models.Item.objects.filter(id=child.id).exists()
+    parent.refresh_from_db()
+    assert parent.numchild == 1
+    assert parent.numchild_folder == 1
@@ -0,0 +1,209 @@
+"""Test the propagation of subtree soft deletions and restorations."""
+
+import logging
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories, models
+from core.tasks.item import propagate_subtree_deletion
+
+pytestmark = pytest.mark.django_db
+
+
+def create_tree():
+    """Create a folder with 3 sub-folders each holding a file."""
+    root = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    descendants = []
+    for folder in factories.ItemFactory.create_batch(
+        3, parent=root, type=models.ItemTypeChoices.FOLDER
+    ):
+        descendants.append(folder)
+        descendants.append(
+            factories.ItemFactory(parent=folder, type=models.ItemTypeChoices.FILE)
+        )
+    return root, descendants
+
+
+def test_propagate_subtree_deletion_soft_delete_asynchronous(settings):
+    """
+    An asynchronous soft delete should only mark the root item, the task should then
+    mark all descendants by batches.
+    """
+    settings.ITEM_SUBTREE_PROPAGATION_BATCH_SIZE = 2
+    root, descendants = create_tree()
+
+    root.soft_delete(asynchronous=True)
+
+    assert not models.Item.objects.filter(
+        pk__in=[item.pk for item in descendants], ancestors_deleted_at__isnull=False
+    ).exists()
+    propagation = models.ItemSubtreePropagation.objects.get(item=root)
+    assert propagation.operation == models.ItemPropagationChoices.SOFT_DELETE
+    assert propagation.deleted_at == root.deleted_at
+
+    propagate_subtree_deletion(root.id)
+
+    assert not models.ItemSubtreePropagation.objects.exists()
+    for item in descendants:
+        item.refresh_from_db()
+        assert item.ancestors_deleted_at == root.deleted_at
+        assert item.deleted_at is None
+
+
+def test_propagate_subtree_deletion_checkpoint():
+    """Each batch should resume after the path of the last descendant processed."""
+    root, _descendants = create_tree()
+    root.soft_delete(asynchronous=True)
+    propagation = models.ItemSubtreePropagation.objects.get(item=root)
+    paths = list(root.descendants().order_by("path").values_list("path", flat=True))
+
+    assert propagation.propagate_batch(4) is True
+
+    propagation.refresh_from_db()
+    assert propagation.checkpoint == paths[3]
+    assert (
+        list(
+            root.descendants()
+            .filter(ancestors_deleted_at__isnull=False)
+            .order_by("path")
+            .values_list("path", flat=True)
+        )
+        == paths[:4]
+    )
+
+    assert propagation.propagate_batch(4) is False
+
+    assert not models.ItemSubtreePropagation.objects.exists()
+    assert not root.descendants().filter(ancestors_deleted_at__isnull=True).exists()
+
+
+def test_propagate_subtree_deletion_restore_asynchronous(settings):
+    """
+    An asynchronous restore should only restore the root item, the task should then
+    restore descendants except those deleted on their own.
+    """
+    settings.ITEM_SUBTREE_PROPAGATION_BATCH_SIZE = 2
+    root, descendants = create_tree()
+    deleted_file = descendants[1]
+    deleted_file.soft_delete()
+    root.soft_delete()
+
+    root.restore(asynchronous=True)
+
+    root.refresh_from_db()
+    assert root.deleted_at is None
+    assert root.ancestors_deleted_at is None
+    propagation = models.ItemSubtreePropagation.objects.get(item=root)
+    assert propagation.operation == models.ItemPropagationChoices.RESTORE
+
+    propagate_subtree_deletion(root.id)
+
+    assert not models.ItemSubtreePropagation.objects.exists()
+    for item in descendants:
+        item.refresh_from_db()
+        if item == deleted_file:
+            assert item.ancestors_deleted_at == item.deleted_at
+        else:
+            assert item.ancestors_deleted_at is None
+
+
+def test_propagate_subtree_deletion_current_ancestors_deleted_at():
+    """
+    While a propagation is pending, descendants should resolve their deletion date
+    from the root item.
+    """
+    root, descendants = create_tree()
+    root.soft_delete(asynchronous=True)
+
+    item = (
+        models.Item.objects.filter(pk=descendants[-1].pk)
+        .annotate_subtree_propagation()
+        .get()
+    )
+    assert item.ancestors_deleted_at is None
+    assert item.current_ancestors_deleted_at == root.deleted_at
+
+    root.restore(asynchronous=True)
+
+    item = (
+        models.Item.objects.filter(pk=descendants[-1].pk)
+        .annotate_subtree_propagation()
+        .get()
+    )
+    assert item.current_ancestors_deleted_at is None
+
+
+def test_propagate_subtree_deletion_synchronous_cancels_pending():
+    """A synchronous operation should replace a propagation still pending."""
+    root, descendants = create_tree()
+    root.soft_delete(asynchronous=True)
+
+    root.restore()
+
+    assert not models.ItemSubtreePropagation.objects.exists()
+    for item in descendants:
+        item.refresh_from_db()
+        assert item.ancestors_deleted_at is None
+
+
+def test_propagate_subtree_deletion_nothing_pending(caplog):
+    """The task should stop if no propagation is pending for the item."""
+    item = factories.ItemFactory()
+
+    with caplog.at_level(logging.INFO):
+        propagate_subtree_deletion(item.id)
+
+    assert f"No subtree propagation pending for item {item.id!s}" in caplog.text
+
+
+def test_propagate_subtree_deletion_api_pending_deletion_hidden():
+    """
+    Descendants of an item which deletion is still being propagated should not be
+    listed nor retrieved by users who are not owners.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    root, descendants = create_tree()
+    child = descendants[0]
+    factories.UserItemAccessFactory(
+        item=child, user=user, role=models.RoleChoices.EDITOR
+    )
+
+    response = client.get(f"/api/v1.0/items/{child.id!s}/")
+    assert response.status_code == 200
+    assert str(child.id) in [
+        item["id"] for item in client.get("/api/v1.0/items/").json()["results"]
+    ]
+
+    root.soft_delete(asynchronous=True)
+
+    response = client.get(f"/api/v1.0/items/{child.id!s}/")
+    assert response.status_code == 404
+    assert str(child.id) not in [
+        item["id"] for item in client.get("/api/v1.0/items/").json()["results"]
+    ]
+
+
+def test_propagate_subtree_deletion_api_delete_large_folder(settings):
+    """Deleting a folder above the threshold should propagate in the background."""
+    settings.ITEM_SUBTREE_ASYNC_THRESHOLD = 2
+    settings.ITEM_SUBTREE_PROPAGATION_BATCH_SIZE = 2
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    root, descendants = create_tree()
+    factories.UserItemAccessFactory(item=root, user=user, role=models.RoleChoices.OWNER)
+
+    response = client.delete(f"/api/v1.0/items/{root.id!s}/")
+
+    assert response.status_code == 204
+    # Celery runs tasks eagerly in tests
+    assert not models.ItemSubtreePropagation.objects.exists()
+    root.refresh_from_db()
+    for item in descendants:
+        item.refresh_from_db()
+        assert item.ancestors_deleted_at == root.deleted_at
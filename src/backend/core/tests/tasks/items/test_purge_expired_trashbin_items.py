@@ -0,0 +1,73 @@
+"""Test the purge of expired items from the trashbin."""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+import pytest
+
+from core import factories, models
+from core.tasks.item import purge_expired_trashbin_items
+
+pytestmark = pytest.mark.django_db
+
+
+def soft_delete_days_ago(item, days):
+    """Soft delete an item as if it was deleted the given number of days ago."""
+    with mock.patch(
+        "django.utils.timezone.now",
+        return_value=timezone.now() - timedelta(days=days),
+    ):
+        item.soft_delete()
+
+
+def test_purge_expired_trashbin_items(settings):
+    """Items deleted before the trashbin cutoff should be purged with their subtree."""
+    settings.TRASHBIN_CUTOFF_DAYS = 30
+    expired = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    expired_child = factories.ItemFactory(
+        parent=expired, type=models.ItemTypeChoices.FOLDER
+    )
+    recent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    alive = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    soft_delete_days_ago(expired, 31)
+    soft_delete_days_ago(recent, 29)
+
+    metrics = purge_expired_trashbin_items()
+
+    assert metrics == {"expired": 1, "purged": 1, "failed": 0}
+    assert not models.Item.objects.filter(
+        id__in=[expired.id, expired_child.id]
+    ).exists()
+    assert models.Item.objects.filter(id__in=[recent.id, alive.id]).count() == 2
+
+
+def test_purge_expired_trashbin_items_batch_size(settings):
+    """Each run should purge at most a batch of the oldest expired items."""
+    settings.TRASHBIN_PURGE_BATCH_SIZE = 2
+    items = factories.ItemFactory.create_batch(3, type=models.ItemTypeChoices.FOLDER)
+    for days, item in zip([40, 50, 60], items, strict=True):
+        soft_delete_days_ago(item, days)
+
+    assert purge_expired_trashbin_items()["purged"] == 2
+
+    assert list(models.Item.objects.filter(id__in=[item.id for item in items])) == [
+        items[0]
+    ]
+
+    assert purge_expired_trashbin_items()["purged"] == 1
+    assert not models.Item.objects.filter(id__in=[item.id for item in items]).exists()
+
+
+def test_purge_expired_trashbin_items_nested():
+    """Expired items nested in another expired item should all be purged."""
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    child = factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FOLDER)
+    soft_delete_days_ago(child, 60)
+    soft_delete_days_ago(parent, 50)
+
+    metrics = purge_expired_trashbin_items()
+
+    assert metrics == {"expired": 2, "purged": 2, "failed": 0}
+    assert not models.Item.objects.filter(id__in=[parent.id, child.id]).exists()
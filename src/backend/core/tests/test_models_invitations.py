@@ -143,7 +143,7 @@ def test_models_invitationd_new_user_filter_expired_invitations():
     ).exists()
 
 
-@pytest.mark.parametrize("num_invitations, num_queries", [(0, 17), (1, 21), (20, 21)])
+@pytest.mark.parametrize("num_invitations, num_queries", [(0, 18), (1, 23), (20, 23)])
 def test_models_invitations_new_userd_user_creation_constant_num_queries(
     django_assert_num_queries, num_invitations, num_queries
 ):
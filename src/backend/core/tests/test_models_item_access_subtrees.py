@@ -0,0 +1,112 @@
+"""
+Unit tests for the ItemAccessSubtree model
+"""
+
+from django.contrib.auth.models import AnonymousUser
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_models_item_access_subtrees_created_with_access():
+    """Creating an item access should create its subtree."""
+    item = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    child = factories.ItemFactory(parent=item)
+    access = factories.UserItemAccessFactory(item=child, role="editor")
+
+    subtree = models.ItemAccessSubtree.objects.get(access=access)
+    assert subtree.user == access.user
+    assert subtree.team == ""
+    assert subtree.item == child
+    assert str(subtree.path) == str(child.path)
+    assert subtree.roles == ["editor"]
+
+
+def test_models_item_access_subtrees_updated_with_access():
+    """Updating the role of an item access should update its subtree."""
+    access = factories.TeamItemAccessFactory(role="reader")
+
+    access.role = "administrator"
+    access.save()
+
+    subtree = models.ItemAccessSubtree.objects.get(access=access)
+    assert subtree.team == access.team
+    assert subtree.roles == ["administrator"]
+
+
+def test_models_item_access_subtrees_deleted_with_access():
+    """Deleting an item access or its item should delete its subtree."""
+    access = factories.UserItemAccessFactory()
+    other_access = factories.UserItemAccessFactory()
+
+    access.delete()
+    assert not models.ItemAccessSubtree.objects.filter(access_id=access.pk).exists()
+
+    other_access.item.delete()
+    assert not models.ItemAccessSubtree.objects.filter(
+        access_id=other_access.pk
+    ).exists()
+
+
+def test_models_item_access_subtrees_invitations_converted():
+    """Accesses created from invitations when a user signs up should get a subtree."""
+    invitation = factories.InvitationFactory(role="editor")
+
+    user = factories.UserFactory(email=invitation.email)
+
+    subtree = models.ItemAccessSubtree.objects.get(user=user, item=invitation.item)
+    assert subtree.roles == ["editor"]
+
+
+def test_models_item_access_subtrees_move():
+    """Moving an item should update the path of the subtrees in the moved subtree."""
+    origin = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    target = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    item = factories.ItemFactory(parent=origin, type=models.ItemTypeChoices.FOLDER)
+    child = factories.ItemFactory(parent=item)
+    item_access = factories.UserItemAccessFactory(item=item)
+    child_access = factories.UserItemAccessFactory(item=child)
+    origin_access = factories.UserItemAccessFactory(item=origin)
+
+    item.move(target)
+
+    item.refresh_from_db()
+    child.refresh_from_db()
+    assert str(models.ItemAccessSubtree.objects.get(access=item_access).path) == str(
+        item.path
+    )
+    assert str(models.ItemAccessSubtree.objects.get(access=child_access).path) == str(
+        child.path
+    )
+    assert str(models.ItemAccessSubtree.objects.get(access=origin_access).path) == str(
+        origin.path
+    )
+
+
+def test_models_item_access_subtrees_get_roles(mock_user_teams):
+    """Roles should be resolved from the subtrees of the item and its ancestors."""
+    mock_user_teams.return_value = ["lasuite"]
+    user = factories.UserFactory()
+    grand_parent = factories.ItemFactory(
+        users=[(user, "reader")], type=models.ItemTypeChoices.FOLDER
+    )
+    parent = factories.ItemFactory(
+        parent=grand_parent,
+        teams=[("lasuite", "owner")],
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    item = factories.ItemFactory(parent=parent, users=[(user, "editor")])
+    # Accesses of other users, other teams or on other subtrees should be ignored
+    factories.UserItemAccessFactory(item=item, role="administrator")
+    factories.TeamItemAccessFactory(item=item, team="unknown", role="administrator")
+    factories.UserItemAccessFactory(
+        user=user, item__parent=parent, role="administrator"
+    )
+
+    assert item.get_roles(user) == ["owner", "editor", "reader"]
+    assert parent.get_roles(user) == ["owner", "reader"]
+    assert grand_parent.get_roles(user) == ["reader"]
+    assert item.get_roles(AnonymousUser()) == []
@@ -0,0 +1,58 @@
+"""
+Unit tests for the children counters of items and their pending deltas
+"""
+
+import pytest
+
+from core import factories, models
+from core.tasks.item import merge_item_child_count_deltas
+
+pytestmark = pytest.mark.django_db
+
+
+def test_models_item_child_count_deltas_applied_directly():
+    """Counters of an item which row is free should be updated in place."""
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+
+    assert models.Item.objects.update_child_counters(parent.id, 2, 1) is True
+
+    parent.refresh_from_db()
+    assert parent.numchild == 2
+    assert parent.numchild_folder == 1
+    assert not models.ItemChildCountDelta.objects.exists()
+
+
+def test_models_item_child_count_deltas_merged_on_next_update():
+    """Pending deltas should be merged along with the next direct update."""
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    models.ItemChildCountDelta.objects.create(
+        item=parent, numchild=1, numchild_folder=1
+    )
+
+    factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FILE)
+
+    parent.refresh_from_db()
+    assert parent.numchild == 2
+    assert parent.numchild_folder == 1
+    assert not models.ItemChildCountDelta.objects.exists()
+
+
+def test_models_item_child_count_deltas_merge_task():
+    """The periodic task should merge the pending deltas of each item."""
+    parent1, parent2 = factories.ItemFactory.create_batch(
+        2, type=models.ItemTypeChoices.FOLDER
+    )
+    models.ItemChildCountDelta.objects.create(
+        item=parent1, numchild=1, numchild_folder=1
+    )
+    models.ItemChildCountDelta.objects.create(item=parent1, numchild=1)
+    models.ItemChildCountDelta.objects.create(item=parent2, numchild=3)
+
+    assert merge_item_child_count_deltas() == 2
+
+    parent1.refresh_from_db()
+    assert parent1.numchild == 2
+    assert parent1.numchild_folder == 1
+    parent2.refresh_from_db()
+    assert parent2.numchild == 3
+    assert not models.ItemChildCountDelta.objects.exists()
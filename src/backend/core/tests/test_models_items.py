@@ -381,7 +381,7 @@ def test_models_items_not_root_get_abilities_owner(django_assert_num_queries):
         "update": True,
         "upload_ended": True,
     }
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert item.get_abilities(user) == expected_abilities
     item.soft_delete()
     item.refresh_from_db()
@@ -415,7 +415,7 @@ def test_models_items_not_root_get_abilities_administrator(django_assert_num_que
         "update": True,
         "upload_ended": True,
     }
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert item.get_abilities(user) == expected_abilities
     item.soft_delete()
     item.refresh_from_db()
@@ -448,7 +448,7 @@ def test_models_items_not_root_get_abilities_editor_user(django_assert_num_queri
         "update": True,
         "upload_ended": True,
     }
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert item.get_abilities(user) == expected_abilities
     item.soft_delete()
     item.refresh_from_db()
@@ -485,7 +485,7 @@ def test_models_items_not_root_get_abilities_reader_user(django_assert_num_queri
         "update": access_from_link,
         "upload_ended": access_from_link,
     }
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert item.get_abilities(user) == expected_abilities
     item.soft_delete()
     item.refresh_from_db()
@@ -631,11 +631,15 @@ def test_models_items_nb_accesses_cache_is_set_and_retrieved(
 ):
     """Test that nb_accesses is cached after the first computation."""
     item = factories.ItemFactory()
-    key = f"item_{item.id!s}_nb_accesses"
+    key = item.get_nb_accesses_cache_key()
     nb_accesses = random.randint(1, 4)
     factories.UserItemAccessFactory.create_batch(nb_accesses, item=item)
     factories.UserItemAccessFactory()  # An unrelated access should not be counted
 
+    # Creating accesses changed the generation of the item so the key changed
+    assert item.get_nb_accesses_cache_key() != key
+    key = item.get_nb_accesses_cache_key()
+
     # Initially, the nb_accesses should not be cached
     assert cache.get(key) is None
 
@@ -652,11 +656,14 @@ def test_models_items_nb_accesses_cache_is_set_and_retrieved(
     models.ItemAccess.objects.create(
         item=item, user=factories.UserFactory(), role="reader"
     )
-    assert cache.get(key) is None  # Cache should be invalidated
+    new_key = item.get_nb_accesses_cache_key()
+    assert new_key != key
+    assert cache.get(new_key) is None  # Cache should be invalidated
     with django_assert_num_queries(1):
         new_nb_accesses = item.nb_accesses
     assert new_nb_accesses == nb_accesses + 1
-    assert cache.get(key) == new_nb_accesses  # Cache should now contain the new value
+    # Cache should now contain the new value
+    assert cache.get(new_key) == new_nb_accesses
 
 
 def test_models_items_nb_accesses_cache_is_invalidated_on_access_removal(
@@ -664,8 +671,8 @@ def test_models_items_nb_accesses_cache_is_invalidated_on_access_removal(
 ):
     """Test that the cache is invalidated when a item access is deleted."""
     item = factories.ItemFactory()
-    key = f"item_{item.id!s}_nb_accesses"
     access = factories.UserItemAccessFactory(item=item)
+    key = item.get_nb_accesses_cache_key()
 
     # Initially, the nb_accesses should be cached
     assert item.nb_accesses == 1
@@ -673,13 +680,104 @@ def test_models_items_nb_accesses_cache_is_invalidated_on_access_removal(
 
     # Remove the access and check if cache is invalidated
     access.delete()
-    assert cache.get(key) is None  # Cache should be invalidated
+    new_key = item.get_nb_accesses_cache_key()
+    assert new_key != key
+    assert cache.get(new_key) is None  # Cache should be invalidated
 
     # Recompute the nb_accesses (this should trigger a cache set)
     with django_assert_num_queries(1):
         new_nb_accesses = item.nb_accesses
     assert new_nb_accesses == 0
-    assert cache.get(key) == 0  # Cache should now contain the new value
+    assert cache.get(new_key) == 0  # Cache should now contain the new value
+
+
+def test_models_items_nb_accesses_cache_is_invalidated_on_descendants(
+    django_assert_num_queries,
+):
+    """
+    Changing the accesses of an item should invalidate the cache of its descendants
+    without querying them.
+    """
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    child = factories.ItemFactory(parent=parent, type=models.ItemTypeChoices.FOLDER)
+    grand_child = factories.ItemFactory(parent=child)
+    sibling = factories.ItemFactory(parent=parent)
+
+    assert grand_child.nb_accesses == 0
+    assert sibling.nb_accesses == 0
+    parent_keys = [
+        item.get_nb_accesses_cache_key() for item in [parent, child, grand_child]
+    ]
+    sibling_key = sibling.get_nb_accesses_cache_key()
+
+    with django_assert_num_queries(0):
+        child.invalidate_subtree_caches()
+
+    assert parent.get_nb_accesses_cache_key() == parent_keys[0]
+    assert child.get_nb_accesses_cache_key() != parent_keys[1]
+    assert grand_child.get_nb_accesses_cache_key() != parent_keys[2]
+    assert sibling.get_nb_accesses_cache_key() == sibling_key
+
+    factories.UserItemAccessFactory(item=child)
+    assert grand_child.nb_accesses == 1
+    assert sibling.nb_accesses == 0
+
+
+@pytest.mark.parametrize("sample_rate, expected", [(0, 0), (1, 2)])
+def test_models_items_nb_accesses_cache_stats_sampled(settings, sample_rate, expected):
+    """Only the sampled lookups of the nb_accesses cache should be counted."""
+    settings.NB_ACCESSES_CACHE_STATS_SAMPLE_RATE = sample_rate
+    models.reset_nb_accesses_cache_stats()
+    item = factories.ItemFactory()
+
+    assert item.nb_accesses == 0  # miss
+    assert item.nb_accesses == 0  # hit
+
+    stats = models.get_nb_accesses_cache_stats()
+    assert stats["hits"] + stats["misses"] == expected
+
+
+def test_models_items_prefetch_nb_accesses(django_assert_num_queries):
+    """The number of accesses of many items should be computed in one query."""
+    parent = factories.ItemFactory(
+        type=models.ItemTypeChoices.FOLDER, users=[factories.UserFactory()]
+    )
+    items = [
+        factories.ItemFactory(
+            parent=parent, users=factories.UserFactory.create_batch(i)
+        )
+        for i in range(3)
+    ]
+    cached_item = factories.ItemFactory()
+    assert cached_item.nb_accesses == 0
+    items.append(cached_item)
+
+    with django_assert_num_queries(1):
+        models.Item.objects.prefetch_nb_accesses(items)
+
+    with django_assert_num_queries(0):
+        assert [item.nb_accesses for item in items] == [1, 2, 3, 0]
+
+    # Values were written back to the cache
+    items = list(models.Item.objects.filter(id__in=[item.id for item in items]))
+    with django_assert_num_queries(0):
+        models.Item.objects.prefetch_nb_accesses(items)
+
+
+def test_models_items_nb_accesses_cache_stats(settings):
+    """Hits and misses of the nb_accesses cache should be counted."""
+    settings.NB_ACCESSES_CACHE_STATS_SAMPLE_RATE = 1
+    models.reset_nb_accesses_cache_stats()
+    item = factories.ItemFactory()
+
+    assert item.nb_accesses == 0
+    assert item.nb_accesses == 0
+    assert item.nb_accesses == 0
+
+    assert models.get_nb_accesses_cache_stats() == {"hits": 2, "misses": 1}
+
+    models.reset_nb_accesses_cache_stats()
+    assert models.get_nb_accesses_cache_stats() == {"hits": 0, "misses": 0}
 
 
 @pytest.mark.parametrize("item_type", models.ItemTypeChoices.values)
@@ -824,6 +922,44 @@ def test_models_items_unique_title_in_current_path_soft_deleted():
     )
 
 
+def test_models_items_unique_title_in_current_path_move():
+    """Moving an item to a folder holding a live item with its title should fail."""
+    target = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    factories.ItemFactory(
+        parent=target, title="folder", type=models.ItemTypeChoices.FOLDER
+    )
+    item = factories.ItemFactory(title="folder", type=models.ItemTypeChoices.FOLDER)
+    child = factories.ItemFactory(parent=item, type=models.ItemTypeChoices.FOLDER)
+
+    with pytest.raises(ValidationError) as exc_info:
+        child.move(target)
+
+    assert exc_info.value.error_dict["target"][0].code == (
+        "item_move_title_already_exists"
+    )
+
+
+def test_models_items_unique_title_in_current_path_restore():
+    """Restoring an item which title was reused meanwhile should fail."""
+    parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    item = factories.ItemFactory(
+        parent=parent, title="folder", type=models.ItemTypeChoices.FOLDER
+    )
+    item.soft_delete()
+    factories.ItemFactory(
+        parent=parent, title="folder", type=models.ItemTypeChoices.FOLDER
+    )
+
+    with pytest.raises(ValidationError) as exc_info:
+        item.restore()
+
+    assert exc_info.value.error_dict["title"][0].code == (
+        "item_restore_title_already_exists"
+    )
+    item.refresh_from_db()
+    assert item.deleted_at is not None
+
+
 def test_models_items_numchild():
     """The numchild property should return the number of children."""
     parent = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
@@ -1009,3 +1145,128 @@ def test_models_items_soft_delete_main_workspace():
     with pytest.raises(RuntimeError) as excinfo:
         item.soft_delete()
     assert str(excinfo.value) == "The main workspace cannot be deleted."
+
+
+# inherited links
+
+
+def test_models_items_inherited_links_create_child():
+    """Children should inherit the links of their ancestors that are not restricted."""
+    root = factories.ItemFactory(
+        link_reach="authenticated",
+        link_role="editor",
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    parent = factories.ItemFactory(
+        parent=root,
+        link_reach="restricted",
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    child = factories.ItemFactory(
+        parent=parent, link_reach="public", link_role="reader"
+    )
+
+    assert root.inherited_links == []
+    assert parent.inherited_links == ["authenticated:editor"]
+    child.refresh_from_db()
+    assert child.inherited_links == ["authenticated:editor"]
+    assert child.get_inherited_links() == [
+        {"link_reach": "authenticated", "link_role": "editor"}
+    ]
+
+
+def test_models_items_inherited_links_link_update():
+    """Updating the links of an item should update the links of its descendants."""
+    root = factories.ItemFactory(
+        link_reach="restricted", type=models.ItemTypeChoices.FOLDER
+    )
+    parent = factories.ItemFactory(
+        parent=root, link_reach="restricted", type=models.ItemTypeChoices.FOLDER
+    )
+    child = factories.ItemFactory(parent=parent, link_reach="restricted")
+    unrelated = factories.ItemFactory(link_reach="restricted")
+
+    root.link_reach = "public"
+    root.link_role = "reader"
+    root.save()
+
+    parent.refresh_from_db()
+    child.refresh_from_db()
+    unrelated.refresh_from_db()
+    assert parent.inherited_links == ["public:reader"]
+    assert child.inherited_links == ["public:reader"]
+    assert unrelated.inherited_links == []
+
+    parent.link_reach = "authenticated"
+    parent.link_role = "editor"
+    parent.save()
+
+    child.refresh_from_db()
+    assert child.inherited_links == ["authenticated:editor", "public:reader"]
+
+    root.link_reach = "restricted"
+    root.save()
+
+    parent.refresh_from_db()
+    child.refresh_from_db()
+    assert parent.inherited_links == []
+    assert child.inherited_links == ["authenticated:editor"]
+
+
+def test_models_items_inherited_links_move():
+    """Moving an item should recompute the links inherited by the moved subtree."""
+    origin = factories.ItemFactory(
+        link_reach="public", link_role="editor", type=models.ItemTypeChoices.FOLDER
+    )
+    target = factories.ItemFactory(
+        link_reach="authenticated",
+        link_role="reader",
+        type=models.ItemTypeChoices.FOLDER,
+    )
+    item = factories.ItemFactory(
+        parent=origin, link_reach="restricted", type=models.ItemTypeChoices.FOLDER
+    )
+    child = factories.ItemFactory(parent=item, link_reach="restricted")
+
+    item.move(target)
+
+    item.refresh_from_db()
+    child.refresh_from_db()
+    assert item.inherited_links == ["authenticated:reader"]
+    assert child.inherited_links == ["authenticated:reader"]
+
+
+def test_models_items_readable_inherited():
+    """Items should be readable through the links and accesses of their ancestors."""
+    user = factories.UserFactory()
+    public_root = factories.ItemFactory(
+        link_reach="public", type=models.ItemTypeChoices.FOLDER
+    )
+    public_child = factories.ItemFactory(parent=public_root, link_reach="restricted")
+    authenticated_root = factories.ItemFactory(
+        link_reach="authenticated", type=models.ItemTypeChoices.FOLDER
+    )
+    authenticated_child = factories.ItemFactory(
+        parent=authenticated_root, link_reach="restricted"
+    )
+    access_root = factories.ItemFactory(
+        link_reach="restricted",
+        type=models.ItemTypeChoices.FOLDER,
+        users=[user],
+    )
+    access_child = factories.ItemFactory(parent=access_root, link_reach="restricted")
+    factories.ItemFactory(link_reach="restricted")
+
+    assert set(models.Item.objects.readable(AnonymousUser())) == {
+        public_root,
+        public_child,
+    }
+    assert set(models.Item.objects.readable(user)) == {
+        public_root,
+        public_child,
+        authenticated_root,
+        authenticated_child,
+        access_root,
+        access_child,
+        user.get_main_workspace(),
+    }
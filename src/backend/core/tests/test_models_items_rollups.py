@@ -0,0 +1,195 @@
+"""
+Unit tests for the size and files rollups of items
+"""
+
+import pytest
+
+from core import factories, models
+from core.tasks.item import merge_item_rollup_deltas
+
+pytestmark = pytest.mark.django_db
+
+
+def get_rollups(*items):
+    """Return the total_size and total_files of items as stored in database."""
+    rollups = {
+        item_id: (total_size, total_files)
+        for item_id, total_size, total_files in models.Item.objects.filter(
+            id__in=[item.id for item in items]
+        ).values_list("id", "total_size", "total_files")
+    }
+    return [rollups[item.id] for item in items]
+
+
+def create_tree():
+    """Create a root folder holding a folder holding an uploaded file."""
+    root = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    folder = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
+    file = factories.ItemFactory(
+        parent=folder, type=models.ItemTypeChoices.FILE, filename="file.txt"
+    )
+    file.mark_uploaded("text/plain", 10)
+    return root, folder, file
+
+
+def test_models_items_rollups_upload():
+    """Ending an upload should add the file to the rollups of all its ancestors."""
+    root, folder, file = create_tree()
+    other = factories.ItemFactory(
+        parent=root, type=models.ItemTypeChoices.FILE, filename="other.txt"
+    )
+
+    other.mark_uploaded("text/plain", 5)
+
+    assert get_rollups(root, folder, file, other) == [
+        (15, 2),
+        (10, 1),
+        (10, 1),
+        (5, 1),
+    ]
+
+
+def test_models_items_rollups_soft_delete_restore():
+    """
+    Soft deleted items should be removed from the rollups of their ancestors but keep
+    their own until they are restored.
+    """
+    root, folder, file = create_tree()
+
+    folder.soft_delete()
+    assert get_rollups(root, folder, file) == [(0, 0), (10, 1), (10, 1)]
+
+    folder.refresh_from_db()
+    folder.restore()
+    assert get_rollups(root, folder, file) == [(10, 1), (10, 1), (10, 1)]
+
+
+def test_models_items_rollups_nested_soft_delete():
+    """
+    Items deleted before one of their ancestors should stay out of its rollups when
+    it is restored.
+    """
+    root, folder, file = create_tree()
+    file.soft_delete()
+    folder.refresh_from_db()
+    folder.soft_delete()
+
+    assert get_rollups(root, folder, file) == [(0, 0), (0, 0), (10, 1)]
+
+    folder.refresh_from_db()
+    folder.restore()
+    assert get_rollups(root, folder, file) == [(0, 0), (0, 0), (10, 1)]
+
+
+def test_models_items_rollups_move():
+    """Moving an item should transfer its rollups from old to new ancestors."""
+    root, folder, file = create_tree()
+    target = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+
+    file.move(target)
+
+    assert get_rollups(root, folder, target) == [(0, 0), (0, 0), (10, 1)]
+
+
+def test_models_items_rollups_delete():
+    """Deleting an item should remove it from the rollups of its ancestors."""
+    root, folder, file = create_tree()
+
+    file.delete()
+
+    assert get_rollups(root, folder) == [(0, 0), (0, 0)]
+
+
+def test_models_items_rollups_upload_during_deletion_propagation():
+    """
+    A file uploaded in a subtree which deletion is still being propagated should only
+    be counted up to the root of the deleted subtree, as its other descendants.
+    """
+    root, folder, _file = create_tree()
+    pending = factories.ItemFactory(
+        parent=folder, type=models.ItemTypeChoices.FILE, filename="pending.txt"
+    )
+
+    folder.soft_delete(asynchronous=True)
+    pending.refresh_from_db()
+    assert pending.ancestors_deleted_at is None
+    pending.mark_uploaded("text/plain", 5)
+
+    assert get_rollups(root, folder, pending) == [(0, 0), (15, 2), (5, 1)]
+
+
+def test_models_items_rollups_upload_during_restoration_propagation():
+    """
+    A file uploaded in a subtree which restoration is still being propagated should
+    be counted in the rollups of all its ancestors.
+    """
+    root, folder, _file = create_tree()
+    pending = factories.ItemFactory(
+        parent=folder, type=models.ItemTypeChoices.FILE, filename="pending.txt"
+    )
+    folder.soft_delete()
+    folder.refresh_from_db()
+
+    folder.restore(asynchronous=True)
+    pending.refresh_from_db()
+    assert pending.ancestors_deleted_at is not None
+    pending.mark_uploaded("text/plain", 5)
+
+    assert get_rollups(root, folder, pending) == [(15, 2), (15, 2), (5, 1)]
+
+
+def test_models_items_rollups_deltas_merged_on_next_propagation():
+    """Pending deltas should be merged along with the next direct update."""
+    root, folder, file = create_tree()
+    models.ItemRollupDelta.objects.create(item=root, total_size=3, total_files=1)
+
+    file.delete()
+
+    assert get_rollups(root, folder) == [(3, 1), (0, 0)]
+    assert not models.ItemRollupDelta.objects.exists()
+
+
+def test_models_items_rollups_pending_deltas_moved():
+    """
+    The pending deltas of a folder, counted by its ancestors while its row was locked,
+    should be transferred with its rollups when it is moved or deleted.
+    """
+    root, folder, _file = create_tree()
+    other = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    # Simulate an upload propagated while the row of the folder was locked
+    models.Item.objects.filter(pk=folder.pk).update(total_size=0, total_files=0)
+    models.ItemRollupDelta.objects.create(item=folder, total_size=10, total_files=1)
+    folder.refresh_from_db()
+
+    target = factories.ItemFactory(type=models.ItemTypeChoices.FOLDER)
+    folder.move(target)
+
+    assert get_rollups(root, target) == [(0, 0), (10, 1)]
+
+    folder.refresh_from_db()
+    folder.move(other)
+    folder.refresh_from_db()
+    folder.delete()
+
+    assert get_rollups(target, other) == [(0, 0), (0, 0)]
+
+
+def test_models_items_rollups_deltas_merge_task():
+    """The periodic task should merge the pending deltas of each item."""
+    root, folder, _file = create_tree()
+    models.ItemRollupDelta.objects.create(item=root, total_size=5, total_files=1)
+    models.ItemRollupDelta.objects.create(item=root, total_size=-2)
+    models.ItemRollupDelta.objects.create(item=folder, total_size=5, total_files=1)
+
+    assert merge_item_rollup_deltas() == 2
+
+    assert get_rollups(root, folder) == [(13, 2), (15, 2)]
+    assert not models.ItemRollupDelta.objects.exists()
+
+
+def test_models_items_rollups_stored_size_pending_deltas():
+    """The stored size of an item should include its pending rollup deltas."""
+    root, _folder, _file = create_tree()
+    models.ItemRollupDelta.objects.create(item=root, total_size=5, total_files=1)
+
+    assert root.get_stored_size() == 15
@@ -0,0 +1,116 @@
+"""
+Unit tests for the StorageQuota model and the ledger of the storage used by users
+"""
+
+from django.core.exceptions import ValidationError
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def get_used_size(user):
+    """Return the storage used by a user according to the ledger."""
+    quota = models.StorageQuota.objects.filter(user=user).first()
+    return quota.used_size if quota else 0
+
+
+def create_uploaded_file(parent, size):
+    """Create a file in a folder and end its upload."""
+    file = factories.ItemFactory(
+        parent=parent, type=models.ItemTypeChoices.FILE, filename=f"{size:d}.txt"
+    )
+    file.mark_uploaded("text/plain", size)
+    return file
+
+
+def test_models_storage_quotas_upload():
+    """
+    Ending an upload should add the size of the file to the ledger of the creator of
+    the workspace, whoever uploaded it.
+    """
+    owner = factories.UserFactory()
+    root = factories.ItemFactory(creator=owner, type=models.ItemTypeChoices.FOLDER)
+    folder = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
+
+    create_uploaded_file(folder, 10)
+    create_uploaded_file(root, 5)
+
+    assert get_used_size(owner) == 15
+    assert get_used_size(folder.creator) == 0
+
+
+def test_models_storage_quotas_hard_delete():
+    """
+    Files should be counted until hard deleted, including the ones deleted before
+    their ancestor.
+    """
+    owner = factories.UserFactory()
+    root = factories.ItemFactory(creator=owner, type=models.ItemTypeChoices.FOLDER)
+    folder = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
+    create_uploaded_file(folder, 10)
+    file = create_uploaded_file(folder, 5)
+    create_uploaded_file(root, 1)
+
+    file.soft_delete()
+    folder.refresh_from_db()
+    folder.soft_delete()
+    assert get_used_size(owner) == 16
+
+    folder.hard_delete()
+    assert get_used_size(owner) == 1
+
+
+def test_models_storage_quotas_move():
+    """Files moved to the workspace of another user should count in their quota."""
+    owner = factories.UserFactory()
+    other = factories.UserFactory()
+    root = factories.ItemFactory(creator=owner, type=models.ItemTypeChoices.FOLDER)
+    target = factories.ItemFactory(creator=other, type=models.ItemTypeChoices.FOLDER)
+    folder = factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
+    create_uploaded_file(folder, 10)
+
+    folder.move(target)
+
+    assert get_used_size(owner) == 0
+    assert get_used_size(other) == 10
+
+
+def test_models_storage_quotas_available_size(settings):
+    """
+    The size available should be computed from the quota of the user, defaulting to
+    the setting, and be None if not limited.
+    """
+    settings.STORAGE_QUOTA_DEFAULT_MAX_SIZE = None
+    owner = factories.UserFactory()
+    root = factories.ItemFactory(creator=owner, type=models.ItemTypeChoices.FOLDER)
+    create_uploaded_file(root, 10)
+
+    assert models.StorageQuota.objects.get_available_size(root) is None
+
+    settings.STORAGE_QUOTA_DEFAULT_MAX_SIZE = 30
+    assert models.StorageQuota.objects.get_available_size(root) == 20
+
+    models.StorageQuota.objects.filter(user=owner).update(max_size=5)
+    assert models.StorageQuota.objects.get_available_size(root) == 0
+
+
+def test_models_storage_quotas_create_file_used_up(settings):
+    """Files can not be created in a workspace which quota is used up."""
+    settings.STORAGE_QUOTA_DEFAULT_MAX_SIZE = 10
+    owner = factories.UserFactory()
+    root = factories.ItemFactory(creator=owner, type=models.ItemTypeChoices.FOLDER)
+    create_uploaded_file(root, 10)
+
+    with pytest.raises(ValidationError) as excinfo:
+        factories.ItemFactory(
+            parent=root, type=models.ItemTypeChoices.FILE, filename="file.txt"
+        )
+
+    assert excinfo.value.error_dict["size"][0].code == (
+        "item_create_storage_quota_exceeded"
+    )
+    # Folders can still be created
+    factories.ItemFactory(parent=root, type=models.ItemTypeChoices.FOLDER)
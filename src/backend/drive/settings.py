@@ -156,6 +156,16 @@ class Base(Configuration):
         environ_name="ITEM_FILE_MAX_SIZE",
         environ_prefix=None,
     )
+    # Size of the files a user can store in their workspaces, unless overridden for
+    # the user in the admin. Not limited if not set. Files are counted at the end of
+    # their upload: the upload policies of a batch share the quota left, but files
+    # created by separate requests are each allowed the whole quota left, so that
+    # concurrent uploads can exceed it until they end.
+    STORAGE_QUOTA_DEFAULT_MAX_SIZE = values.IntegerValue(
+        None,
+        environ_name="STORAGE_QUOTA_DEFAULT_MAX_SIZE",
+        environ_prefix=None,
+    )
 
     item_UNSAFE_MIME_TYPES = [
         # Executable Files
@@ -380,6 +390,22 @@ class Base(Configuration):
     TRASHBIN_CUTOFF_DAYS = values.Value(
         30, environ_name="TRASHBIN_CUTOFF_DAYS", environ_prefix=None
     )
+    # Above this number of descendants, the soft deletion or restoration of an item is
+    # propagated to its descendants by a background task, in batches of this size
+    ITEM_SUBTREE_ASYNC_THRESHOLD = values.PositiveIntegerValue(
+        1000, environ_name="ITEM_SUBTREE_ASYNC_THRESHOLD", environ_prefix=None
+    )
+    ITEM_SUBTREE_PROPAGATION_BATCH_SIZE = values.PositiveIntegerValue(
+        1000, environ_name="ITEM_SUBTREE_PROPAGATION_BATCH_SIZE", environ_prefix=None
+    )
+    # Maximum number of expired items purged from the trashbin per scheduled run
+    TRASHBIN_PURGE_BATCH_SIZE = values.PositiveIntegerValue(
+        100, environ_name="TRASHBIN_PURGE_BATCH_SIZE", environ_prefix=None
+    )
+    # Number of descendants deleted at once when purging a hard deleted item
+    ITEM_DELETION_BATCH_SIZE = values.PositiveIntegerValue(
+        1000, environ_name="ITEM_DELETION_BATCH_SIZE", environ_prefix=None
+    )
 
     # Mail
     EMAIL_BACKEND = values.Value("django.core.mail.backends.smtp.EmailBackend")
@@ -424,6 +450,38 @@ class Base(Configuration):
     # Celery
     CELERY_BROKER_URL = values.Value("redis://redis:6379/0")
     CELERY_BROKER_TRANSPORT_OPTIONS = values.DictValue({})
+    CELERY_BEAT_SCHEDULE = {
+        "purge-expired-trashbin-items": {
+            "task": "core.tasks.item.purge_expired_trashbin_items",
+            "schedule": values.PositiveIntegerValue(
+                3600, environ_name="TRASHBIN_PURGE_INTERVAL", environ_prefix=None
+            ),
+        },
+        "merge-item-child-count-deltas": {
+            "task": "core.tasks.item.merge_item_child_count_deltas",
+            "schedule": values.PositiveIntegerValue(
+                60,
+                environ_name="ITEM_CHILD_COUNT_MERGE_INTERVAL",
+                environ_prefix=None,
+            ),
+        },
+        "merge-item-rollup-deltas": {
+            "task": "core.tasks.item.merge_item_rollup_deltas",
+            "schedule": values.PositiveIntegerValue(
+                60,
+                environ_name="ITEM_ROLLUP_MERGE_INTERVAL",
+                environ_prefix=None,
+            ),
+        },
+        "flush-link-traces": {
+            "task": "core.tasks.item.flush_link_traces",
+            "schedule": values.PositiveIntegerValue(
+                10,
+                environ_name="LINK_TRACE_FLUSH_INTERVAL",
+                environ_prefix=None,
+            ),
+        },
+    }
 
     # Session
     SESSION_ENGINE = "django.contrib.sessions.backends.cache"
@@ -585,6 +643,86 @@ class Base(Configuration):
         environ_prefix=None,
     )
 
+    # Shorter queries match too many titles by trigram similarity to be useful
+    ITEM_SEARCH_MIN_LENGTH = values.PositiveIntegerValue(
+        default=3,
+        environ_name="ITEM_SEARCH_MIN_LENGTH",
+        environ_prefix=None,
+    )
+
+    # Maximum number of items selected for one zip download
+    ITEM_DOWNLOAD_MAX_SELECTION = values.PositiveIntegerValue(
+        default=1000,
+        environ_name="ITEM_DOWNLOAD_MAX_SELECTION",
+        environ_prefix=None,
+    )
+    # Share of the nb_accesses cache lookups counted in its hit/miss statistics
+    NB_ACCESSES_CACHE_STATS_SAMPLE_RATE = values.FloatValue(
+        default=0.0,
+        environ_name="NB_ACCESSES_CACHE_STATS_SAMPLE_RATE",
+        environ_prefix=None,
+    )
+    # Delay in seconds during which a media authorization is served from cache
+    ITEM_MEDIA_AUTH_CACHE_TIMEOUT = values.PositiveIntegerValue(
+        default=5,
+        environ_name="ITEM_MEDIA_AUTH_CACHE_TIMEOUT",
+        environ_prefix=None,
+    )
+    # Number of items returned by the recent items feed
+    ITEM_RECENTS_LIMIT = values.PositiveIntegerValue(
+        default=20,
+        environ_name="ITEM_RECENTS_LIMIT",
+        environ_prefix=None,
+    )
+    # Minimum delay in seconds between two updates of the access date of a link trace
+    LINK_TRACE_ACCESS_UPDATE_INTERVAL = values.PositiveIntegerValue(
+        default=60,
+        environ_name="LINK_TRACE_ACCESS_UPDATE_INTERVAL",
+        environ_prefix=None,
+    )
+    # Delay in seconds between two writes of the link traces buffered in cache
+    LINK_TRACE_FLUSH_INTERVAL = values.PositiveIntegerValue(
+        default=10,
+        environ_name="LINK_TRACE_FLUSH_INTERVAL",
+        environ_prefix=None,
+    )
+
+    # Text search configuration used to index and search the content of files
+    ITEM_CONTENT_SEARCH_CONFIG = values.Value(
+        "simple",
+        environ_name="ITEM_CONTENT_SEARCH_CONFIG",
+        environ_prefix=None,
+    )
+    # Larger files are not read to extract their content
+    ITEM_CONTENT_EXTRACTION_MAX_SIZE = values.PositiveIntegerValue(
+        default=50 * (2**20),  # 50MB
+        environ_name="ITEM_CONTENT_EXTRACTION_MAX_SIZE",
+        environ_prefix=None,
+    )
+
+    # Maximum number of items created by one bulk creation request
+    ITEM_BULK_CREATE_MAX_SIZE = values.PositiveIntegerValue(
+        default=2000,
+        environ_name="ITEM_BULK_CREATE_MAX_SIZE",
+        environ_prefix=None,
+    )
+
+    # Maximum depth of items in the tree, i.e. of manifests created at once under an
+    # item, as the paths of deeper items would exceed the size of index rows
+    ITEM_MAX_DEPTH = values.PositiveIntegerValue(
+        default=50,
+        environ_name="ITEM_MAX_DEPTH",
+        environ_prefix=None,
+    )
+
+    # Above this number of results, paginated lists and admin changelists report the
+    # count estimated by the database planner instead of running an exact COUNT(*)
+    PAGINATION_COUNT_ESTIMATE_THRESHOLD = values.PositiveIntegerValue(
+        default=10000,
+        environ_name="PAGINATION_COUNT_ESTIMATE_THRESHOLD",
+        environ_prefix=None,
+    )
+
     # pylint: disable=invalid-name
     @property
     def ENVIRONMENT(self):